@@ -0,0 +1,347 @@
+import os
+import re
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import builtins
+import tempfile
+import contextlib
+from typing import Callable, Dict, List
+
+from colorama import init, Fore
+
+init(autoreset=True)
+
+pathScript = os.path.dirname(os.path.abspath(__file__))
+pathBench = None  # временный каталог запуска, создаётся в main и удаляется при выходе
+results = {}  # название замера -> лучшее время в секундах
+words = ['Сохранить', 'Отмена', 'Удалить', 'Редактировать', 'Список', 'Пользователь', 'Настройки', 'Поиск',
+         'Загрузка', 'Ошибка', 'Документ', 'Отчёт', 'Создать', 'Закрыть', 'Выбрать', 'Период']
+
+
+def generateResources(path: str, countLeaves: int, seed: int = 1, langs: List[str] = ['ru', 'en']) -> None:
+    """Генерируем синтетический файл перевода с заданным количеством строк (от 1k до 200k и больше)
+
+    Args:
+        path (str): путь к файлу
+        countLeaves (int): количество строк в ветке каждого языка
+        seed (int, optional): зерно генератора. Defaults to 1.
+        langs (List[str], optional): языки. Defaults to ['ru', 'en'].
+    """
+    rnd = random.Random(seed)
+    texts = [' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 4))) for _ in range(countLeaves)]
+    lines = ['const resources = {']
+    for lang in langs:
+        lines += ['    %s: {' % lang, '        translation: {']
+        count = 0
+        numModule = 0
+        while count < countLeaves:
+            lines.append('            module%d: {' % numModule)
+            for numSection in range(10):
+                lines.append('                section%d: {' % numSection)
+                for numLeaf in range(50):
+                    lines.append("                    key%d: '%s'," % (numLeaf, texts[count % len(texts)]))
+                    count += 1
+                lines.append('                },')
+            lines.append('            },')
+            numModule += 1
+        lines += ['        },', '    },']
+    lines += ['};', '', 'export default resources;', '']
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+        f.close()
+
+
+def generateSources(path: str, countFiles: int, shareCyrillic: float = 0.3, shareTemplates: float = 1/6,
+                    shareJsx: float = 1/6, seed: int = 1) -> List[str]:
+    """Генерируем синтетические исходники фронтенда (.js, .ts, .jsx, .tsx): часть файлов содержит кириллицу
+    в строках, шаблонных строках, тексте JSX и комментариях, остальные - только латиницу
+
+    Args:
+        path (str): каталог
+        countFiles (int): количество файлов
+        shareCyrillic (float, optional): доля файлов с кириллицей. Defaults to 0.3.
+        shareTemplates (float, optional): доля блоков с шаблонными строками. Defaults to 1/6.
+        shareJsx (float, optional): доля блоков с JSX (только в .jsx и .tsx). Defaults to 1/6.
+        seed (int, optional): зерно генератора. Defaults to 1.
+
+    Returns:
+        List[str]: пути до файлов
+    """
+    rnd = random.Random(seed)
+    paths = []
+    for numFile in range(countFiles):
+        cyrillic = rnd.random() < shareCyrillic
+        extension = ['.jsx', '.js', '.tsx', '.ts'][numFile % 4]
+
+        def word():
+            return rnd.choice(words) if cyrillic and rnd.random() < 0.3 else rnd.choice(['value', 'item', 'data', 'list'])
+        lines = ["import React from 'react';", "import { t } from 'i18next';", '']
+        for numBlock in range(40):
+            kind = rnd.random()
+            if kind < shareTemplates:
+                lines.append('const message%d = `%s ${user.name} %s`;' % (numBlock, word(), word()))
+            elif kind < shareTemplates+shareJsx and extension in ('.jsx', '.tsx'):
+                lines += ['export const Item%d = ({ count }) => (' % numBlock,
+                          '    <div className="item" title="%s">' % word(),
+                          '        %s {count}' % word(),
+                          '        <span>%s</span>' % word(),
+                          '    </div>',
+                          ');']
+            else:
+                kind = rnd.randint(0, 3)
+                if kind == 0:
+                    lines.append("// %s" % word())
+                    lines.append("const label%d = '%s';" % (numBlock, word()))
+                elif kind == 1:
+                    lines.append('const title%d = "%s " + count + " %s";' % (numBlock, word(), word()))
+                elif kind == 2:
+                    lines += ['/**', ' * %s' % word(), ' */',
+                              'function calc%d(a, b) {' % numBlock,
+                              '    return a / b > 1 ? a : b;',
+                              '}']
+                else:
+                    lines.append('const options%d = { key: \'%s\', value: %d, enabled: true };' % (numBlock, word(), numBlock))
+        pathFile = os.path.join(path, 'file%d%s' % (numFile, extension))
+        with open(pathFile, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines)+'\n')
+            f.close()
+        paths.append(pathFile)
+    return paths
+
+
+def measure(name: str, func: Callable, repeat: int = 5, setup: Callable = None) -> float:
+    """Замеряем лучшее время выполнения функции, результат попадает в results
+
+    Args:
+        name (str): название замера
+        func (Callable): функция
+        repeat (int, optional): количество повторов. Defaults to 5.
+        setup (Callable, optional): подготовка перед каждым повтором, в замер не входит. Defaults to None.
+
+    Returns:
+        float: лучшее время в секундах
+    """
+    best = None
+    for _ in range(repeat):
+        if setup != None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter()-start
+        best = elapsed if best == None else min(best, elapsed)
+    print(Fore.GREEN + '%-40s' % name + Fore.RESET + ' %9.2f ms' % (best*1000))
+    results[name] = best
+    return best
+
+
+def benchLoader(countLeaves: int) -> None:
+    """Замеряем загрузку файла перевода: без снимка (холодный старт) и со снимком (тёплый старт)
+
+    Args:
+        countLeaves (int): количество строк в файле перевода
+    """
+    generateResources(t.pathResources, countLeaves)
+    print(Fore.YELLOW + 'resources.js: %d строк, %d KB' % (countLeaves, os.path.getsize(t.pathResources) // 1024))
+
+    def cold():
+        if os.path.isfile(t.pathResourcesSnapshot):
+            os.remove(t.pathResourcesSnapshot)
+        t.loadResources()
+
+    measure('load (cold) %d' % countLeaves, cold)
+    measure('load (warm) %d' % countLeaves, t.loadResources)
+
+
+def benchResources(countLeaves: int) -> None:
+    """Замеряем работу с переводом: поиск существующих переводов (searchOptionsKey), проверку
+    и добавление ключей (checkTKey, addResources) и запись файла перевода (saveResources)
+
+    Args:
+        countLeaves (int): количество строк в файле перевода
+    """
+    rnd = random.Random(2)
+    queries = [' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 3))) for _ in range(200)]
+    existingKeys = ['module%d.section%d.key%d' % (i % max(1, countLeaves // 500), i % 10, i % 50) for i in range(500)]
+    newKeys = ['bench.new%d.key%d' % (i // 50, i) for i in range(1000)]
+
+    def reset():
+        generateResources(t.pathResources, countLeaves)
+        t.pendingResources.clear()
+        t.loadResources()
+        t.buildSearchIndex()
+
+    def checkKeys():
+        for key in existingKeys+newKeys[:500]:
+            try:
+                t.checkTKey(key)
+            except t.ForbiddenRewriting:
+                pass
+
+    def addKeys(keys: List[str]):
+        for key in keys:
+            for lang in t.resourcesData.keys():
+                t.addResources('Новое значение', key, lang)
+
+    reset()
+    measure('searchOptionsKey x200 %d' % countLeaves, lambda: [t.searchOptionsKey(query) for query in queries], 3)
+    measure('checkTKey x1000 %d' % countLeaves, checkKeys)
+    measure('addResources x1000 %d' % countLeaves, lambda: addKeys(newKeys), 3, reset)
+    measure('saveResources (patch) +100 %d' % countLeaves, t.saveResources, 3, lambda: [reset(), addKeys(newKeys[:100])])
+    measure('saveResources (full) %d' % countLeaves, t.saveResources, 3,
+            lambda: [reset(), t.removeResources(existingKeys[0])])
+
+
+def extractCandidatesCascade(path: str) -> List[dict]:
+    """Прежний построчный поиск строк (каскад регулярных выражений) - для сравнения с лексером
+
+    Args:
+        path (str): путь до файла
+
+    Returns:
+        List[dict]: найденные строки
+    """
+    listRegex = [
+        ('`', '(`[^`]*[а-я]+[^`]*`)', r'(?:`)+([^`]*[а-я]+[^`]*)(?:`)+', True),
+        ('\'', '(\'[^\']*[а-я]+[^\']*\')', r'(?:\')+([^\']*[а-я]+[^\']*)(?:\')+', True),
+        ('"', '("[^"]*[а-я]+[^"]*")', r'(?:")+([^"]*[а-я]+[^"]*)(?:")+', True),
+        ('><', '(>[^>]*[а-я]+[^<]*<)', r'(?:>)+([^>]*[а-я]+[^<]*)(?:<)+', False),
+    ]
+    candidates = []
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+        f.close()
+    for numLine, line in enumerate(lines):
+        if re.search(r'^[\s\t]*\/\/', line, flags=re.IGNORECASE) or re.search(r'^[\s\t]*\/\*', line, flags=re.IGNORECASE) \
+                or re.search(r'^[\s\t]*\*', line, flags=re.IGNORECASE) or re.search(r'//\sНЕ\sПЕРЕВЕДЕННО\s!!!', line, flags=re.IGNORECASE):
+            continue
+        if re.search('[а-я]+', line, flags=re.IGNORECASE):
+            textInclusion = None
+            for pattern, inclusion, exclusion, full in listRegex:
+                if re.search(inclusion, line, flags=re.IGNORECASE):
+                    for textInclusion in re.findall(inclusion, line, flags=re.IGNORECASE):
+                        textExclusion = re.sub(exclusion, r'\1', textInclusion, flags=re.IGNORECASE)
+                        candidates.append({'numLine': numLine, 'pattern': pattern, 'textExclusion': textExclusion,
+                                           'textReplace': textInclusion if full else textExclusion})
+            if re.search(r'(?:\/\/)+.*[а-я]+.*', line, flags=re.IGNORECASE) or re.search(r'(?:\/\*)+.*[а-я]+.*', line, flags=re.IGNORECASE):
+                continue
+            if textInclusion == None:
+                candidates.append({'numLine': numLine, 'pattern': None})
+    return candidates
+
+
+def benchExtraction(countFiles: int) -> None:
+    """Замеряем поиск строк с кириллицей: прежний построчный каскад, лексер и лексер с предварительной проверкой байтов,
+    а также parseFile целиком (оператор игнорирует все строки, вывод отбрасывается)
+
+    Args:
+        countFiles (int): количество файлов
+    """
+    pathSources = os.path.join(pathBench, 'module')
+    os.makedirs(pathSources, exist_ok=True)
+    paths = generateSources(pathSources, countFiles)
+    print(Fore.YELLOW + 'исходники: %d файлов' % countFiles)
+    measure('extraction (cascade) %d' % countFiles, lambda: [extractCandidatesCascade(path) for path in paths], 3)
+    measure('extraction (lexer) %d' % countFiles, lambda: [t.extractCandidates(path) for path in paths], 3)
+    measure('scan (mmap prefilter + lexer) %d' % countFiles, lambda: [t.scanFile(path) for path in paths], 3)
+
+    def parseFiles():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path in paths[:200]:
+                t.parseFile(path)
+    measure('parseFile x200 (ignore all)', parseFiles, 3)
+
+
+def saveResults(path: str) -> None:
+    """Записываем результаты замеров в JSON (базовая линия для сравнения)
+
+    Args:
+        path (str): путь до файла
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'python': sys.version.split()[0], 'results': results}, f, ensure_ascii=False, indent=2)
+        f.close()
+
+
+def loadResults(path: str) -> Dict[str, float]:
+    """Читаем результаты замеров из JSON
+
+    Args:
+        path (str): путь до файла
+
+    Returns:
+        Dict[str, float]: название замера -> время в секундах
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+        f.close()
+    return data['results']
+
+
+def compareResults(old: Dict[str, float], new: Dict[str, float], threshold: float) -> int:
+    """Сравниваем замеры с базовой линией: замедление больше порога считается регрессией
+
+    Args:
+        old (Dict[str, float]): базовая линия
+        new (Dict[str, float]): новые замеры
+        threshold (float): допустимое замедление (0.1 - на 10%)
+
+    Returns:
+        int: количество регрессий
+    """
+    regressions = 0
+    for name in new:
+        if name not in old:
+            print('%-40s' % name + ' %9.2f ms' % (new[name]*1000) + '  (нет в базовой линии)')
+            continue
+        ratio = new[name]/old[name] if old[name] else 1
+        color = Fore.RED if ratio > 1+threshold else Fore.GREEN if ratio < 1-threshold else Fore.RESET
+        regressions += ratio > 1+threshold
+        print('%-40s' % name + ' %9.2f ms -> %9.2f ms ' % (old[name]*1000, new[name]*1000) + color + '%+6.1f%%' % ((ratio-1)*100))
+    print((Fore.RED if regressions else Fore.GREEN) + 'Регрессий: %d' % regressions)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замеры t.py на синтетических данных (ввод оператора заменён заглушкой)')
+    parser.add_argument('leaves', nargs='*', type=int, help='размеры файла перевода, строк (по умолчанию 1000 10000 100000)')
+    parser.add_argument('--files', type=int, default=2000, help='количество исходников для поиска строк')
+    parser.add_argument('--save', metavar='FILE', help='записать результаты в JSON')
+    parser.add_argument('--compare', metavar='FILE', nargs='+',
+                        help='FILE - сравнить запуск с базовой линией, OLD NEW - сравнить два файла без запуска')
+    parser.add_argument('--threshold', type=float, default=0.1, help='допустимое замедление, доля (по умолчанию 0.1)')
+    args = parser.parse_args()
+    if args.compare != None and len(args.compare) == 2:
+        sys.exit(1 if compareResults(loadResults(args.compare[0]), loadResults(args.compare[1]), args.threshold) else 0)
+
+    with tempfile.TemporaryDirectory(prefix='t_bench_') as pathBench:
+        try:
+            with open(os.path.join(pathBench, '.env'), 'w', encoding='utf-8') as f:
+                f.write('PATH_MODULE="%s"\n' % os.path.join(pathBench, 'module'))
+                f.write('PATH_RESOURCES="%s"\n' % os.path.join(pathBench, 'resources.js'))
+                f.write('MODULE_NAME="bench"\n')
+                f.write('TRANSLATE_TO_ENG="N"\n')
+                f.write('JOURNAL=""\n')
+                f.close()
+            if args.save != None:
+                args.save = os.path.abspath(args.save)
+            if args.compare != None:
+                args.compare = [os.path.abspath(path) for path in args.compare]
+            os.chdir(pathBench)
+            sys.path.insert(0, pathScript)
+            builtins.input = lambda prompt='': '1'  # на любой вопрос - "1 - игнорировать"
+            import t
+
+            for countLeaves in args.leaves or [1000, 10000, 100000]:
+                benchLoader(countLeaves)
+                benchResources(countLeaves)
+            benchExtraction(args.files)
+            if args.save != None:
+                saveResults(args.save)
+            if args.compare != None:
+                sys.exit(1 if compareResults(loadResults(args.compare[0]), results, args.threshold) else 0)
+        finally:
+            os.chdir(pathScript)  # каталог удаляется после выхода из него
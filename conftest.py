@@ -0,0 +1,117 @@
+"""Общее для тестов t.py (python -m pytest): модуль импортируется с временным .env
+(заглушка переводчика, без снимков, журнала, индекса и кеша перевода), а каждый тест работает
+во временном каталоге со своим модулем и файлом перевода
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+pathEnv = tempfile.mkdtemp(prefix='t_test_')
+with open(os.path.join(pathEnv, '.env'), 'w', encoding='utf-8') as f:
+    f.write('PATH_MODULE="'+os.path.join(pathEnv, 'mod')+'"\n'
+            'PATH_RESOURCES="'+os.path.join(pathEnv, 'tr', 'resources.js')+'"\n'
+            'MODULE_NAME="mbo"\n'
+            'TRANSLATE_TO_ENG="Y"\n'
+            'IBM_API_KEY=""\n'
+            'IBM_URL=""\n'
+            'TRANSLATOR_STUB="Y"\n'
+            'RESOURCES_SNAPSHOT=""\n'
+            'SCAN_CACHE=""\n'
+            'TRANSLATION_CACHE=""\n'
+            'JOURNAL=""\n')
+    f.close()
+pathCwd = os.getcwd()
+os.chdir(pathEnv)
+try:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import t
+finally:
+    os.chdir(pathCwd)
+    shutil.rmtree(pathEnv)
+
+resourcesText = '''const resources = {
+    ru: {
+        translation: {
+            mbo: {
+                save: 'Сохранить',
+                example: { getData: 'Получить данные' },
+                arr: 'Массив',
+                arrow: 'Стрелка',
+                yes: 'Это \\'да\\'',
+            },
+        },
+    },
+    en: {
+        translation: {
+            mbo: {
+                save: 'Save',
+                example: { getData: 'Get data' },
+                arr: 'Array',
+                arrow: 'Arrow',
+                yes: 'It is \\'yes\\'',
+            },
+        },
+    },
+};
+
+export default resources;
+'''
+
+
+class CountingTranslator(t.StubTranslator):
+    """Заглушка переводчика, которая запоминает запросы
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text, model_id=None):
+        self.calls.append(list(text))
+        return super().translate(text, model_id)
+
+
+@pytest.fixture
+def translator(monkeypatch):
+    """Пустой кеш машинного перевода и заглушка переводчика со счётчиком запросов
+    """
+    translator = CountingTranslator()
+    monkeypatch.setattr(t, 'language_translator', translator)
+    monkeypatch.setattr(t, 'pathTranslationCache', '')
+    t.translationCache.clear()
+    yield translator
+    t.translationCache.clear()
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch):
+    """Каталог модуля и файл перевода во временном каталоге, состояние t.py - как после запуска
+    """
+    pathModule = tmp_path / 'mod'
+    pathModule.mkdir()
+    (tmp_path / 'tr').mkdir()
+    pathResources = tmp_path / 'tr' / 'resources.js'
+    pathResources.write_text(resourcesText, encoding='utf-8')
+    monkeypatch.setattr(t, 'pathModule', str(pathModule))
+    monkeypatch.setattr(t, 'pathResources', str(pathResources))
+    monkeypatch.chdir(tmp_path)
+    t.resourcesData.clear()
+    t.resourcesLayout.update({'text': None, 'branches': {}, 'leaves': set(), 'spans': {}, 'mtime': None, 'size': None})
+    t.pendingResources.clear()
+    t.pendingWrites['files'].clear()
+    t.pendingWrites['resources'] = False
+    t.scanCache.clear()
+    t.loadResources()
+    t.buildSearchIndex()
+    return tmp_path
+
+
+def getTree(path) -> dict:
+    """Дерево перевода, прочитанное из файла заново
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+        f.close()
+    return t.parseResources(text)[0]
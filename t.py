@@ -1,11 +1,45 @@
 import os
+import time
+import io
+import json
+import hashlib
+import heapq
+import itertools
+import math
+import pickle
+import bisect
+import mmap
+import fnmatch
+import subprocess
+import argparse
+import csv
+import sqlite3
+import sys
+import ctypes
+import ctypes.util
+import select
+import struct
+import atexit
+import cProfile
+import functools
 from dotenv import load_dotenv, dotenv_values
 import re
-from typing import List, Union
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from colorama import Fore, init
 from datetime import datetime
 from random import randint
+from queue import Queue
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+try:
+    import readline
+except ImportError:  # в Windows readline нет, ключи вводятся без автодополнения
+    readline = None
 from ibm_watson import LanguageTranslatorV3
+from ibm_cloud_sdk_core import DetailedResponse
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 
 load_dotenv()
@@ -17,11 +51,146 @@ pathModule = config['PATH_MODULE']
 
 pathResources = config['PATH_RESOURCES']
 resourcesData = {}
+resourcesLayout = {
+    'text': None,  # текст файла перевода в том виде, в котором он записан на диск
+    'branches': {},  # путь до объекта -> { close: смещение строки с закрывающей скобкой, last: конец последнего ключа, indent: отступ ключей }
+    'leaves': set(),  # пути до значений
+    'spans': {},  # путь до ключа -> (начало ключа, конец значения); None - устарели после вставки
+    'mtime': None,
+    'size': None,
+}
+pendingResources = []  # добавленные (и удалённые - значение None), но ещё не записанные в файл перевода значения [(путь, значение), ...]
+resourcesCompact = config.get('RESOURCES_COMPACT') == 'Y'  # хранить дерево в CompactResources
+pathResourcesSnapshot = config.get('RESOURCES_SNAPSHOT', '.t_resources.pickle')
+resourcesSnapshotVersion = 3  # увеличиваем при изменении формата дерева или карты структуры файла перевода
+
+"""Лексемы файла перевода (подмножество JavaScript: объект из строк, массивов и вложенных объектов)
+"""
+resourcesTokenRegex = re.compile(r'''
+    (?P<space>\s+)
+    |(?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\]|\\.)*`)
+    |(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<name>[a-zA-Z_$][\w$]*)
+    |(?P<punct>[{}\[\]:,+;=()])
+''', flags=re.VERBOSE | re.DOTALL)
 
 moduleName = config['MODULE_NAME']
 
+resourcesOutput = config.get('RESOURCES_OUTPUT') or 'file'  # file - один файл PATH_RESOURCES, json / esm - файл на язык и пространство имён
+pathResourcesSplit = config.get('RESOURCES_SPLIT_DIR') or os.path.join(os.path.dirname(pathResources), 'locales')
+resourcesNamespaces = [namespace.strip() for namespace in (config.get('RESOURCES_NAMESPACES') or moduleName).split(',') if namespace.strip()]
+rootNamespace = 'translation'  # пространство имён для значений верхнего уровня (как пространство имён по умолчанию в i18next)
+resourcesSplit = {
+    'files': {},  # (язык, пространство имён) -> путь до файла
+    'loaded': set(),  # загруженные пространства имён
+    'full': False,  # записать все пространства имён (дерево прочитано из PATH_RESOURCES)
+}
+jsEscapes = {'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0', '\n': ''}
+
+workers = int(config.get('WORKERS') or 0) or None
+
+walkWorkers = int(config.get('WALK_WORKERS') or 8)
+scanFileRegex = re.compile(config.get('SCAN_FILE_REGEX') or r'\.(?:js|ts|jsx|tsx)$', flags=re.IGNORECASE)
+scanInclude = [x.strip() for x in config.get('SCAN_INCLUDE', '').split(',') if x.strip() != '']
+scanExclude = [x.strip() for x in config.get('SCAN_EXCLUDE', 'node_modules,.git,dist,build,*.min.js').split(',') if x.strip() != '']
+scanIgnoreFile = config.get('SCAN_IGNORE_FILE', '.gitignore')
+scanMaxSize = int(config.get('SCAN_MAX_SIZE') or 0)  # байт, 0 - без ограничения
+
+pathProfile = config.get('PROFILE', '')  # JSON-сводка замеров сеанса, пусто - замеры выключены
+pathProfileDump = config.get('PROFILE_DUMP', '')  # дамп cProfile, пусто - выключен
+profileEnabled = pathProfile != ''
+profileLock = threading.Lock()
+profileStats = {
+    'timers': {},  # название -> [вызовов, секунд всего, секунд максимум]
+    'counters': {},  # название -> значение
+}
+
+watchForcePolling = config.get('WATCH_POLLING') == 'Y'
+watchInterval = float(config.get('WATCH_INTERVAL') or 1)  # секунд между обходами каталога при опросе
+watchDebounce = float(config.get('WATCH_DEBOUNCE') or 0.3)  # секунд тишины, после которых пачка событий обрабатывается
+inotifyMask = 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+pathScanCache = config.get('SCAN_CACHE', '.t_scan_cache.json')
+scanCacheVersion = 3  # увеличиваем при изменении правил поиска строк, чтобы сбросить индекс
+scanCache = {}
+
+pathTranslationCache = config.get('TRANSLATION_CACHE', '.t_translation_cache.json')
+translationCacheSize = int(config.get('TRANSLATION_CACHE_SIZE') or 10000)
+translateBatchSize = int(config.get('TRANSLATE_BATCH_SIZE') or 50)
+translationCache = OrderedDict()  # модель + исходная строка -> перевод, в порядке последнего использования
+translationLock = threading.Lock()
+
+pathTranslationMemory = config.get('TRANSLATION_MEMORY', '')  # база SQLite, общая для модулей и запусков (пусто - отключено)
+memoryTopK = int(config.get('TRANSLATION_MEMORY_TOP_K') or 5)
+memoryLock = threading.Lock()
+memoryState = {
+    'connection': None,
+    'disabled': pathTranslationMemory == '',
+}
+
+pathJournal = config.get('JOURNAL', '.t_journal.jsonl')
+flushInterval = float(config.get('FLUSH_INTERVAL') or 30)
+pendingWrites = {
+    'files': {},  # путь до файла -> текст файла и замены в нём (см. openReviewFile)
+    'resources': False,  # дерево resourcesData изменено, но файл перевода ещё не записан
+    'flushTime': time.monotonic(),
+}
+reviewState = {
+    'candidate': None,  # найденная строка (extractCandidates), по которой оператор сейчас принимает решение
+    'decision': None,  # что сделано с последней сохранённой строкой: { replaceText } или { mark: True } (см. commitEdit)
+}
+
+prefetchAhead = int(config.get('PREFETCH_AHEAD') or 5)
+prefetchState = {
+    'executor': None,  # ThreadPoolExecutor сеанса проверки (startPrefetch), None - вне сеанса подсказки считаются сразу
+}
+prefetchResults = {}  # (путь до файла, текст) -> Future с подсказками для этой строки
+
+suggestTopK = int(config.get('SUGGEST_TOP_K') or 10)
+suggestMinScore = float(config.get('SUGGEST_MIN_SCORE') or 0.3)
+
+searchLock = threading.RLock()
+resourcesGeneration = 0  # увеличивается при каждом изменении индекса поиска
+
+searchIndex = {
+    'leaves': {},  # путь в дереве resourcesData['ru'] -> { key, value, valueLower, valueCyrillicLower, lengthCyrillic, trigramCount, order }
+    'trigrams': {},  # триграмма нормализованного значения -> пути
+    'lengths': {},  # количество кириллических букв в значении -> пути
+    'orders': {},  # путь в дереве -> позиция в порядке обхода дерева
+    'counters': {},  # путь в дереве -> количество добавленных в него ключей
+}
+
+keyIndex = {
+    'types': {},  # ключ через точку (как в t('...')) -> 'leaf' (значение) / 'branch' (объект)
+    'sorted': [],  # те же ключи по алфавиту, для поиска по префиксу
+}
+keyCompletions = []  # варианты автодополнения ключа для текущего ввода
+
+if readline != None:
+    readline.set_completer_delims(' \t\n')
+    readline.parse_and_bind('bind ^I rl_complete' if 'libedit' in (readline.__doc__ or '') else 'tab: complete')
+
+class StubTranslator:
+    """Локальная заглушка LanguageTranslatorV3 для работы без сети (.env: TRANSLATOR_STUB):
+    вместо перевода кириллица транслитерируется латиницей
+    """
+    alphabet = dict(zip('абвгдеёжзийклмнопрстуфхцчшщъыьэюя', [
+        'a', 'b', 'v', 'g', 'd', 'e', 'e', 'zh', 'z', 'i', 'y', 'k', 'l', 'm', 'n', 'o', 'p',
+        'r', 's', 't', 'u', 'f', 'kh', 'ts', 'ch', 'sh', 'shch', '', 'y', '', 'e', 'yu', 'ya']))
+
+    def translate(self, text: List[str], model_id: str = None) -> DetailedResponse:
+        translations = []
+        for t in text:
+            translations.append({'translation': ''.join(
+                self.alphabet.get(x.lower(), x).capitalize() if x.isupper() else self.alphabet.get(x, x) for x in t)})
+        return DetailedResponse(response={'translations': translations})
+
+
 language_translator = None
-if config['TRANSLATE_TO_ENG'] == 'Y' and config['IBM_API_KEY'] != '' and config['IBM_URL'] != '':
+if config['TRANSLATE_TO_ENG'] == 'Y' and config.get('TRANSLATOR_STUB') == 'Y':
+    language_translator = StubTranslator()
+elif config['TRANSLATE_TO_ENG'] == 'Y' and config['IBM_API_KEY'] != '' and config['IBM_URL'] != '':
     authenticator = IAMAuthenticator(config['IBM_API_KEY'])
     language_translator = LanguageTranslatorV3(
         version='2018-05-01',
@@ -30,6 +199,103 @@ if config['TRANSLATE_TO_ENG'] == 'Y' and config['IBM_API_KEY'] != '' and config[
     language_translator.set_service_url(config['IBM_URL'])
 
 
+def timed(name: str):
+    """Декоратор замера времени функции (.env: PROFILE). Если замеры выключены, функция не оборачивается
+
+    Args:
+        name (str): название таймера
+    """
+    def decorator(func):
+        if not profileEnabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter()-start
+                with profileLock:
+                    timer = profileStats['timers'].setdefault(name, [0, 0.0, 0.0])
+                    timer[0] += 1
+                    timer[1] += elapsed
+                    timer[2] = max(timer[2], elapsed)
+        return wrapper
+    return decorator
+
+
+def countEvent(name: str, value: int = 1) -> None:
+    """Увеличение счётчика (.env: PROFILE)
+
+    Args:
+        name (str): название счётчика
+        value (int, optional): на сколько увеличить. Defaults to 1.
+    """
+    if not profileEnabled:
+        return
+    with profileLock:
+        profileStats['counters'][name] = profileStats['counters'].get(name, 0)+value
+
+
+def profileCall(func, *args) -> tuple:
+    """Вызов функции в процессе из пула с замерами: таймеры и счётчики процесса возвращаются
+    вместе с результатом и добавляются к замерам сеанса (mergeProfile)
+
+    Returns:
+        tuple: (результат, замеры процесса)
+    """
+    with profileLock:
+        profileStats['timers'].clear()
+        profileStats['counters'].clear()
+    result = func(*args)
+    return result, {'timers': dict(profileStats['timers']), 'counters': dict(profileStats['counters'])}
+
+
+def mergeProfile(item: tuple):
+    """Добавляем замеры процесса из пула к замерам сеанса (см. profileCall)
+
+    Args:
+        item (tuple): (результат, замеры процесса)
+
+    Returns:
+        результат функции
+    """
+    result, stats = item
+    with profileLock:
+        for name, (calls, seconds, longest) in stats['timers'].items():
+            timer = profileStats['timers'].setdefault(name, [0, 0.0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+            timer[2] = max(timer[2], longest)
+        for name, value in stats['counters'].items():
+            profileStats['counters'][name] = profileStats['counters'].get(name, 0)+value
+    return result
+
+
+def saveProfile(started: float, profiler: cProfile.Profile = None) -> None:
+    """Запись замеров сеанса при выходе: JSON-сводка (.env: PROFILE) и дамп cProfile (.env: PROFILE_DUMP)
+
+    Args:
+        started (float): время начала сеанса (time.perf_counter)
+        profiler (cProfile.Profile, optional): профилировщик, если включен. Defaults to None.
+    """
+    if profiler != None:
+        profiler.disable()
+        profiler.dump_stats(pathProfileDump)
+    if profileEnabled:
+        with profileLock:
+            summary = {
+                'duration': time.perf_counter()-started,
+                'timers': {name: {'calls': calls, 'seconds': seconds, 'max': longest}
+                           for name, (calls, seconds, longest) in sorted(profileStats['timers'].items())},
+                'counters': dict(sorted(profileStats['counters'].items())),
+            }
+        with open(pathProfile, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+            f.close()
+
+
 class EmptyValue(Exception):
     """Исключение если значение пустое"""
     pass
@@ -42,6 +308,11 @@ class EmptyValueKey(Exception):
         self.tKey = tKey
 
 
+class GitError(Exception):
+    """Исключение если git завершился с ошибкой"""
+    pass
+
+
 class ForbiddenRewriting(Exception):
     """Исключение если будет перезапись ключа"""
 
@@ -55,6 +326,230 @@ class NoSelect(Exception):
     pass
 
 
+class ResourceNode:
+    """Объект в общем для всех языков скелете ключей компактного дерева перевода (CompactResources)"""
+    __slots__ = ('children', 'langs', 'parent')
+
+    def __init__(self, parent: 'ResourceNode' = None):
+        self.children = {}  # часть ключа -> ResourceNode (объект) или int (номер значения в колонках языков)
+        self.langs = 0  # битовая маска языков, в которых есть этот объект
+        self.parent = parent
+
+
+class CompactResources:
+    """Компактное дерево перевода (.env: RESOURCES_COMPACT): части ключей интернированы, скелет ключей
+    один на все языки, значения лежат один раз в таблице строк, а у каждого языка - колонка номеров строк.
+    Снаружи дерево выглядит как обычные словари (ResourcesView)
+    """
+    __slots__ = ('skeleton', 'langs', 'columns', 'strings', 'stringIds', 'countSlots')
+
+    def __init__(self):
+        self.skeleton = ResourceNode()
+        self.langs = {}  # язык -> номер бита в ResourceNode.langs
+        self.columns = {}  # язык -> номера строк по номеру значения, -1 - значения нет
+        self.strings = []  # таблица строк
+        self.stringIds = {}  # строка -> номер в таблице строк
+        self.countSlots = 0
+
+    def getView(self, lang: str) -> 'ResourcesView':
+        """Раздел языка в виде словаря
+
+        Args:
+            lang (str): язык
+
+        Returns:
+            ResourcesView: раздел языка
+        """
+        if lang not in self.langs:
+            self.langs[lang] = len(self.langs)
+            self.columns[lang] = array('l')
+        self.skeleton.langs |= 1 << self.langs[lang]
+        return ResourcesView(self, lang, self.skeleton)
+
+    def load(self, lang: str, structure: dict) -> 'ResourcesView':
+        """Заполняем раздел языка из дерева словарей (без ResourcesView - так быстрее)
+
+        Args:
+            lang (str): язык
+            structure (dict): раздел языка
+
+        Raises:
+            TypeError: вызываем если ключ - значение в одном языке и объект в другом
+
+        Returns:
+            ResourcesView: раздел языка
+        """
+        view = self.getView(lang)
+        bit = 1 << self.langs[lang]
+        stack = [(self.skeleton, structure)]
+        while len(stack):
+            node, structure = stack.pop()
+            node.langs |= bit
+            for key, value in structure.items():
+                child = node.children.get(key)
+                if isinstance(value, str):
+                    if child == None:
+                        child = self.countSlots
+                        self.countSlots += 1
+                        node.children[sys.intern(key)] = child
+                    elif not isinstance(child, int):
+                        raise TypeError('ключ '+key+' - объект в другом языке')
+                    self.setValue(lang, child, value)
+                else:
+                    if child == None:
+                        child = ResourceNode(node)
+                        node.children[sys.intern(key)] = child
+                    elif isinstance(child, int):
+                        raise TypeError('ключ '+key+' - значение в другом языке')
+                    stack.append((child, value))
+        return view
+
+    def getValue(self, lang: str, slot: int) -> Optional[str]:
+        column = self.columns[lang]
+        if slot >= len(column) or column[slot] == -1:
+            return None
+        return self.strings[column[slot]]
+
+    def setValue(self, lang: str, slot: int, value: Optional[str]) -> None:
+        column = self.columns[lang]
+        if slot >= len(column):
+            column.extend([-1]*(slot+1-len(column)))
+        if value == None:
+            column[slot] = -1
+            return
+        stringId = self.stringIds.get(value)
+        if stringId == None:
+            stringId = len(self.strings)
+            self.strings.append(value)
+            self.stringIds[value] = stringId
+        column[slot] = stringId
+
+    def isUsed(self, slot: int) -> bool:
+        return any(self.getValue(lang, slot) != None for lang in self.columns)
+
+
+class ResourcesView(MutableMapping):
+    """Объект компактного дерева перевода для одного языка - ведёт себя как словарь:
+    значения - строки, вложенные объекты - такие же ResourcesView
+    """
+    __slots__ = ('store', 'lang', 'node')
+
+    def __init__(self, store: CompactResources, lang: str, node: ResourceNode):
+        self.store = store
+        self.lang = lang
+        self.node = node
+
+    def __getitem__(self, key: str) -> Union[str, 'ResourcesView']:
+        child = self.node.children[key]
+        if isinstance(child, int):
+            value = self.store.getValue(self.lang, child)
+            if value == None:
+                raise KeyError(key)
+            return value
+        if not child.langs & (1 << self.store.langs[self.lang]):
+            raise KeyError(key)
+        return ResourcesView(self.store, self.lang, child)
+
+    def __setitem__(self, key: str, value: Union[str, Mapping]) -> None:
+        key = sys.intern(key)
+        bit = 1 << self.store.langs[self.lang]
+        child = self.node.children.get(key)
+        if isinstance(value, str):
+            if isinstance(child, ResourceNode):
+                if child.langs & ~bit:
+                    raise TypeError('ключ '+key+' - объект в другом языке')
+                child = None
+            if child == None:
+                child = self.store.countSlots
+                self.store.countSlots += 1
+                self.node.children[key] = child
+            self.store.setValue(self.lang, child, value)
+            node = self.node
+            while node != None and not node.langs & bit:
+                node.langs |= bit
+                node = node.parent
+            return
+        if isinstance(child, int):
+            if any(self.store.getValue(lang, child) != None for lang in self.store.columns if lang != self.lang):
+                raise TypeError('ключ '+key+' - значение в другом языке')
+            self.store.setValue(self.lang, child, None)
+            child = None
+        if child == None:
+            child = ResourceNode(self.node)
+            self.node.children[key] = child
+        elif child.langs & bit:
+            ResourcesView(self.store, self.lang, child).clear()
+        node = child
+        while node != None and not node.langs & bit:
+            node.langs |= bit
+            node = node.parent
+        view = ResourcesView(self.store, self.lang, child)
+        for childKey, childValue in value.items():
+            view[childKey] = childValue
+
+    def __delitem__(self, key: str) -> None:
+        child = self.node.children[key]
+        if isinstance(child, int):
+            if self.store.getValue(self.lang, child) == None:
+                raise KeyError(key)
+            self.store.setValue(self.lang, child, None)
+            if not self.store.isUsed(child):
+                del self.node.children[key]
+            return
+        bit = 1 << self.store.langs[self.lang]
+        if not child.langs & bit:
+            raise KeyError(key)
+        stack = [child]
+        while len(stack):
+            node = stack.pop()
+            node.langs &= ~bit
+            for grandchild in node.children.values():
+                if isinstance(grandchild, int):
+                    self.store.setValue(self.lang, grandchild, None)
+                else:
+                    stack.append(grandchild)
+        if not child.langs:
+            del self.node.children[key]
+
+    def __iter__(self) -> Iterator[str]:
+        bit = 1 << self.store.langs[self.lang]
+        for key, child in list(self.node.children.items()):
+            if child.langs & bit if isinstance(child, ResourceNode) else self.store.getValue(self.lang, child) != None:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def setdefault(self, key: str, default: Union[str, Mapping] = None) -> Union[str, 'ResourcesView']:
+        # в отличие от MutableMapping.setdefault возвращаем объект дерева, а не переданный словарь
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+def compactResources(tree: dict) -> dict:
+    """Перекладываем дерево перевода из словарей в компактное хранилище (CompactResources)
+
+    Args:
+        tree (dict): дерево { язык: { translation: { ... } } }
+
+    Returns:
+        dict: язык -> ResourcesView; исходное дерево, если в языках один ключ - то значение, то объект
+    """
+    store = CompactResources()
+    compact = {}
+    try:
+        for lang, section in tree.items():
+            compact[lang] = store.load(lang, section)
+    except TypeError as e:
+        print(Fore.YELLOW+'Компактное дерево перевода не построено ('+str(e)+'), используются словари', end='\n')
+        return tree
+    return compact
+
+
 def getCamelCase(noCamelCaseText: str) -> str:
     """Приходит строка, получаем camelCase вариант этой строки
 
@@ -66,43 +561,31 @@ def getCamelCase(noCamelCaseText: str) -> str:
     """
     camelCaseText = ''.join(
         x for x in noCamelCaseText.title() if not x.isspace())
-    camelCaseText = camelCaseText[0].lower() + camelCaseText[1:]
+    camelCaseText = camelCaseText[:1].lower() + camelCaseText[1:]
     return re.sub('[^a-zA-Z]', '', camelCaseText)
 
 
 def checkTKey(textKey: str) -> None:
-    """Проверка ключа в resourcesData, на момент возможной перезаписи и пр. ошибки
+    """Проверка ключа по индексу ключей keyIndex, на момент возможной перезаписи и пр. ошибки.
+    Дерево resourcesData при проверке не изменяется
 
     Args:
         textKey (str): ключ
-    """
-    def checkStructure(structure: str, listKey: List[str]):
-        """Рекурсивная проверка дерева ключей resourcesData
-
-        Args:
-            structure (str): текущая структура проверки
-            listKey (List[str]): оставшиеся ключи
 
-        Raises:
-            EmptyValueKey: вызываем если имя ключа - пустая строка
-            ForbiddenRewriting: вызываем если будет перезапись
-        """
-        key = listKey.pop(0)
-        if key == '':
+    Raises:
+        EmptyValueKey: вызываем если имя ключа - пустая строка
+        ForbiddenRewriting: вызываем если будет перезапись
+    """
+    loadKeyNamespace(textKey)
+    listKey = textKey.split('.')
+    for i in range(len(listKey)):
+        if listKey[i] == '':
             raise EmptyValueKey(textKey)
-        if (len(listKey) == 0):
-            if key in structure:
-                raise ForbiddenRewriting(textKey, structure[key] if type(structure[key]) == str else '{ Object }')
-        else:
-            if key in structure and type(structure[key]) == str:
-                raise ForbiddenRewriting(textKey, structure[key])
-            else:
-                structure[key] = structure[key] if key in structure else {}
-                checkStructure(structure[key], listKey)
-    lang = 'ru' # проверяем дерево ключей исключительно по RU версии
-    resourcesData[lang] = resourcesData[lang] if lang in resourcesData else {}
-    resourcesData[lang]['translation'] = resourcesData[lang]['translation'] if 'translation' in resourcesData[lang] else {}
-    checkStructure(resourcesData[lang]['translation'], textKey.split('.'))
+        kind = keyIndex['types'].get('.'.join(listKey[:i+1]))
+        if kind == 'leaf':
+            raise ForbiddenRewriting(textKey, getResourceText('.'.join(listKey[:i+1])))
+        if kind == 'branch' and i == len(listKey)-1:
+            raise ForbiddenRewriting(textKey, '{ Object }')
 
 
 def addResources(text: str, textKey: str, lang: str) -> None:
@@ -113,705 +596,3849 @@ def addResources(text: str, textKey: str, lang: str) -> None:
         textKey (str): ключ
         lang (str): en / ru / cs / etc версия
     """
-    def setStructure(structure: str, listKey: List[str]):
-        key = listKey.pop(0)
-        if (len(listKey) == 0):
-            structure[key] = text
+    loadKeyNamespace(textKey)
+    listKey = textKey.split('.')
+    structure = resourcesData.setdefault(lang, {}).setdefault('translation', {})
+    for key in listKey[:-1]:
+        structure = structure.setdefault(key, {})
+    structure[listKey[-1]] = text
+    pendingResources.append(([lang, 'translation']+listKey, text))
+    if lang == 'ru':
+        indexKey(textKey)
+        indexResource(['translation']+listKey, text)
+
+
+def removeResources(textKey: str) -> None:
+    """Удаление ключа из дерева resourcesData во всех языках вместе с опустевшими объектами
+
+    Args:
+        textKey (str): ключ
+    """
+    listKey = textKey.split('.')
+    for lang in resourcesData.keys():
+        structures = [resourcesData[lang].get('translation', {})]
+        for key in listKey[:-1]:
+            if not isinstance(structures[-1].get(key), Mapping):
+                break
+            structures.append(structures[-1][key])
         else:
-            structure[key] = structure[key] if key in structure else {}
-            setStructure(structure[key], listKey)
-    resourcesData[lang] = resourcesData[lang] if lang in resourcesData else {}
-    resourcesData[lang]['translation'] = resourcesData[lang]['translation'] if 'translation' in resourcesData[lang] else {}
-    setStructure(resourcesData[lang]['translation'], textKey.split('.'))
+            if not isinstance(structures[-1].get(listKey[-1]), str):
+                continue
+            structures[-1].pop(listKey[-1])
+            for i in range(len(structures)-1, 0, -1):
+                if len(structures[i]):
+                    break
+                structures[i-1].pop(listKey[i-1])
+            pendingResources.append(([lang, 'translation']+listKey, None))
 
 
-def saveResources() -> None:
-    """Генерирует текст в виде типа данных Object в JavaScript
-    и сохраняет этот текст в файл перевода
+def indexKey(textKey: str) -> None:
+    """Добавление ключа и всех его родителей в индекс ключей keyIndex
+
+    Args:
+        textKey (str): ключ
+    """
+    listKey = textKey.split('.')
+    for i in range(1, len(listKey)+1):
+        key = '.'.join(listKey[:i])
+        if key not in keyIndex['types']:
+            bisect.insort(keyIndex['sorted'], key)
+        keyIndex['types'][key] = 'leaf' if i == len(listKey) else 'branch'
+
+
+def getResourceText(textKey: str) -> Optional[str]:
+    """Значение ключа в дереве resourcesData['ru']
+
+    Args:
+        textKey (str): ключ
 
     Returns:
-        None: None
+        Optional[str]: значение, None - если такого значения нет (или это объект)
+    """
+    if not isKeyLoaded(textKey):
+        loadKeyNamespace(textKey)
+    if keyIndex['types'].get(textKey) != 'leaf':
+        return None
+    structure = resourcesData['ru']['translation']
+    for key in textKey.split('.'):
+        structure = structure[key]
+    return structure
+
+
+def buildKeyIndex() -> None:
+    """Построение индекса ключей keyIndex по дереву resourcesData['ru']
     """
-    space = '    '
+    types = {}
 
-    def getText(resourcesData: dict, space: str):
-        text = ''
-        for key in resourcesData:
-            if (type(resourcesData[key]) == str):
-                text = text+space+key+': '+ ('\''+resourcesData[key]+'\',\n' if resourcesData[key].find('[', 0, 1) == -1 else resourcesData[key]+',\n')
+    def indexStructure(structure: dict, prefix: str):
+        for key in structure:
+            if not isinstance(structure[key], str):
+                types[prefix+key] = 'branch'
+                indexStructure(structure[key], prefix+key+'.')
             else:
-                text = text+space+key + \
-                    ': {\n'+getText(resourcesData[key],
-                                    space+'    ')+space+'},\n'
-        return text
-    text = getText(resourcesData, space)
-    mode = 'w' if os.path.isfile(pathResources) else 'a'
-    with open(pathResources, mode, encoding='utf-8') as f:
-        f.write('const resources = {\n\
-'+text+'\
-};\n\
-\n\
-export default resources;\n')
-        f.close()
+                types[prefix+key] = 'leaf'
+    indexStructure(resourcesData.get('ru', {}).get('translation', {}), '')
+    keyIndex['types'] = types
+    keyIndex['sorted'] = sorted(types)
 
 
-def getVarText(varList: Union[List[dict], List]) -> str:
-    """Получения переменных со значением в виде текста через запятую
+def getKeysByPrefix(prefix: str, limit: int = None) -> List[str]:
+    """Ключи, начинающиеся с префикса, по алфавиту. Например, все ключи внутри mbo.example - префикс 'mbo.example.'
 
     Args:
-        varList (Union[List[dict], List]): список словарей [{ varName, value }, ...]
+        prefix (str): префикс ключа
+        limit (int, optional): максимальное количество ключей. Defaults to None.
 
     Returns:
-        str: переменные со значениями в виде текста через запятую
+        List[str]: ключи
     """
-    varText = ''
-    if (varList != None and len(varList)):
-        varTextList = []
-        for var in varList:
-            varTextList.append(var['varName']+': '+var['value']
-                               if var['varName'] != var['value'] else var['varName'])
-        varText = ', '.join(varTextList)
-    return varText
+    start = bisect.bisect_left(keyIndex['sorted'], prefix)
+    end = bisect.bisect_left(keyIndex['sorted'], prefix+'\U0010ffff', start)
+    if limit != None:
+        end = min(end, start+limit)
+    return keyIndex['sorted'][start:end]
 
 
-def checkVar(t: str, inputEnable: bool = True) -> Union[List[dict], List]:
-    """Получение переменных (inputEnable=True) или проверка переменных (inputEnable=False)
+def completeKey(text: str, state: int) -> Optional[str]:
+    """Автодополнение ключа по Tab (readline): предлагаем ключи текущего уровня, объекты - с точкой на конце
 
     Args:
-        t (str): текст проверяемой строки
-        inputEnable (bool, optional): если необходим вывод с получением переменных и их значений иначе просто проверка переменных. Defaults to True.
+        text (str): введённая часть ключа
+        state (int): номер варианта
 
-    Raises:
-        EmptyValue: если указаное значение пусто
+    Returns:
+        Optional[str]: вариант дополнения или None, если вариантов больше нет
+    """
+    if state == 0:
+        keyCompletions.clear()
+        for key in getKeysByPrefix(text):
+            if key.find('.', len(text)) == -1:
+                keyCompletions.append(key+'.' if keyIndex['types'][key] == 'branch' else key)
+    return keyCompletions[state] if state < len(keyCompletions) else None
+
+
+def inputKey(prompt: str) -> str:
+    """Ввод ключа с автодополнением по Tab, если доступен readline
+
+    Args:
+        prompt (str): приглашение
 
     Returns:
-        Union[List[dict], List]: возвращаем переменные в виде списка словорей [{ varName, value }, ...]
+        str: введённый ключ
     """
-    if(re.search('\{\{[a-z]+\}\}', t, flags=re.IGNORECASE)):
-        try:
-            if inputEnable:
-                print('', end='\n')
-                print(Fore.MAGENTA+'В переводе обнаружены переменные', end='\n')
-            varList = []
-            for var in re.findall('\{\{([a-z]+)\}\}', t, flags=re.IGNORECASE):
-                value = input(
-                    'Укажите значение для переменной "{{'+var+'}}": ') if inputEnable else ''
-                if inputEnable and value == '':
-                    raise EmptyValue
-                varList.append({
-                    'varName': var,
-                    'value': value,
-                })
-        except EmptyValue:
-            print(
-                Fore.RED+'Ошибка! Значение переменной не может быть пустым, укажите переменные снова', end='\n')
-            checkVar(t, inputEnable)
-        else:
-            if inputEnable:
-                print('', end='\n')
-                print(Fore.MAGENTA +
-                      'Для переменных указаны следующие значения:', end='\n')
-                for var in varList:
-                    print('{{'+var['varName']+'}} -> '+var['value'], end='\n')
-                print('', end='\n')
-            save = input(
-                'Сохранить переменные? (y/n): ') if inputEnable else 'Y'
-            if (save == 'Y' or save == 'y'):
-                return varList
+    if readline != None:
+        readline.set_completer(completeKey)
+    try:
+        return input(prompt)
+    finally:
+        if readline != None:
+            readline.set_completer(None)
+
+
+def getNormalizedText(text: str) -> str:
+    """Нормализация строки для поиска: только кириллица, без пробелов, в нижнем регистре
+
+    Args:
+        text (str): строка
+
+    Returns:
+        str: нормализованная строка
+    """
+    return re.sub('[^а-яА-Я]', '', text).lower()
+
+
+def getTrigrams(text: str) -> set:
+    """Получаем триграммы строки
+
+    Args:
+        text (str): строка
+
+    Returns:
+        set: множество триграмм
+    """
+    return set(text[i:i+3] for i in range(len(text)-2))
+
+
+def indexResource(listKey: List[str], value: str) -> None:
+    """Добавление (или обновление) значения в индекс поиска существующих переводов
+
+    Args:
+        listKey (List[str]): путь до значения в дереве resourcesData['ru']
+        value (str): значение
+    """
+    global resourcesGeneration
+    with searchLock:
+        resourcesGeneration += 1
+        orders = searchIndex['orders']
+        counters = searchIndex['counters']
+        path = tuple(listKey)
+        for i in range(len(path)):
+            if path[:i+1] not in orders:
+                parent = path[:i]
+                counters[parent] = counters.get(parent, 0)+1
+                orders[path[:i+1]] = orders.get(parent, ())+(counters[parent],)
+        leaf = searchIndex['leaves'].get(path)
+        if leaf:
+            searchIndex['lengths'][leaf['lengthCyrillic']].discard(path)
+            for trigram in getTrigrams(getNormalizedText(leaf['value'])):
+                searchIndex['trigrams'][trigram].discard(path)
+        normalized = getNormalizedText(value)
+        trigrams = getTrigrams(normalized)
+        searchIndex['leaves'][path] = {
+            'key': '.'.join(key for key in listKey if key != 'translation'),
+            'value': value,
+            'valueLower': value.lower(),
+            'valueCyrillicLower': re.sub('[^а-яА-Я\s]', '', value).lower(),
+            'lengthCyrillic': len(normalized),
+            'trigramCount': len(trigrams),
+            'order': orders[path],
+        }
+        searchIndex['lengths'].setdefault(len(normalized), set()).add(path)
+        for trigram in trigrams:
+            searchIndex['trigrams'].setdefault(trigram, set()).add(path)
+
+
+def buildSearchIndex() -> None:
+    """Построение индекса поиска существующих переводов по дереву resourcesData['ru']
+    """
+    def indexStructure(structure: dict, listKey: List[str]):
+        for key in structure.keys():
+            if isinstance(structure[key], str):
+                indexResource(listKey+[key], structure[key])
             else:
-                repeat = input('Повторить определение переменных? (y/n): ')
-                if (repeat == 'Y' or repeat == 'y'):
-                    return checkVar(t, inputEnable)
-                else:
-                    return []
-    return []
+                indexStructure(structure[key], listKey+[key])
+    with searchLock:
+        for index in searchIndex.values():
+            index.clear()
+        indexStructure(resourcesData.get('ru', {}), [])
 
 
-def getKey(camelCase: str, pathKey: str, translation: str, tRu: str, file: os.DirEntry) -> str:
-    try:
-        tKey = input('Напишите ключ для перевода: ')
-        if tKey == '':
-            if camelCase == '':
-                raise EmptyValue
-            tKey = moduleName+'.'+camelCase
-        if tKey == '2':
-            tKey = moduleName+pathKey
-        checkTKey(tKey)
-        return tKey
-    except EmptyValueKey as e:
-        print(Fore.RED+'Один из ключей: '+e.tKey +
-                ' - пуст. Ключ не может быть пустым! Повторите перевод', end='\n')
-        return getKey(camelCase, pathKey, translation, tRu, file)
-    except ForbiddenRewriting as e:
-        print(Fore.RED+'Ошибка! В указанный ключ: '+e.tKey+', уже записано: '+e.tValue, end='\n')
-        print(Fore.RED+'Повторите перевод, укажите другой ключ...', end='\n')
-        return getKey(camelCase, pathKey, translation, tRu, file)
-    
+@timed('searchOptionsKey')
+def searchOptionsKey(textExclusion: str, limit: int = 296) -> List[dict]:
+    """Поиск существующего перевода по индексу: значение должно содержать найденную строку
+    (как есть, только кириллицу или кириллицу без пробелов) и быть не сильно длиннее неё
+
+    Args:
+        textExclusion (str): текст в строке который был ранее распарсен
+        limit (int, optional): максимальное количество вариантов. Defaults to 296.
+
+    Returns:
+        List[dict]: варианты в порядке обхода дерева [{ key, value }, ...]
+    """
+    with searchLock:
+        textExclusionOnlyCyrillic = re.sub('[^а-яА-Я\s]', '', textExclusion).lower()
+        textExclusionOnlyCyrillicNoSpace = re.sub('[^а-яА-Я]', '', textExclusion).lower()
+        textExclusionLower = textExclusion.lower()
+        maxLengthCyrillic = len(textExclusionOnlyCyrillicNoSpace)+3
+        if len(textExclusionOnlyCyrillicNoSpace) >= 3:
+            # совпадение возможно только если все триграммы строки есть в значении
+            postings = []
+            for trigram in getTrigrams(textExclusionOnlyCyrillicNoSpace):
+                postings.append(searchIndex['trigrams'].get(trigram, set()))
+            postings.sort(key=len)
+            paths = set(postings[0])
+            for posting in postings[1:]:
+                if not paths:
+                    break
+                paths &= posting
+        else:
+            paths = set()
+            for length in range(maxLengthCyrillic+1):
+                paths |= searchIndex['lengths'].get(length, set())
+        countEvent('suggestions.examined', len(paths))
+        optionsKey = []
+        for path in paths:
+            leaf = searchIndex['leaves'][path]
+            if len(textExclusionOnlyCyrillicNoSpace) > len(leaf['value']) or leaf['lengthCyrillic'] > maxLengthCyrillic:
+                continue
+            for text in (leaf['valueLower'], leaf['valueCyrillicLower']):
+                if textExclusionLower in text or textExclusionOnlyCyrillic in text or textExclusionOnlyCyrillicNoSpace in text:
+                    optionsKey.append(leaf)
+                    break
+        return [{
+            'key': leaf['key'],
+            'value': leaf['value'],
+        } for leaf in heapq.nsmallest(limit, optionsKey, key=lambda leaf: leaf['order'])]
 
-def translite(file: os.DirEntry, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
-    """Указываем перевод строки и всякие проверки строки...
+
+@timed('rankOptionsKey')
+def rankOptionsKey(textExclusion: str, topK: int = None, minScore: float = None) -> List[dict]:
+    """Поиск похожих существующих переводов: значения ранжируются по коэффициенту Жаккара
+    триграмм нормализованных строк, лучшие topK отбираются через ограниченную кучу
 
     Args:
-        file (os.DirEntry): файл, который парсим (его будем изменять)
-        lines (List[str]): все строки в файле
-        numLine (int): номер строки в файле, который парсим
         textExclusion (str): текст в строке который был ранее распарсен
-        textReplace (str): регулярное выражение для замены
+        topK (int, optional): максимальное количество вариантов (.env: SUGGEST_TOP_K). Defaults to None.
+        minScore (float, optional): минимальная схожесть от 0 до 1 (.env: SUGGEST_MIN_SCORE). Defaults to None.
 
-    Raises:
-        EmptyValue: вызываем если было указано пустое значение
-        DifferentCountVariables: вызываем если количество переменных отличается
-        DifferentVariables: вызываем если переменные отличается
+    Returns:
+        List[dict]: варианты по убыванию схожести [{ key, value, score }, ...]
     """
-    try:
-        translation = ''
-        if language_translator != None:
-            translation = language_translator.translate(
-                text=textExclusion, model_id='ru-en').get_result()
-            translation = translation['translations'][0]['translation']
-        tRu = input('Укажите строку перевода для "'+textExclusion +'" или оставьте пустым, чтобы принять как есть: ')
-        if tRu == '':
-            tRu = textExclusion
-        varText = getVarText(checkVar(tRu))
-        print('', end='\n')
-        print(Fore.MAGENTA +
-                'Для построения дерева ключей можно использовать символ "."\n----------\nНапример при вводе: '+moduleName+'.example.getData - итоговое выражение для перевода будет таким: t(\''+moduleName+'.example.getData\', { ... })\nИмя модуля ('+moduleName+') автоматически НЕ добавляется!\nВ файл с переводом будет добавлено:\n\n'+moduleName+': {\n    example: {\n        getData: \''+tRu+'\',\n    },\n},\n----------', end='\n\n')
-        camelCase = getCamelCase(translation)
-        print('', end='\n')
-        print('Предлагаем следующий ключ: '+moduleName+'.'+camelCase, end='\n')
-        pathKey = ''
-        try:
-            pathKeyList = file.path.partition(pathModule)[2].split('\\')
-            pathKeyListLastEl = pathKeyList[len(pathKeyList)-1].split('.')
-            pathKeyList[len(pathKeyList)-1] = pathKeyListLastEl[0]
-            pathKeyList = list(dict.fromkeys(pathKeyList))
-            pathKey = '.'.join(pathKeyList)+'.'+camelCase
-            pathKey = re.sub('\.components', '', pathKey)
-            pathKey = re.sub('\.component', '', pathKey)
-            print('Или такой ключ: '+moduleName+pathKey, end='\n')
-        except:
-            pass
-        print('', end='\n')
-        print(Fore.MAGENTA+'Оставьте поле пустым, чтобы принять '+('первый ' if pathKey != '' else '')+'предложенный вариант'+(' или введите цифру "2", чтобы принять второй вариант ключа' if pathKey != '' else ''), end='\n')
-        tKey = getKey(camelCase, pathKey, translation, tRu, file)
-        replaceTextY = '{t(\''+tKey+'\'' + \
-            ('' if varText == '' else ', { '+varText+' }')+')}'
-        replaceTextN = 't(\''+tKey+'\'' + \
-            ('' if varText == '' else ', { '+varText+' }')+')'
-        print('', end='\n')
-        print('Добавить фигурные скобки?', end='\n')
-        print('', end='\n')
-        print('Если да (y):', end='\n')
-        print(str(numLine+1)+': ' +
-              lines[numLine].replace(textReplace, replaceTextY, 1))
-        print('', end='\n')
-        print('Если нет (n):', end='\n')
-        print(str(numLine+1)+': ' +
-              lines[numLine].replace(textReplace, replaceTextN, 1))
-        print('', end='\n')
-        addCurlyBraces = input('(y/n): ')
-        if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
-            replaceText = replaceTextY
+    with searchLock:
+        topK = suggestTopK if topK == None else topK
+        minScore = suggestMinScore if minScore == None else minScore
+        normalized = getNormalizedText(textExclusion)
+        trigrams = getTrigrams(normalized)
+        if not trigrams:
+            # слишком короткая строка для триграмм - ищем по вхождению
+            return [dict(option, score=None) for option in searchOptionsKey(textExclusion, topK)]
+        # у значения со схожестью не ниже minScore есть хотя бы одна из самых редких
+        # len(trigrams)-ceil(minScore*len(trigrams))+1 триграмм строки - только по ним и собираем кандидатов
+        postings = sorted((searchIndex['trigrams'].get(trigram, set()) for trigram in trigrams), key=len)
+        candidates = set().union(*postings[:len(postings)-math.ceil(minScore*len(postings))+1])
+        common = Counter(itertools.chain.from_iterable(
+            posting if posting is postings[0] else posting & candidates for posting in postings))
+        countEvent('suggestions.examined', len(common))
+
+        def scores():
+            for path, count in common.items():
+                leaf = searchIndex['leaves'][path]
+                score = count/(len(trigrams)+leaf['trigramCount']-count)
+                if score >= minScore:
+                    yield score, -abs(leaf['lengthCyrillic']-len(normalized)), leaf
+        return [{
+            'key': leaf['key'],
+            'value': leaf['value'],
+            'score': score,
+        } for score, _, leaf in heapq.nlargest(topK, scores(), key=lambda item: item[:2])]
+
+
+def getResourceValue(value: str) -> str:
+    """Значение в виде текста для файла перевода
+
+    Args:
+        value (str): значение
+
+    Returns:
+        str: значение в кавычках (массивы - как есть)
+    """
+    if value.find('[', 0, 1) != -1:
+        return value
+    escape = {'\\': '\\\\', '\'': '\\\'', '\n': '\\n', '\r': '\\r'}  # перевод строки из шаблонной строки тоже экранируем
+    return '\''+re.sub(r"[\\'\n\r]", lambda m: escape[m.group(0)], value)+'\''
+
+
+def getResourceKey(key: str) -> str:
+    """Ключ в виде текста для файла перевода
+
+    Args:
+        key (str): ключ
+
+    Returns:
+        str: ключ (в кавычках, если это не идентификатор и не число)
+    """
+    return key if re.fullmatch('[a-zA-Z_$][\\w$]*|\\d+', key) else getResourceValue(key)
+
+
+def getResourcesText(structure: Mapping, space: str, text: List[str]) -> List[str]:
+    """Текст объекта JavaScript для файла перевода
+
+    Args:
+        structure (Mapping): объект дерева перевода
+        space (str): отступ ключей
+        text (List[str]): строки, к которым добавляется текст
+
+    Returns:
+        List[str]: те же строки
+    """
+    for key in structure:
+        if isinstance(structure[key], str):
+            text.append(space+getResourceKey(key)+': '+getResourceValue(structure[key])+',\n')
         else:
-            replaceText = replaceTextN
-        replaceLine = lines[numLine].replace(textReplace, replaceText, 1)
-        print('', end='\n')
-        print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
-        if (numLine-3) >= 0:
-            print(str(numLine-2)+': '+lines[numLine-3], end='')
-        if (numLine-2) >= 0:
-            print(str(numLine-1)+': '+lines[numLine-2], end='')
-        if (numLine-1) >= 0:
-            print(str(numLine-0)+': '+lines[numLine-1], end='')
-        print(Fore.GREEN+str(numLine+1)+': '+replaceLine, end='')
-        if (numLine+1) <= (len(lines)-1):
-            print(str(numLine+2)+': '+lines[numLine+1], end='')
-        if (numLine+2) <= (len(lines)-1):
-            print(str(numLine+3)+': '+lines[numLine+2], end='')
-        if (numLine+3) <= (len(lines)-1):
-            print(str(numLine+4)+': '+lines[numLine+3], end='')
-        print('', end='\n\n')
-        save = input('Сохраняем? (y/n): ')
-        if (save == 'Y' or save == 'y'):
+            text.append(space+getResourceKey(key)+': {\n')
+            getResourcesText(structure[key], space+'    ', text)
+            text.append(space+'},\n')
+    return text
+
+
+@timed('saveResources')
+def saveResources() -> None:
+    """Сохраняет изменения дерева resourcesData в файл перевода: новые значения вставляются
+    в текст файла на свои места (patchResources), а если это невозможно - генерирует текст
+    в виде типа данных Object в JavaScript целиком. В раздельном виде (.env: RESOURCES_OUTPUT) записываются
+    только изменённые пространства имён (saveSplitResources). Изменённые ключи попадают и в память переводов
+
+    Returns:
+        None: None
+    """
+    rememberResources(pendingResources)
+    if resourcesOutput != 'file':
+        saveSplitResources()
+        return
+    if patchResources():
+        return
+    text = ''.join(getResourcesText(resourcesData, '    ', ['const resources = {\n'])) + '\
+};\n\
+\n\
+export default resources;\n'
+    writeFileAtomic(pathResources, [text])
+    pendingResources.clear()
+    resourcesLayout.update(parseResources(text)[1])
+    resourcesLayout['mtime'] = os.stat(pathResources).st_mtime_ns
+    resourcesLayout['size'] = os.stat(pathResources).st_size
+
+
+def patchResources() -> bool:
+    """Вставка добавленных значений (pendingResources) в текст файла перевода по карте его структуры
+    (resourcesLayout), а удалённые ключи вырезаются из текста (cutResources): остальной текст файла
+    не меняется и не генерируется заново
+
+    Returns:
+        bool: False, если файл изменён не нами или значение некуда вставить (нужна полная генерация)
+    """
+    if resourcesLayout['text'] == None or not os.path.isfile(pathResources):
+        return False
+    stat = os.stat(pathResources)
+    if stat.st_mtime_ns != resourcesLayout['mtime'] or stat.st_size != resourcesLayout['size']:
+        return False
+    text = resourcesLayout['text']
+    branches = resourcesLayout['branches']
+    leaves = set(resourcesLayout['leaves'])
+    spans = resourcesLayout['spans']
+    removed = [listKey for listKey, value in pendingResources if value == None]
+    if len(removed):
+        if spans == None:
+            spans = parseResources(text)[1]['spans']
+        text = cutResources(text, spans, removed)
+        if text == None:
+            return False
+        layout = parseResources(text)[1]
+        branches, leaves, spans = layout['branches'], set(layout['leaves']), layout['spans']
+
+    def shift(branches: dict, position: int, length: int) -> dict:
+        # сдвигаем смещения после места вставки
+        return {branch: {
+            'close': layout['close']+length if layout['close'] != None and layout['close'] >= position else layout['close'],
+            'last': layout['last']+length if layout['last'] != None and layout['last'] >= position else layout['last'],
+            'indent': layout['indent'],
+        } for branch, layout in branches.items()}
+    for listKey, value in pendingResources:
+        path = tuple(listKey)
+        if value == None:
+            continue
+        if path in leaves or path in branches:
+            return False  # замена значения - нужна полная генерация
+        spans = None  # смещения ключей после вставки не пересчитываются
+        parent = path[:-1]
+        while parent not in branches:
+            if not len(parent):
+                return False
+            parent = parent[:-1]
+        if branches[parent]['close'] == None:
+            return False  # объект записан в одну строку - вставлять некуда
+        # после последнего ключа объекта может не быть запятой
+        last = branches[parent]['last']
+        if last != None and text[last-1] != ',':
+            text = text[:last]+','+text[last:]
+            branches = shift(branches, last, 1)
+        position = branches[parent]['close']
+        space = branches[parent]['indent']
+        insert = ''
+        added = {}
+        for i in range(len(parent), len(path)-1):
+            insert += space+getResourceKey(path[i])+': {\n'
+            space += '    '
+            added[path[:i+1]] = {'indent': space}
+        insert += space+getResourceKey(path[-1])+': '+getResourceValue(value)+',\n'
+        for branch in reversed(list(added.keys())):
+            added[branch]['last'] = position+len(insert)-1
+            space = space[:-4]
+            added[branch]['close'] = position+len(insert)
+            insert += space+'},\n'
+        branches = shift(branches, position, len(insert))
+        branches.update(added)
+        branches[parent]['last'] = position+len(insert)-1
+        text = text[:position]+insert+text[position:]
+        leaves.add(path)
+    writeFileAtomic(pathResources, [text])
+    pendingResources.clear()
+    resourcesLayout['text'] = text
+    resourcesLayout['branches'] = branches
+    resourcesLayout['leaves'] = leaves
+    resourcesLayout['spans'] = spans
+    resourcesLayout['mtime'] = os.stat(pathResources).st_mtime_ns
+    resourcesLayout['size'] = os.stat(pathResources).st_size
+    return True
+
+
+def cutResources(text: str, spans: Dict[tuple, Tuple[int, int]], removed: List[List[str]]) -> Optional[str]:
+    """Вырезаем удалённые ключи из текста файла перевода: для каждого удалённого значения - самый верхний
+    объект (или само значение), которого больше нет в дереве resourcesData, вместе с запятой,
+    комментарием в конце строки и переводом строки
+
+    Args:
+        text (str): текст файла перевода
+        spans (Dict[tuple, Tuple[int, int]]): путь до ключа -> (начало ключа, конец значения) в этом тексте
+        removed (List[List[str]]): пути до удалённых значений
+
+    Returns:
+        Optional[str]: новый текст, None - если ключа нет в тексте или он снова есть в дереве (нужна полная генерация)
+    """
+    ranges = set()
+    for listKey in removed:
+        path = tuple(listKey)
+        structure = resourcesData
+        for i in range(len(path)):
+            if not isinstance(structure, Mapping) or path[i] not in structure:
+                path = path[:i+1]
+                break
+            structure = structure[path[i]]
+        else:
+            return None
+        if path not in spans:
+            return None
+        start, end = spans[path]
+        lineStart = text.rfind('\n', 0, start)+1
+        if text[lineStart:start].strip() == '':
+            # ключ с начала строки - удаляем строки целиком
+            start = lineStart
+            match = re.compile(r'[ \t]*,?[ \t]*(?://[^\n]*)?(?:\n|$)').match(text, end)
+            end = match.end() if match else re.compile(r'[ \t]*,?').match(text, end).end()
+        else:
+            end = re.compile(r'[ \t]*,?[ \t]*').match(text, end).end()
+        ranges.add((start, end))
+    parts = []
+    position = 0
+    for start, end in sorted(ranges):
+        if start < position:
+            continue  # внутри уже удалённого объекта
+        parts.append(text[position:start])
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+@timed('writeFileAtomic')
+def writeFileAtomic(path: str, lines: List[str]) -> None:
+    """Запись файла через временный файл и переименование: файл либо старый, либо новый целиком
+
+    Args:
+        path (str): путь до файла
+        lines (List[str]): строки файла
+    """
+    with open(path+'.tmp', 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+    os.replace(path+'.tmp', path)
+    if profileEnabled:
+        countEvent('files.written')
+        countEvent('bytes.written', os.path.getsize(path))
+
+
+def writeJournal(entry: dict) -> None:
+    """Запись изменения в журнал (.env: JOURNAL) до того, как оно попадёт в файлы:
+    если сеанс прервётся, изменения из журнала будут применены при следующем запуске
+
+    Args:
+        entry (dict): изменение { path, hash, start, end, old, new, resource }
+    """
+    if pathJournal == '':
+        return
+    with open(pathJournal, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False)+'\n')
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+
+def openReviewFile(path: str) -> List[str]:
+    """Открываем файл для правки: правки копятся как замены (начало, конец, новый текст) в координатах
+    текста файла на момент открытия и записываются разом (flushEdits), поэтому несколько замен
+    в одной строке не сдвигают друг другу позиции
+
+    Args:
+        path (str): путь до файла
+
+    Returns:
+        List[str]: строки файла для вывода оператору
+    """
+    state = pendingWrites['files'].get(path)
+    if state == None:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+            f.close()
+        state = {
+            'text': text,  # текст на момент открытия, в его координатах - все замены
+            'lineStarts': [0]+[m.end() for m in newlineRegex.finditer(text)],
+            'edits': {},  # (начало, конец) -> новый текст
+            'written': set(),  # замены, уже записанные в файл
+            'hash': hashlib.sha1(text.encode('utf-8')).hexdigest(),  # хеш текста в файле сейчас
+        }
+        pendingWrites['files'][path] = state
+    lineStarts = state['lineStarts']
+    if lineStarts[-1] == len(state['text']):
+        lineStarts = lineStarts[:-1]  # после последнего перевода строки строки нет
+    return [state['text'][start:end] for start, end in zip(lineStarts, lineStarts[1:]+[len(state['text'])])]
+
+
+def isOverlapping(start: int, end: int, edits: Dict[Tuple[int, int], str]) -> bool:
+    """Пересекается ли замена с уже сделанными: вставка (start == end) пересекается с заменой,
+    если попадает внутрь неё, и с такой же вставкой
+
+    Args:
+        start (int): начало замены
+        end (int): конец замены
+        edits (Dict[Tuple[int, int], str]): сделанные замены (начало, конец) -> новый текст
+
+    Returns:
+        bool: True если пересекается
+    """
+    for editStart, editEnd in edits.keys():
+        if (start < editEnd and editStart < end) or (start, end) == (editStart, editEnd):
+            return True
+    return False
+
+
+def getLineRange(state: dict, lines: List[str], numLine: int) -> Tuple[int, int]:
+    """Начало и конец строки lines[numLine] в тексте файла, вместе со строками, объединёнными с ней (см. mergeLines)
+
+    Args:
+        state (dict): открытый файл (openReviewFile)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле
+
+    Returns:
+        Tuple[int, int]: начало и конец
+    """
+    last = numLine
+    while last+1 < len(lines) and lines[last+1] == '':
+        last += 1
+    end = state['lineStarts'][last+1] if last+1 < len(state['lineStarts']) else len(state['text'])
+    return state['lineStarts'][numLine], end
+
+
+def getEdit(state: dict, lines: List[str], numLine: int, replaceText: Optional[str]) -> Optional[Tuple[int, int, str]]:
+    """Замена для текущей найденной строки (reviewState['candidate'])
+
+    Args:
+        state (dict): открытый файл (openReviewFile)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, в которой находится найденная строка
+        replaceText (Optional[str]): чем заменить строку, None - отметить строку как непереведенную
+
+    Returns:
+        Optional[Tuple[int, int, str]]: (начало, конец, новый текст) или None, если файл изменился после сканирования
+    """
+    candidate = reviewState['candidate']
+    if replaceText == None:
+        start, end = getLineRange(state, lines, numLine)
+        if state['text'][end-1:end] == '\n':
+            end -= 1
+        return end, end, ' // НЕ ПЕРЕВЕДЕННО !!!'
+    if state['text'][candidate['start']:candidate['end']] != candidate['textReplace']:
+        return None
+    return candidate['start'], candidate['end'], replaceText
+
+
+def previewEdit(file: str, lines: List[str], numLine: int, replaceText: Optional[str], edit: Tuple[int, int, str] = None) -> str:
+    """Строка файла со всеми сделанными в ней заменами и заменой для текущей найденной строки
+
+    Args:
+        file (str): путь до файла
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле
+        replaceText (Optional[str]): чем заменить строку, None - отметить строку как непереведенную
+        edit (Tuple[int, int, str], optional): готовая замена вместо replaceText. Defaults to None.
+
+    Returns:
+        str: новая строка
+    """
+    state = pendingWrites['files'][file]
+    start, end = getLineRange(state, lines, numLine)
+    edits = dict(state['edits'])
+    edit = edit or getEdit(state, lines, numLine, replaceText)
+    if edit != None and not isOverlapping(edit[0], edit[1], edits):
+        edits[(edit[0], edit[1])] = edit[2]
+    return applyEdits(state['text'][start:end], sorted((editStart-start, editEnd-start, replacement)
+                                                       for (editStart, editEnd), replacement in edits.items()
+                                                       if start <= editStart and editEnd <= end))
+
+
+def commitEdit(file: str, lines: List[str], numLine: int, decision: dict, resource: dict = None) -> bool:
+    """Сохранение замены в файле (и нового перевода): изменение пишется в журнал,
+    а файлы записываются пачкой при переходе к другому файлу, раз в FLUSH_INTERVAL секунд и при выходе
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, в которой находится найденная строка (reviewState['candidate'])
+        decision (dict): решение оператора, его же применяем к таким же строкам (см. reviewGroups):
+            { replaceText, expression } - чем заменена строка и то же выражение без фигурных скобок,
+            { mark: True } - строка отмечена как непереведенная
+        resource (dict, optional): новый перевод { key, text, texts: { язык: значение } }, языки без значения в texts
+            получают text. Defaults to None.
+
+    Returns:
+        bool: True если замена сохранена
+    """
+    state = pendingWrites['files'][file]
+    edit = getEdit(state, lines, numLine, decision.get('replaceText'))
+    if edit == None:
+        print(Fore.RED+'Строка '+str(numLine+1)+' в файле '+file+' изменилась после сканирования, изменение пропущено', end='\n')
+        return False
+    start, end, replacement = edit
+    if decision.get('mark') and state['edits'].get((start, end)) == replacement:
+        return True  # строка уже отмечена
+    if isOverlapping(start, end, state['edits']):
+        print(Fore.RED+'Замена в строке '+str(numLine+1)+' пересекается с уже сделанной, изменение пропущено', end='\n')
+        return False
+    reviewState['decision'] = decision
+    # в журнал - координаты в тексте, который сейчас в файле (с учётом уже записанных замен)
+    shift = {position: sum(len(state['edits'][key])-(key[1]-key[0]) for key in state['written'] if key[1] <= position)
+             for position in (start, end)}
+    writeJournal({
+        'path': file,
+        'hash': state['hash'],
+        'start': start+shift[start],
+        'end': end+shift[end],
+        'old': state['text'][start:end],
+        'new': replacement,
+        'resource': resource,
+    })
+    lines[numLine] = previewEdit(file, lines, numLine, None, edit)
+    state['edits'][(start, end)] = replacement
+    if resource != None:
+        for key in resourcesData.keys():
+            addResources(resource.get('texts', {}).get(key, resource['text']), resource['key'], key)
+        pendingWrites['resources'] = True
+    invalidateScanCache(file)
+    if time.monotonic()-pendingWrites['flushTime'] >= flushInterval:
+        flushEdits()
+    return True
+
+
+def flushEdits() -> None:
+    """Запись всех накопленных изменений в файлы (каждый файл - одной записью) и очистка журнала
+    """
+    for file, state in pendingWrites['files'].items():
+        if len(state['written']) == len(state['edits']):
+            continue
+        text = applyEdits(state['text'], sorted((start, end, replacement) for (start, end), replacement in state['edits'].items()))
+        writeFileAtomic(file, [text])
+        state['written'] = set(state['edits'].keys())
+        state['hash'] = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        invalidateScanCache(file)
+    if pendingWrites['resources']:
+        saveResources()
+        pendingWrites['resources'] = False
+    if pathJournal != '' and os.path.isfile(pathJournal):
+        os.remove(pathJournal)
+    pendingWrites['flushTime'] = time.monotonic()
+
+
+def replayJournal() -> None:
+    """Применяем изменения из журнала, оставшегося после прерванного сеанса
+    """
+    if pathJournal == '' or not os.path.isfile(pathJournal):
+        return
+    with open(pathJournal, 'r', encoding='utf-8') as f:
+        entries = []
+        for line in f.readlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                pass  # недописанная при сбое запись - изменение не было подтверждено
+        f.close()
+    timestr = datetime.now().strftime('%H:%M:%S')
+    print(Fore.YELLOW+timestr+': Применяем изменения прерванного сеанса: '+str(len(entries)), end='\n')
+    for entry in entries:
+        if entry['resource'] != None:
+            # перевод добавляем в любом случае: файл мог быть уже записан до сбоя
             for key in resourcesData.keys():
-                addResources(tRu, tKey, key)
-            with open(file, 'w', encoding='utf-8') as f:
-                lines[numLine] = replaceLine
-                f.writelines(lines)
-                f.close()
-                saveResources()
-                timestr = datetime.now().strftime('%H:%M:%S')
-                print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+                addResources(entry['resource'].get('texts', {}).get(key, entry['resource']['text']), entry['resource']['key'], key)
+            pendingWrites['resources'] = True
+        if 'hash' not in entry or not os.path.isfile(entry['path']):
+            print(Fore.RED+'Файл '+entry['path']+' не найден или журнал записан прежней версией, изменение пропущено', end='\n')
+            continue
+        openReviewFile(entry['path'])
+        state = pendingWrites['files'][entry['path']]
+        if state['hash'] != entry['hash'] or state['text'][entry['start']:entry['end']] != entry['old'] \
+                or isOverlapping(entry['start'], entry['end'], state['edits']):
+            print(Fore.RED+'Файл '+entry['path']+' изменился после прерванного сеанса (или изменение уже записано), ' +
+                  'изменение пропущено', end='\n')
+            continue
+        state['edits'][(entry['start'], entry['end'])] = entry['new']
+    flushEdits()
+    pendingWrites['files'].clear()
+
+
+def getVarText(varList: Union[List[dict], List]) -> str:
+    """Получения переменных со значением в виде текста через запятую
+
+    Args:
+        varList (Union[List[dict], List]): список словарей [{ varName, value }, ...]
+
+    Returns:
+        str: переменные со значениями в виде текста через запятую
+    """
+    varText = ''
+    if (varList != None and len(varList)):
+        varTextList = []
+        for var in varList:
+            varTextList.append(var['varName']+': '+var['value']
+                               if var['varName'] != var['value'] else var['varName'])
+        varText = ', '.join(varTextList)
+    return varText
+
+
+def checkVar(t: str, inputEnable: bool = True) -> Union[List[dict], List]:
+    """Получение переменных (inputEnable=True) или проверка переменных (inputEnable=False)
+
+    Args:
+        t (str): текст проверяемой строки
+        inputEnable (bool, optional): если необходим вывод с получением переменных и их значений иначе просто проверка переменных. Defaults to True.
+
+    Raises:
+        EmptyValue: если указаное значение пусто
+
+    Returns:
+        Union[List[dict], List]: возвращаем переменные в виде списка словорей [{ varName, value }, ...]
+    """
+    if(re.search('\{\{[a-z]+\}\}', t, flags=re.IGNORECASE)):
+        try:
+            if inputEnable:
+                print('', end='\n')
+                print(Fore.MAGENTA+'В переводе обнаружены переменные', end='\n')
+            varList = []
+            for var in re.findall('\{\{([a-z]+)\}\}', t, flags=re.IGNORECASE):
+                value = input(
+                    'Укажите значение для переменной "{{'+var+'}}": ') if inputEnable else ''
+                if inputEnable and value == '':
+                    raise EmptyValue
+                varList.append({
+                    'varName': var,
+                    'value': value,
+                })
+        except EmptyValue:
+            print(
+                Fore.RED+'Ошибка! Значение переменной не может быть пустым, укажите переменные снова', end='\n')
+            checkVar(t, inputEnable)
         else:
-            repeat = input('Повторить перевод? (y/n): ')
-            if (repeat == 'Y' or repeat == 'y'):
-                translite(file, lines, numLine, textExclusion, textReplace)
+            if inputEnable:
+                print('', end='\n')
+                print(Fore.MAGENTA +
+                      'Для переменных указаны следующие значения:', end='\n')
+                for var in varList:
+                    print('{{'+var['varName']+'}} -> '+var['value'], end='\n')
+                print('', end='\n')
+            save = input(
+                'Сохранить переменные? (y/n): ') if inputEnable else 'Y'
+            if (save == 'Y' or save == 'y'):
+                return varList
             else:
-                repeat = input(
-                    'Перейти снова к выбору действий для данной строки? (y/n): ')
+                repeat = input('Повторить определение переменных? (y/n): ')
                 if (repeat == 'Y' or repeat == 'y'):
-                    selectAction(file, lines, numLine,
-                                 textExclusion, textReplace)
+                    return checkVar(t, inputEnable)
                 else:
-                    print('', end='\n\n')
-    except EmptyValue:
-        print(Fore.RED+'Ошибка! Значение не может быть пустым, повторите перевод', end='\n')
-        translite(file, lines, numLine, textExclusion, textReplace)
-    except Exception:
-        print(Fore.RED+'Хм, какая-то не предвиденная ошибка =/ ... попробуйте перевести повторно', end='\n')
-        translite(file, lines, numLine, textExclusion, textReplace)
+                    return []
+    return []
+
+
+def loadTranslationCache() -> None:
+    """Читаем кеш машинного перевода (.env: TRANSLATION_CACHE)
+    """
+    if pathTranslationCache == '' or not os.path.isfile(pathTranslationCache):
+        return
+    try:
+        with open(pathTranslationCache, 'r', encoding='utf-8') as f:
+            translationCache.update(json.load(f))
+            f.close()
+    except ValueError:
+        return
+
+
+def saveTranslationCache() -> None:
+    """Сохраняем кеш машинного перевода, лишние (давно не использованные) переводы вытесняются
+    по размеру кеша (.env: TRANSLATION_CACHE_SIZE)
+    """
+    while len(translationCache) > translationCacheSize:
+        translationCache.popitem(last=False)
+    if pathTranslationCache == '':
+        return
+    with open(pathTranslationCache+'.tmp', 'w', encoding='utf-8') as f:
+        json.dump(translationCache, f, ensure_ascii=False)
+        f.close()
+    os.replace(pathTranslationCache+'.tmp', pathTranslationCache)
+
+
+@timed('translateBatch')
+def translateBatch(texts: List[str], modelId: str = 'ru-en') -> None:
+    """Машинный перевод пачкой: строки, которых нет в кеше, отправляются в сервис
+    запросами по TRANSLATE_BATCH_SIZE строк, результаты сохраняются в кеш
+
+    Args:
+        texts (List[str]): исходные строки
+        modelId (str, optional): модель перевода. Defaults to 'ru-en'.
+    """
+    if language_translator == None:
+        return
+    with translationLock:
+        pending = list(dict.fromkeys(text for text in texts if modelId+':'+text not in translationCache))
+        for i in range(0, len(pending), translateBatchSize):
+            batch = pending[i:i+translateBatchSize]
+            result = language_translator.translate(
+                text=batch, model_id=modelId).get_result()
+            for text, translation in zip(batch, result['translations']):
+                translationCache[modelId+':'+text] = translation['translation']
+        if len(pending):
+            saveTranslationCache()
+
+
+@timed('getTranslation')
+def getTranslation(text: str, modelId: str = 'ru-en') -> str:
+    """Машинный перевод строки (из кеша, если строку уже переводили)
+
+    Args:
+        text (str): исходная строка
+        modelId (str, optional): модель перевода. Defaults to 'ru-en'.
+
+    Returns:
+        str: перевод или пустая строка, если перевод отключен
+    """
+    if language_translator == None:
+        return ''
+    translateBatch([text], modelId)
+    with translationLock:
+        translationCache.move_to_end(modelId+':'+text)
+        return translationCache[modelId+':'+text]
+
+
+def openMemory() -> Optional[sqlite3.Connection]:
+    """Подключение к памяти переводов (.env: TRANSLATION_MEMORY), таблицы создаются при первом подключении.
+    Если SQLite собран без FTS5 (или без токенизатора trigram), память переводов отключается.
+    Вызывается под memoryLock
+
+    Returns:
+        Optional[sqlite3.Connection]: подключение, None - если память переводов отключена
+    """
+    if memoryState['disabled'] or memoryState['connection'] != None:
+        return memoryState['connection']
+    try:
+        connection = sqlite3.connect(pathTranslationMemory, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode = WAL')  # базой могут одновременно пользоваться несколько запусков
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS units (
+                id INTEGER PRIMARY KEY,
+                resources TEXT NOT NULL,
+                key TEXT NOT NULL,
+                module TEXT NOT NULL,
+                source TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                UNIQUE (resources, key)
+            );
+            CREATE TABLE IF NOT EXISTS targets (
+                unit INTEGER NOT NULL REFERENCES units (id) ON DELETE CASCADE,
+                locale TEXT NOT NULL,
+                target TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (unit, locale)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS units_fts USING fts5(normalized, content='units', content_rowid='id', tokenize='trigram');
+            CREATE TRIGGER IF NOT EXISTS units_ai AFTER INSERT ON units BEGIN
+                INSERT INTO units_fts (rowid, normalized) VALUES (new.id, new.normalized);
+            END;
+            CREATE TRIGGER IF NOT EXISTS units_ad AFTER DELETE ON units BEGIN
+                INSERT INTO units_fts (units_fts, rowid, normalized) VALUES ('delete', old.id, old.normalized);
+            END;
+            CREATE TRIGGER IF NOT EXISTS units_au AFTER UPDATE OF normalized ON units BEGIN
+                INSERT INTO units_fts (units_fts, rowid, normalized) VALUES ('delete', old.id, old.normalized);
+                INSERT INTO units_fts (rowid, normalized) VALUES (new.id, new.normalized);
+            END;
+        ''')
+    except sqlite3.Error as e:
+        print(Fore.YELLOW+'Память переводов отключена ('+str(e)+')', end='\n')
+        memoryState['disabled'] = True
+        return None
+    memoryState['connection'] = connection
+    return connection
+
+
+def getResourcesName() -> str:
+    """Имя текущего перевода в памяти переводов: абсолютный путь до файла (или каталога раздельного) перевода
+
+    Returns:
+        str: путь
+    """
+    return os.path.abspath(pathResourcesSplit if resourcesOutput != 'file' else pathResources)
+
+
+@timed('storeMemory')
+def storeMemory(resources: str, units: Dict[str, Dict[str, Optional[str]]]) -> int:
+    """Запись значений в память переводов одной транзакцией: исходный текст - значение языка ru,
+    переводы - значения остальных языков. Ключи без значения ru из памяти удаляются, массивы пропускаются
+
+    Args:
+        resources (str): имя перевода (getResourcesName)
+        units (Dict[str, Dict[str, Optional[str]]]): ключ -> { язык: значение }
+
+    Returns:
+        int: количество записанных ключей
+    """
+    timestamp = time.time()
+    count = 0
+    with memoryLock:
+        connection = openMemory()
+        if connection == None:
+            return 0
+        with connection:
+            for key, values in units.items():
+                source = values.get('ru')
+                if source == None:
+                    connection.execute('DELETE FROM units WHERE resources = ? AND key = ?', (resources, key))
+                    continue
+                if source.find('[', 0, 1) != -1:
+                    continue
+                connection.execute('''
+                    INSERT INTO units (resources, key, module, source, normalized, timestamp) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (resources, key) DO UPDATE SET module = excluded.module, source = excluded.source,
+                        normalized = excluded.normalized, timestamp = excluded.timestamp
+                ''', (resources, key, key.split('.')[0], source, getNormalizedText(source), timestamp))
+                unit = connection.execute('SELECT id FROM units WHERE resources = ? AND key = ?', (resources, key)).fetchone()[0]
+                connection.execute('DELETE FROM targets WHERE unit = ?', (unit,))
+                connection.executemany('INSERT INTO targets (unit, locale, target, timestamp) VALUES (?, ?, ?, ?)',
+                                       [(unit, lang, value, timestamp) for lang, value in values.items() if lang != 'ru' and value != None])
+                count += 1
+    return count
+
+
+def rememberResources(entries: List[Tuple[List[str], Optional[str]]]) -> None:
+    """Записываем в память переводов ключи, добавленные (удалённые) в дерево resourcesData, со значениями всех языков
+
+    Args:
+        entries (List[Tuple[List[str], Optional[str]]]): изменения дерева (pendingResources)
+    """
+    if memoryState['disabled'] or not len(entries):
+        return
+    units = {}
+    for listKey, value in entries:
+        values = units.setdefault('.'.join(listKey[2:]), {})
+        for lang in resourcesData.keys():
+            structure = resourcesData[lang].get('translation', {})
+            for key in listKey[2:]:
+                structure = structure.get(key) if isinstance(structure, Mapping) else None
+            values[lang] = structure if isinstance(structure, str) else None
+    storeMemory(getResourcesName(), units)
+
+
+def importMemory(paths: List[str]) -> int:
+    """Импорт переводов в память переводов: файлы вида PATH_RESOURCES и каталоги раздельного перевода
+    (RESOURCES_SPLIT_DIR), без путей - текущий перевод целиком
+
+    Args:
+        paths (List[str]): пути до файлов и каталогов перевода
+
+    Returns:
+        int: количество записанных ключей
+    """
+    total = 0
+    for path in paths or [None]:
+        if path == None:
+            for lang, namespace in list(resourcesSplit['files']):
+                loadNamespace(namespace)
+            name, tree = getResourcesName(), resourcesData
+        elif os.path.isdir(path):
+            name, tree = os.path.abspath(path), {}
+            for lang in sorted(os.listdir(path)):
+                if not os.path.isdir(os.path.join(path, lang)):
+                    continue
+                for file in sorted(os.listdir(os.path.join(path, lang))):
+                    namespace, ext = os.path.splitext(file)
+                    if ext != '.json' and ext != '.js':
+                        continue
+                    content = readSplitFile(os.path.join(path, lang, file))
+                    structure = tree.setdefault(lang, {}).setdefault('translation', {})
+                    if namespace == rootNamespace:
+                        structure.update(content)
+                    else:
+                        structure[namespace] = content
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                name, tree = os.path.abspath(path), parseResources(f.read())[0]
+                f.close()
+        units = {}
+
+        def collect(lang: str, structure: Mapping, prefix: str):
+            for key in structure.keys():
+                if isinstance(structure[key], str):
+                    units.setdefault(prefix+key, {})[lang] = structure[key]
+                else:
+                    collect(lang, structure[key], prefix+key+'.')
+        for lang in tree.keys():
+            collect(lang, tree[lang].get('translation', {}), '')
+        count = storeMemory(name, units)
+        timestr = datetime.now().strftime('%H:%M:%S')
+        print(Fore.GREEN+timestr+': В память переводов записано ключей: '+str(count)+' ('+name+')', end='\n')
+        total += count
+    return total
+
+
+@timed('searchMemory')
+def searchMemory(textExclusion: str) -> List[dict]:
+    """Поиск похожих переводов в памяти переводов: кандидатов отбирает индекс FTS5 по триграммам
+    нормализованной строки, дальше они ранжируются так же, как в rankOptionsKey. Ключи, которые уже
+    предложены из текущего перевода (из загруженных пространств имён), и повторы одного и того же перевода
+    пропускаются. Дерево resourcesData не меняется: поиск выполняется и в фоновом потоке (getSuggestions)
+
+    Args:
+        textExclusion (str): текст в строке который был ранее распарсен
+
+    Returns:
+        List[dict]: варианты по убыванию схожести [{ key, value, score, module, resources, targets: { язык: перевод } }, ...]
+    """
+    if memoryState['disabled']:
+        return []
+    normalized = getNormalizedText(textExclusion)
+    trigrams = getTrigrams(normalized)
+    if not trigrams:
+        return []
+    with memoryLock:
+        connection = openMemory()
+        if connection == None:
+            return []
+        rows = connection.execute('''
+            SELECT units.id, units.resources, units.key, units.module, units.source, units.normalized
+            FROM units_fts JOIN units ON units.id = units_fts.rowid
+            WHERE units_fts MATCH ? ORDER BY bm25(units_fts) LIMIT ?
+        ''', (' OR '.join('"'+trigram+'"' for trigram in sorted(trigrams)), memoryTopK*20)).fetchall()
+        scored = []
+        for row in rows:
+            count = len(trigrams & getTrigrams(row[5]))
+            score = count/(len(trigrams)+len(getTrigrams(row[5]))-count)
+            if score >= suggestMinScore:
+                scored.append((score, -abs(len(row[5])-len(normalized)), row))
+        options = []
+        seen = set()
+        for score, _, row in sorted(scored, key=lambda item: item[:2], reverse=True):
+            # ключи не загруженных пространств имён не проверяем: поиск идёт в фоне и дерево не меняет
+            if isKeyLoaded(row[2]) and keyIndex['types'].get(row[2]) == 'leaf' and getResourceText(row[2]) == row[4]:
+                continue
+            targets = dict(connection.execute('SELECT locale, target FROM targets WHERE unit = ? ORDER BY locale', (row[0],)).fetchall())
+            if (row[4], tuple(targets.items())) in seen:
+                continue
+            seen.add((row[4], tuple(targets.items())))
+            options.append({
+                'key': row[2],
+                'value': row[4],
+                'score': score,
+                'module': row[3],
+                'resources': row[1],
+                'targets': targets,
+            })
+            if len(options) == memoryTopK:
+                break
+        return options
+
+
+def getPathKey(file: str, camelCase: str) -> str:
+    """Получаем вариант ключа по пути до файла (без имени модуля)
+
+    Args:
+        file (str): путь до файла
+        camelCase (str): camelCase вариант перевода строки
+
+    Returns:
+        str: ключ вида .path.to.file.camelCase или пустая строка
+    """
+    pathKey = ''
+    try:
+        pathKeyList = file.partition(pathModule)[2].split('\\')
+        pathKeyListLastEl = pathKeyList[len(pathKeyList)-1].split('.')
+        pathKeyList[len(pathKeyList)-1] = pathKeyListLastEl[0]
+        pathKeyList = list(dict.fromkeys(pathKeyList))
+        pathKey = '.'.join(pathKeyList)+'.'+camelCase
+        pathKey = re.sub('\.components', '', pathKey)
+        pathKey = re.sub('\.component', '', pathKey)
+    except:
+        pass
+    return pathKey
+
+
+def getSuggestions(file: str, textExclusion: str) -> dict:
+    """Подсказки для строки: машинный перевод, варианты ключа, похожие существующие переводы
+    и похожие переводы из памяти переводов
+
+    Args:
+        file (str): путь до файла
+        textExclusion (str): текст в строке который был ранее распарсен
+
+    Returns:
+        dict: { translation, camelCase, pathKey, optionsKey, optionsMemory, generation },
+            translation равен None, если машинный перевод получить не удалось
+    """
+    generation = resourcesGeneration
+    try:
+        translation = getTranslation(textExclusion)
+    except Exception:
+        translation = None  # запрос повторится при переводе строки
+    camelCase = getCamelCase(translation or '')
+    return {
+        'translation': translation,
+        'camelCase': camelCase,
+        'pathKey': getPathKey(file, camelCase),
+        'optionsKey': rankOptionsKey(textExclusion),
+        'optionsMemory': searchMemory(textExclusion),
+        'generation': generation,
+    }
+
+
+def prefetchSuggestions(file: str, candidates: List[dict]) -> None:
+    """Заранее (в фоновом потоке) готовим подсказки для следующих строк, пока оператор отвечает на текущую
+
+    Args:
+        file (str): путь до файла
+        candidates (List[dict]): следующие строки
+    """
+    if prefetchState['executor'] == None:
+        return
+    for candidate in candidates:
+        if candidate['pattern'] != None and (file, candidate['textExclusion']) not in prefetchResults:
+            prefetchResults[(file, candidate['textExclusion'])] = prefetchState['executor'].submit(
+                getSuggestions, file, candidate['textExclusion'])
+
+
+def prefetchTranslations(texts: List[str]) -> None:
+    """Заранее (в фоновом потоке) переводим строки одной пачкой, подсказки по строкам её дождутся
+
+    Args:
+        texts (List[str]): строки
+    """
+    if prefetchState['executor'] != None:
+        prefetchState['executor'].submit(translateBatch, texts)
+
+
+def startPrefetch() -> None:
+    """Начало сеанса проверки (scanDir, watchDir, reviewGroups): фоновые потоки для подсказок
+    """
+    prefetchState['executor'] = ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch')
+
+
+def stopPrefetch() -> None:
+    """Конец сеанса проверки: неначатые подсказки отменяются, готовые забываются
+    """
+    if prefetchState['executor'] != None:
+        prefetchState['executor'].shutdown(wait=False, cancel_futures=True)
+        prefetchState['executor'] = None
+    for future in prefetchResults.values():
+        future.cancel()
+    prefetchResults.clear()
+
+
+def getPrefetchedSuggestions(file: str, textExclusion: str) -> dict:
+    """Подсказки для строки: подготовленные заранее, если они ещё актуальны, иначе считаем сейчас
+
+    Args:
+        file (str): путь до файла
+        textExclusion (str): текст в строке который был ранее распарсен
+
+    Returns:
+        dict: { translation, camelCase, pathKey, optionsKey, optionsMemory, generation }
+    """
+    future: Future = prefetchResults.get((file, textExclusion))
+    try:
+        suggestions = future.result() if future != None else None
+    except Exception:
+        suggestions = None
+    if suggestions == None:
+        suggestions = getSuggestions(file, textExclusion)
+        prefetchResults[(file, textExclusion)] = Future()
+        prefetchResults[(file, textExclusion)].set_result(suggestions)
+    elif suggestions['generation'] != resourcesGeneration:
+        # после подготовки подсказок в переводы добавлялись ключи
+        suggestions['optionsKey'] = rankOptionsKey(textExclusion)
+        suggestions['generation'] = resourcesGeneration
+    return suggestions
+
+
+def getKey(camelCase: str, pathKey: str, translation: str, tRu: str, file: str) -> str:
+    try:
+        tKey = inputKey('Напишите ключ для перевода: ')
+        if tKey == '':
+            if camelCase == '':
+                raise EmptyValue
+            tKey = moduleName+'.'+camelCase
+        if tKey == '2':
+            tKey = moduleName+pathKey
+        checkTKey(tKey)
+        return tKey
+    except EmptyValueKey as e:
+        print(Fore.RED+'Один из ключей: '+e.tKey +
+                ' - пуст. Ключ не может быть пустым! Повторите перевод', end='\n')
+        return getKey(camelCase, pathKey, translation, tRu, file)
+    except ForbiddenRewriting as e:
+        print(Fore.RED+'Ошибка! В указанный ключ: '+e.tKey+', уже записано: '+e.tValue, end='\n')
+        print(Fore.RED+'Повторите перевод, укажите другой ключ...', end='\n')
+        return getKey(camelCase, pathKey, translation, tRu, file)
+    
+
+def printLines(lines: List[str], numLine: int, line: str) -> None:
+    """Вывод строки файла вместе с тремя строками до и после неё
+
+    Args:
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле
+        line (str): строка, которую выводим вместо lines[numLine] (выделяется цветом)
+    """
+    for j in range(max(0, numLine-3), min(len(lines), numLine+4)):
+        if j == numLine:
+            print(Fore.GREEN+str(j+1)+': '+line, end='')
+        elif lines[j] != '':  # пустая - объединена с предыдущей строкой (см. reviewFile)
+            print(str(j+1)+': '+lines[j], end='')
+
+
+def translite(file: str, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
+    """Указываем перевод строки и всякие проверки строки...
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+
+    Raises:
+        EmptyValue: вызываем если было указано пустое значение
+        DifferentCountVariables: вызываем если количество переменных отличается
+        DifferentVariables: вызываем если переменные отличается
+    """
+    try:
+        suggestions = getPrefetchedSuggestions(file, textExclusion)
+        if suggestions['translation'] == None:
+            # заранее получить машинный перевод не удалось - повторяем запрос
+            suggestions['translation'] = getTranslation(textExclusion)
+            suggestions['camelCase'] = getCamelCase(suggestions['translation'])
+            suggestions['pathKey'] = getPathKey(file, suggestions['camelCase'])
+        translation = suggestions['translation']
+        tRu = input('Укажите строку перевода для "'+textExclusion +'" или оставьте пустым, чтобы принять как есть: ')
+        if tRu == '':
+            candidate = reviewState['candidate']
+            tRu = getSourceText(textExclusion, candidate['pattern'] if candidate != None else None)
+        varText = getVarText(checkVar(tRu))
+        print('', end='\n')
+        print(Fore.MAGENTA +
+                'Для построения дерева ключей можно использовать символ "."\n----------\nНапример при вводе: '+moduleName+'.example.getData - итоговое выражение для перевода будет таким: t(\''+moduleName+'.example.getData\', { ... })\nИмя модуля ('+moduleName+') автоматически НЕ добавляется!\nВ файл с переводом будет добавлено:\n\n'+moduleName+': {\n    example: {\n        getData: \''+tRu+'\',\n    },\n},\n----------', end='\n\n')
+        camelCase = suggestions['camelCase']
+        print('', end='\n')
+        print('Предлагаем следующий ключ: '+moduleName+'.'+camelCase, end='\n')
+        pathKey = suggestions['pathKey']
+        if pathKey != '':
+            print('Или такой ключ: '+moduleName+pathKey, end='\n')
+        print('', end='\n')
+        print(Fore.MAGENTA+'Оставьте поле пустым, чтобы принять '+('первый ' if pathKey != '' else '')+'предложенный вариант'+(' или введите цифру "2", чтобы принять второй вариант ключа' if pathKey != '' else ''), end='\n')
+        tKey = getKey(camelCase, pathKey, translation, tRu, file)
+        replaceTextY = '{t(\''+tKey+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')}'
+        replaceTextN = 't(\''+tKey+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')'
+        print('', end='\n')
+        print('Добавить фигурные скобки?', end='\n')
+        print('', end='\n')
+        print('Если да (y):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextY))
+        print('', end='\n')
+        print('Если нет (n):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextN))
+        print('', end='\n')
+        addCurlyBraces = input('(y/n): ')
+        if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
+            replaceText = replaceTextY
+        else:
+            replaceText = replaceTextN
+        replaceLine = previewEdit(file, lines, numLine, replaceText)
+        print('', end='\n')
+        print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
+        printLines(lines, numLine, replaceLine)
+        print('', end='\n\n')
+        save = input('Сохраняем? (y/n): ')
+        if (save == 'Y' or save == 'y'):
+            if commitEdit(file, lines, numLine, {'replaceText': replaceText, 'expression': replaceTextN}, {'key': tKey, 'text': tRu}):
+                timestr = datetime.now().strftime('%H:%M:%S')
+                print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+        else:
+            repeat = input('Повторить перевод? (y/n): ')
+            if (repeat == 'Y' or repeat == 'y'):
+                translite(file, lines, numLine, textExclusion, textReplace)
+            else:
+                repeat = input(
+                    'Перейти снова к выбору действий для данной строки? (y/n): ')
+                if (repeat == 'Y' or repeat == 'y'):
+                    selectAction(file, lines, numLine,
+                                 textExclusion, textReplace)
+                else:
+                    print('', end='\n\n')
+    except EmptyValue:
+        print(Fore.RED+'Ошибка! Значение не может быть пустым, повторите перевод', end='\n')
+        translite(file, lines, numLine, textExclusion, textReplace)
+    except Exception:
+        print(Fore.RED+'Хм, какая-то не предвиденная ошибка =/ ... попробуйте перевести повторно', end='\n')
+        translite(file, lines, numLine, textExclusion, textReplace)
+
+
+def markNoTranslite(file: str, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
+    """Отмечаем строку как не переведенной
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+    """
+    replaceLine = previewEdit(file, lines, numLine, None)
+    print('', end='\n')
+    print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
+    printLines(lines, numLine, replaceLine)
+    print('', end='\n\n')
+    save = input('Сохраняем? (y/n): ')
+    if (save == 'Y' or save == 'y'):
+        if commitEdit(file, lines, numLine, {'mark': True}):
+            timestr = datetime.now().strftime('%H:%M:%S')
+            print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+    else:
+        repeat = input(
+            'Перейти снова к выбору действий для данной строки? (y/n): ')
+        if (repeat == 'Y' or repeat == 'y'):
+            selectAction(file, lines, numLine,
+                         textExclusion, textReplace)
+        else:
+            print('', end='\n\n')
+
+
+def selectKeyTranslite(file: str, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
+    """Указываем существующий перивод
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+    """
+    print('', end='\n')
+    print('Чем заменить строку "'+textExclusion+'"? ')
+    print('Выберите опцию:')
+    print('1 - использовать существующий ключ;')
+    print('2 - использовать выражение типа: t(\'' +
+          moduleName+'.ключ\', { ... }):')
+    print('3 - вернутся назад;')
+    select = input(': ')
+    try:
+        replaceText = None
+        if select == '1':
+            replaceText = inputKey('Укажите ключ: ')
+            replaceText = 't(\''+replaceText+'\')'
+        elif select == '2':
+            replaceText = input(
+                'Укажите ключ, типа: t(\''+moduleName+'.ключ\', { ... }): ')
+        elif select == '3':
+            selectAction(file, lines, numLine,
+                         textExclusion, textReplace)
+        else:
+            raise NoSelect
+        if replaceText != None:
+            replaceTextY = '{'+replaceText+'}'
+            replaceTextN = replaceText
+            print('', end='\n')
+            print('Добавить фигурные скобки?', end='\n')
+            print('', end='\n')
+            print('Если да (y):', end='\n')
+            print(str(numLine+1)+': ' +
+                  previewEdit(file, lines, numLine, replaceTextY))
+            print('', end='\n')
+            print('Если нет (n):', end='\n')
+            print(str(numLine+1)+': ' +
+                  previewEdit(file, lines, numLine, replaceTextN))
+            print('', end='\n')
+            addCurlyBraces = input('(y/n): ')
+            if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
+                replaceText = replaceTextY
+            else:
+                replaceText = replaceTextN
+            replaceLine = previewEdit(file, lines, numLine, replaceText)
+            print('', end='\n')
+            print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
+            printLines(lines, numLine, replaceLine)
+            print('', end='\n\n')
+            save = input('Сохраняем? (y/n): ')
+            if (save == 'Y' or save == 'y'):
+                if commitEdit(file, lines, numLine, {'replaceText': replaceText, 'expression': replaceTextN}):
+                    timestr = datetime.now().strftime('%H:%M:%S')
+                    print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+            else:
+                repeat = input(
+                    'Перейти снова к выбору действий для данной строки? (y/n): ')
+                if (repeat == 'Y' or repeat == 'y'):
+                    selectAction(file, lines, numLine,
+                                 textExclusion, textReplace)
+                else:
+                    print('', end='\n\n')
+    except NoSelect:
+        selectKeyTranslite(file, lines, numLine, textExclusion, textReplace)
+
+
+def setOption(file: str, lines: List[str], numLine: int, option: dict, textExclusion: str, textReplace: str) -> None:
+    """Устанавливаем выбранный существующий перивод
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        option (dict): выбранный существующий перевод
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+    """
+    try:
+        varText = getVarText(checkVar(option['value']))
+        replaceTextY = '{t(\''+option['key']+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')}'
+        replaceTextN = 't(\''+option['key']+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')'
+        print('', end='\n')
+        print('Добавить фигурные скобки?', end='\n')
+        print('', end='\n')
+        print('Если да (y):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextY))
+        print('', end='\n')
+        print('Если нет (n):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextN))
+        print('', end='\n')
+        addCurlyBraces = input('(y/n): ')
+        if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
+            replaceText = replaceTextY
+        else:
+            replaceText = replaceTextN
+        replaceLine = previewEdit(file, lines, numLine, replaceText)
+        print('', end='\n')
+        print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
+        printLines(lines, numLine, replaceLine)
+        print('', end='\n\n')
+        save = input('Сохраняем? (y/n): ')
+        if (save == 'Y' or save == 'y'):
+            if commitEdit(file, lines, numLine, {'replaceText': replaceText, 'expression': replaceTextN}):
+                timestr = datetime.now().strftime('%H:%M:%S')
+                print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+        else:
+            repeat = input(
+                'Перейти снова к выбору действий для данной строки? (y/n): ')
+            if (repeat == 'Y' or repeat == 'y'):
+                selectAction(file, lines, numLine, textExclusion, textReplace)
+            else:
+                print('', end='\n\n')
+    except Exception:
+        print(Fore.RED+'Хм, какая-то не предвиденная ошибка =/ ... попробуйте выбрать перевод ещё раз', end='\n')
+        selectAction(file, lines, numLine, textExclusion, textReplace)
+
+
+def setMemoryOption(file: str, lines: List[str], numLine: int, option: dict, textExclusion: str, textReplace: str) -> None:
+    """Устанавливаем перевод из памяти переводов: если в текущем переводе уже есть этот ключ с тем же значением,
+    используем его (setOption), иначе добавляем ключ со значениями всех языков из памяти переводов
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        option (dict): выбранный перевод из памяти переводов (searchMemory)
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+    """
+    if getResourceText(option['key']) == option['value']:
+        setOption(file, lines, numLine, option, textExclusion, textReplace)
+        return
+    try:
+        # ключ из другого модуля переносим в свой: имя модуля + последняя часть ключа
+        tKey = option['key'] if option['module'] == moduleName else moduleName+'.'+option['key'].split('.')[-1]
+        while True:
+            inputText = inputKey('Напишите ключ для перевода или оставьте пустым, чтобы принять ключ '+tKey+': ')
+            try:
+                checkTKey(inputText or tKey)
+                tKey = inputText or tKey
+                break
+            except EmptyValueKey as e:
+                print(Fore.RED+'Один из ключей: '+e.tKey+' - пуст. Ключ не может быть пустым!', end='\n')
+            except ForbiddenRewriting as e:
+                print(Fore.RED+'Ошибка! В указанный ключ: '+e.tKey+', уже записано: '+e.tValue+', укажите другой ключ...', end='\n')
+        varText = getVarText(checkVar(option['value']))
+        replaceTextY = '{t(\''+tKey+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')}'
+        replaceTextN = 't(\''+tKey+'\'' + \
+            ('' if varText == '' else ', { '+varText+' }')+')'
+        print('', end='\n')
+        print('Добавить фигурные скобки?', end='\n')
+        print('', end='\n')
+        print('Если да (y):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextY))
+        print('', end='\n')
+        print('Если нет (n):', end='\n')
+        print(str(numLine+1)+': ' +
+              previewEdit(file, lines, numLine, replaceTextN))
+        print('', end='\n')
+        addCurlyBraces = input('(y/n): ')
+        if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
+            replaceText = replaceTextY
+        else:
+            replaceText = replaceTextN
+        replaceLine = previewEdit(file, lines, numLine, replaceText)
+        print('', end='\n')
+        print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
+        printLines(lines, numLine, replaceLine)
+        print('', end='\n\n')
+        save = input('Сохраняем? (y/n): ')
+        if (save == 'Y' or save == 'y'):
+            resource = {'key': tKey, 'text': option['value'], 'texts': option['targets']}
+            if commitEdit(file, lines, numLine, {'replaceText': replaceText, 'expression': replaceTextN}, resource):
+                timestr = datetime.now().strftime('%H:%M:%S')
+                print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+        else:
+            repeat = input(
+                'Перейти снова к выбору действий для данной строки? (y/n): ')
+            if (repeat == 'Y' or repeat == 'y'):
+                selectAction(file, lines, numLine, textExclusion, textReplace)
+            else:
+                print('', end='\n\n')
+    except Exception:
+        print(Fore.RED+'Хм, какая-то не предвиденная ошибка =/ ... попробуйте выбрать перевод ещё раз', end='\n')
+        selectAction(file, lines, numLine, textExclusion, textReplace)
+
+
+def selectAction(file: str, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
+    """Выбор действия по найденой строке
+
+    Args:
+        file (str): путь до файла, который парсим (его будем изменять)
+        lines (List[str]): все строки в файле
+        numLine (int): номер строки в файле, который парсим
+        textExclusion (str): текст в строке который был ранее распарсен
+        textReplace (str): регулярное выражение для замены
+    """
+    print('Выберите опцию:')
+    print('1 - игнорировать;')
+    print('2 - перевести;')
+    print('3 - отметить как непереведенное;')
+    print('4 - использовать существующий перевод;', end='\n')
+
+    suggestions = getPrefetchedSuggestions(file, textExclusion)
+    optionsKey = suggestions['optionsKey']
+    optionsMemory = suggestions.get('optionsMemory', [])
+
+    optionNum = 4
+    if len(optionsKey):
+        print('', end='\n')
+        print('Найдены существующие варианты переводов (выберите опцию):', end='\n')
+        for option in optionsKey:
+            optionNum += 1
+            print(str(optionNum) + ' - "' +
+                  option['value'] + '" (ключ: "' + option['key'] + '"' +
+                  ('' if option['score'] == None else ', совпадение: '+str(round(option['score']*100))+'%')+');')
+    if len(optionsMemory):
+        print('', end='\n')
+        print('Найдено в памяти переводов (выберите опцию):', end='\n')
+        for option in optionsMemory:
+            optionNum += 1
+            print(str(optionNum) + ' - "' + option['value'] + '"' +
+                  ''.join(', '+lang+': "'+target+'"' for lang, target in option['targets'].items()) +
+                  ' (ключ: "' + option['key'] + '", модуль: ' + option['module'] +
+                  ', совпадение: '+str(round(option['score']*100))+'%);')
+
+    select = input(': ')
+    if select == '': 
+        select = '1'
+    if select == '1':
+        print(Fore.MAGENTA+' ... игнорировано', end='\n')
+    elif select == '2':
+        print(Fore.MAGENTA+' ... переводим:', end='\n')
+        print(Fore.MAGENTA +
+              'В переводе можно указать переменные, например: {{yourVarName}}', end='\n')
+        translite(file, lines, numLine, textExclusion, textReplace)
+    elif select == '3':
+        print(Fore.MAGENTA+' ... отмечено как не переведенно', end='\n')
+        markNoTranslite(file, lines, numLine, textExclusion, textReplace)
+    elif select == '4':
+        print(Fore.MAGENTA+' ... используем существующий перевод', end='\n')
+        selectKeyTranslite(file, lines, numLine, textExclusion, textReplace)
+    elif optionNum > 4 and (int(select) > 4 and int(select) <= 4+len(optionsKey)):
+        print(Fore.MAGENTA+' ... используем выбранный существующий перевод', end='\n')
+        setOption(file, lines, numLine, optionsKey[int(
+            select)-5], textExclusion, textReplace)
+    elif optionNum > 4 and (int(select) > 4 and int(select) <= optionNum):
+        print(Fore.MAGENTA+' ... используем перевод из памяти переводов', end='\n')
+        setMemoryOption(file, lines, numLine, optionsMemory[int(
+            select)-5-len(optionsKey)], textExclusion, textReplace)
+
+
+"""Шаблоны, по которым найдена строка с кириллицей: комментарий для вывода и признак,
+заменяется ли строка вместе с кавычками (inclusion) или только текст внутри (текст JSX)
+"""
+listPattern = {
+    '`': {
+        'comment': 'Обнаружено полное соответствие шаблону (`)',
+        'inclusion': True,
+    },
+    '\'': {
+        'comment': 'Обнаружено полное соответствие шаблону (\')',
+        'inclusion': True,
+    },
+    '"': {
+        'comment': 'Обнаружено полное соответствие шаблону (")',
+        'inclusion': True,
+    },
+    '><': {
+        'comment': 'Обнаружено полное соответствие шаблону (><)',
+        'inclusion': False,
+    },
+}
+
+"""Регулярные выражения лексера исходного кода (lexSource)
+"""
+cyrillicRegex = re.compile('[а-яё]+', flags=re.IGNORECASE)
+cyrillicBytesRegex = re.compile(b'[\xd0\xd1]')  # первые байты букв а-я, ё, А-Я, Ё в UTF-8
+newlineRegex = re.compile('\n')
+markNoTransliteRegex = re.compile(r'//\sНЕ\sПЕРЕВЕДЕННО\s!!!', flags=re.IGNORECASE)
+# вызов t( с ключом: строка в кавычках или шаблонная строка (до первого ${ - она задаёт только начало ключа)
+tCallRegex = re.compile(r'''(?<![\w$])t\(\s*(?:(?P<quote>['"])(?P<key>(?:(?!(?P=quote))[^\\\n]|\\.)*)(?P=quote)'''
+                        r'''|`(?P<template>(?:[^`\\$]|\\.|\$(?!\{))*)(?:(?P<expression>\$\{)|`))?\s*(?P<next>.)?''', flags=re.DOTALL)
+codeStopRegex = re.compile(r'[\'"`/<{}]')
+codeStopNoJsxRegex = re.compile(r'[\'"`/{}]')
+stringRegex = {
+    '\'': re.compile(r"[^'\\\n]*(?:\\.[^'\\\n]*)*'", flags=re.DOTALL),
+    '"': re.compile(r'[^"\\\n]*(?:\\.[^"\\\n]*)*"', flags=re.DOTALL),
+}
+templateRegex = re.compile(r'[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*', flags=re.DOTALL)
+regexLiteralRegex = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-zA-Z]*')
+jsxTagRegex = re.compile(r'[^\'"{}>/]*')
+jsxTextRegex = re.compile(r'[^<{]*')
+expressionKeywords = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                      'throw', 'case', 'do', 'else', 'yield', 'await', 'default'}
+
+
+def isExpressionStart(text: str, i: int) -> bool:
+    """Начинается ли в позиции i новое выражение (по предыдущему значимому символу):
+    тогда / - это регулярное выражение, а не деление, и < - это JSX, а не сравнение
+
+    Args:
+        text (str): исходный код
+        i (int): позиция символа / или <
+
+    Returns:
+        bool: True, если в позиции i начинается выражение
+    """
+    j = i-1
+    while j >= 0 and text[j] in ' \t\r\n':
+        j -= 1
+    if j < 0:
+        return True
+    c = text[j]
+    if c.isalnum() or c in '_$':
+        k = j
+        while k > 0 and (text[k-1].isalnum() or text[k-1] in '_$'):
+            k -= 1
+        return text[k:j+1] in expressionKeywords
+    if c == '>':
+        return j > 0 and text[j-1] == '='  # стрелочная функция =>
+    return c in '(,=:?[{};!&|~^+-*%<'
+
+
+def lexSource(text: str, jsx: bool = True, stop: int = None) -> List[Tuple[int, int, str, bool]]:
+    """Лексер исходного кода JS/TS/JSX за один проход: находит строки, шаблонные строки (включая ${...}),
+    текст JSX и комментарии, в том числе занимающие несколько строк
+
+    Args:
+        text (str): исходный код
+        jsx (bool, optional): разбирать JSX (в .ts файлах < - это приведение типа или generic). Defaults to True.
+        stop (int, optional): смещение, после которого кириллицы нет: дальше разбор не нужен. Defaults to None.
+
+    Returns:
+        List[Tuple[int, int, str, bool]]: найденные участки (начало, конец, шаблон, есть ли кириллица),
+            шаблон - кавычка (', ", `), >< для текста JSX или // для комментария.
+            Для шаблонных строк и текста JSX кириллица ищется только вне ${...} и {...}
+    """
+    spans = []
+    stack = []  # состояния, в которые возвращаемся после вложенного кода, шаблонной строки или JSX
+    state = ['code', 0]  # ['code', глубина {}] / ['template', начало, кириллица] /
+    # ['jsxTag', вложенность элементов, закрывающий тег] / ['jsxText', вложенность элементов, начало, кириллица]
+    codeStop = codeStopRegex if jsx else codeStopNoJsxRegex
+    pos = 0
+    n = len(text)
+    if stop == None:
+        stop = n
+    while pos < n:
+        kind = state[0]
+        if kind == 'code':
+            if pos >= stop and not len(stack):
+                break
+            m = codeStop.search(text, pos)
+            if m == None:
+                break
+            i = m.start()
+            c = text[i]
+            pos = i+1
+            if c == '\'' or c == '"':
+                m = stringRegex[c].match(text, pos)
+                if m != None:
+                    pos = m.end()
+                    spans.append((i, pos, c, cyrillicRegex.search(text, i, pos) != None))
+            elif c == '`':
+                stack.append(state)
+                state = ['template', i, False]
+            elif c == '{':
+                state[1] += 1
+            elif c == '}':
+                if state[1] > 0:
+                    state[1] -= 1
+                elif len(stack):
+                    state = stack.pop()
+            elif c == '/':
+                if text.startswith('/', pos):
+                    end = text.find('\n', pos)
+                    pos = n if end == -1 else end
+                    spans.append((i, pos, '//', False))
+                elif text.startswith('*', pos):
+                    end = text.find('*/', pos+1)
+                    pos = n if end == -1 else end+2
+                    spans.append((i, pos, '//', False))
+                elif isExpressionStart(text, i):
+                    m = regexLiteralRegex.match(text, i)
+                    if m != None:
+                        pos = m.end()
+            elif pos < n and (text[pos].isalpha() or text[pos] == '>') and isExpressionStart(text, i):
+                stack.append(state)
+                state = ['jsxTag', 0, False]
+        elif kind == 'template':
+            i = templateRegex.match(text, pos).end()
+            if not state[2] and cyrillicRegex.search(text, pos, i) != None:
+                state[2] = True
+            if i >= n:
+                break
+            if text[i] == '`':
+                pos = i+1
+                spans.append((state[1], pos, '`', state[2]))
+                state = stack.pop()
+            elif text.startswith('${', i):
+                pos = i+2
+                stack.append(state)
+                state = ['code', 0]
+            else:
+                pos = i+1
+        elif kind == 'jsxTag':
+            i = jsxTagRegex.match(text, pos).end()
+            if i >= n:
+                break
+            c = text[i]
+            pos = i+1
+            if c == '\'' or c == '"':
+                end = text.find(c, pos)
+                pos = n if end == -1 else end+1
+                spans.append((i, pos, c, cyrillicRegex.search(text, i, pos) != None))
+            elif c == '{':
+                stack.append(state)
+                state = ['code', 0]
+            elif c == '>' or (c == '/' and text.startswith('>', pos)):
+                if c == '/':  # самозакрывающийся тег
+                    pos += 1
+                    level = state[1]
+                else:
+                    level = state[1]-1 if state[2] else state[1]+1
+                state = stack.pop() if level <= 0 else ['jsxText', level, pos, False]
+        else:
+            i = jsxTextRegex.match(text, pos).end()
+            if not state[3] and cyrillicRegex.search(text, pos, i) != None:
+                state[3] = True
+            if i >= n:
+                break
+            pos = i+1
+            if text[i] == '{':
+                stack.append(state)
+                state = ['code', 0]
+            else:
+                if state[3]:
+                    start = state[2]
+                    while text[start].isspace():
+                        start += 1
+                    end = i
+                    while text[end-1].isspace():
+                        end -= 1
+                    spans.append((start, end, '><', True))
+                closing = text.startswith('/', pos)
+                pos += closing
+                state = ['jsxTag', state[1], closing]
+    return spans
+
+
+def extractCandidates(path: str, text: str = None, stop: int = None) -> List[dict]:
+    """Поиск строк с кириллицей в файле (фаза обнаружения).
+    Выполняется в пуле процессов, поэтому ничего не выводит и файл не изменяет
+
+    Args:
+        path (str): путь до файла
+        text (str, optional): содержимое файла, если уже прочитано. Defaults to None.
+        stop (int, optional): смещение в тексте, после которого кириллицы нет (см. scanFile). Defaults to None.
+
+    Returns:
+        List[dict]: найденные строки в порядке следования в файле, в виде списка словарей
+            [{ path, numLine, endLine, column, start, end, pattern, comment, textExclusion, textReplace }, ...],
+            start и end - смещения в тексте файла, numLine и endLine - строки начала и конца.
+            Для кириллицы без шаблона pattern, comment, textExclusion и textReplace равны None, а в textLine - вся строка файла
+    """
+    candidates = []
+    if text == None:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+            f.close()
+    if cyrillicRegex.search(text) == None:
+        return candidates
+    lineStarts = [0]+[m.end() for m in newlineRegex.finditer(text)]
+    # строки, отмеченные этим скриптом как непереведенные, пропускаем
+    skipLines = {bisect.bisect_right(lineStarts, m.start())-1 for m in markNoTransliteRegex.finditer(text)}
+    spans = sorted(lexSource(text, not path.lower().endswith('.ts'), stop))
+    countEvent('lines.scanned', len(lineStarts))
+    countEvent('regex.hits', len(spans))
+    patternLines = set()
+    for start, end, pattern, hasCyrillic in spans:
+        if pattern == '//' or not hasCyrillic:
+            continue
+        numLine = bisect.bisect_right(lineStarts, start)-1
+        if numLine in skipLines:
+            continue
+        option = listPattern[pattern]
+        textExclusion = text[start+1:end-1] if option['inclusion'] else text[start:end]
+        candidates.append({
+            'path': path,
+            'numLine': numLine,
+            'endLine': bisect.bisect_right(lineStarts, end-1)-1,
+            'column': start-lineStarts[numLine],
+            'start': start,
+            'end': end,
+            'pattern': pattern,
+            'comment': option['comment'],
+            'textExclusion': textExclusion,
+            'textReplace': text[start:end] if option['inclusion'] else textExclusion,
+        })
+        patternLines.add(numLine)
+    # кириллица вне строк, шаблонов, текста JSX и комментариев (в коде, регулярных выражениях и т.п.)
+    gaps = []
+    last = 0
+    for start, end, pattern, hasCyrillic in spans:
+        if start > last:
+            gaps.append((last, start))
+        last = max(last, end)
+    gaps.append((last, len(text) if stop == None else max(last, stop)))
+    for gapStart, gapEnd in gaps:
+        m = cyrillicRegex.search(text, gapStart, gapEnd)
+        while m != None:
+            numLine = bisect.bisect_right(lineStarts, m.start())-1
+            nextLine = lineStarts[numLine+1] if numLine+1 < len(lineStarts) else len(text)
+            if numLine not in skipLines and numLine not in patternLines:
+                patternLines.add(numLine)
+                candidates.append({
+                    'path': path,
+                    'numLine': numLine,
+                    'endLine': numLine,
+                    'column': m.start()-lineStarts[numLine],
+                    'start': m.start(),
+                    'end': m.end(),
+                    'pattern': None,
+                    'comment': None,
+                    'textExclusion': None,
+                    'textReplace': None,
+                    'textLine': text[lineStarts[numLine]:nextLine].strip(),
+                })
+            m = cyrillicRegex.search(text, max(m.end(), min(nextLine, gapEnd)), gapEnd)
+    candidates.sort(key=lambda candidate: candidate['start'])
+    return candidates
+
+
+def scanFile(path: str, knownHash: Optional[str] = None) -> Tuple[Optional[str], Optional[List[dict]]]:
+    """Хеширование и поиск строк в файле для индекса сканирования (.env: SCAN_CACHE).
+    Сначала байты файла (через mmap) проверяются на первые байты кириллицы в UTF-8 (0xD0, 0xD1):
+    файлы без них не декодируются, не хешируются и не разбираются. Для остальных разбор
+    останавливается после последней кириллической буквы
+
+    Args:
+        path (str): путь до файла
+        knownHash (Optional[str], optional): хеш содержимого из индекса. Defaults to None.
+
+    Returns:
+        Tuple[Optional[str], Optional[List[dict]]]: хеш содержимого (None, если кириллицы в файле нет) и найденные строки,
+            если содержимое не изменилось (хеш совпал с knownHash) - вместо строк None
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            f.close()
+            return None, []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if cyrillicBytesRegex.search(data) == None:
+                f.close()
+                return None, []
+            lastHit = max(data.rfind(b'\xd0'), data.rfind(b'\xd1'))
+            contentHash = hashlib.sha1(data).hexdigest()
+            if contentHash == knownHash:
+                f.close()
+                return contentHash, None
+            text = io.TextIOWrapper(io.BytesIO(data[:]), encoding='utf-8').read()
+            tail = io.TextIOWrapper(io.BytesIO(data[lastHit+2:]), encoding='utf-8').read()
+        f.close()
+    return contentHash, extractCandidates(path, text, len(text)-len(tail))
+
+
+def loadScanCache() -> None:
+    """Читаем индекс сканирования (.env: SCAN_CACHE): для каждого файла mtime, размер,
+    хеш содержимого и найденные в нём строки
+    """
+    if pathScanCache == '' or not os.path.isfile(pathScanCache):
+        return
+    try:
+        with open(pathScanCache, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            f.close()
+    except ValueError:
+        return
+    if data.get('version') == scanCacheVersion:
+        scanCache.update(data['files'])
+
+
+def saveScanCache() -> None:
+    """Сохраняем индекс сканирования (через временный файл, чтобы не повредить индекс при сбое)
+    """
+    if pathScanCache == '':
+        return
+    with open(pathScanCache+'.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': scanCacheVersion, 'files': scanCache}, f, ensure_ascii=False)
+        f.close()
+    os.replace(pathScanCache+'.tmp', pathScanCache)
+
+
+def invalidateScanCache(path: str) -> None:
+    """Удаляем файл из индекса сканирования после того, как мы его изменили
+
+    Args:
+        path (str): путь до файла
+    """
+    scanCache.pop(path, None)
+
+
+def mergeLines(lines: List[str], heads: Dict[int, int], candidate: dict) -> int:
+    """Строка на несколько строк файла (шаблонная строка, текст JSX) - объединяем их в одну, чтобы заменить
+    целиком; остальные строки становятся пустыми, поэтому номера строк и текст файла при записи не меняются
+
+    Args:
+        lines (List[str]): все строки в файле
+        heads (Dict[int, int]): строка, объединённая с предыдущей -> строка, в которую объединена
+        candidate (dict): найденная строка (extractCandidates)
+
+    Returns:
+        int: номер строки в lines, в которой находится найденная строка
+    """
+    numLine = heads.get(candidate['numLine'], candidate['numLine'])
+    if candidate.get('endLine', numLine) > numLine:
+        lines[numLine] = ''.join(lines[numLine:candidate['endLine']+1])
+        for j in range(numLine+1, candidate['endLine']+1):
+            lines[j] = ''
+            heads[j] = numLine
+    return numLine
+
+
+def reviewFile(path: str, candidates: List[dict]) -> None:
+    """Интерактивная проверка найденных в файле строк (фаза проверки)
+
+    Args:
+        path (str): путь до файла
+        candidates (List[dict]): строки, найденные в файле функцией extractCandidates
+    """
+    if not len(candidates):
+        return
+    timestr = datetime.now().strftime('%H:%M:%S')
+    print(Fore.CYAN+timestr+': Обнаружен файл: '+path)
+    print(Fore.YELLOW+timestr+': Начинаем читать файл: '+os.path.basename(path))
+    lines = openReviewFile(path)
+    lastMatch = None
+    heads = {}  # строка, объединённая с предыдущей -> строка, в которую объединена
+    for i, candidate in enumerate(candidates):
+        prefetchSuggestions(path, candidates[i:i+1+prefetchAhead])
+        numLine = heads.get(candidate['numLine'], candidate['numLine'])
+        if candidate['pattern'] == None:
+            print(
+                Fore.RED+timestr+': Обнаружена кирилица без шаблона в строке ('+str(numLine)+'):', end='\n')
+            print(lines[numLine])
+            continue
+        mergeLines(lines, heads, candidate)
+        if lastMatch != (numLine, candidate['pattern']):
+            lastMatch = (numLine, candidate['pattern'])
+            print(
+                '-----------------------------------------------------------', end='\n')
+            print(Fore.MAGENTA+timestr+': ' +
+                  candidate['comment']+' в строке ('+str(numLine+1)+'):')
+            printLines(lines, numLine, lines[numLine])
+        print('', end='\n')
+        print(Fore.MAGENTA+'Найдено:')
+        print(candidate['textExclusion'], end='\n\n')
+        reviewState['candidate'] = candidate
+        selectAction(path, lines, numLine,
+                     candidate['textExclusion'], candidate['textReplace'])
+    for key in [key for key in prefetchResults.keys() if key[0] == path]:
+        prefetchResults.pop(key).cancel()
+    flushEdits()
+    pendingWrites['files'].pop(path, None)
+    print('-----------------------------------------------------------', end='\n')
+
+
+@timed('parseFile')
+def parseFile(file: str) -> None:
+    """Парсер файла
+
+    Args:
+        file (str): путь до файла
+    """
+    reviewFile(file, scanFile(file)[1])
+
+
+def getIgnoreRegex(pattern: str) -> re.Pattern:
+    """Регулярное выражение для шаблона из файла исключений в формате .gitignore
+
+    Args:
+        pattern (str): шаблон без ! в начале и / в конце
+
+    Returns:
+        re.Pattern: выражение для пути относительно каталога файла исключений
+    """
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[' and pattern.find(']', i+1) != -1:
+            end = pattern.find(']', i+1)
+            chars = pattern[i+1:end].replace('\\', '\\\\')
+            regex += '['+('^'+chars[1:] if chars.startswith('!') else chars)+']'
+            i = end+1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(('' if anchored else '(?:.*/)?')+regex+'$')
+
+
+def loadIgnoreRules(path: str) -> List[Tuple[str, re.Pattern, bool, bool]]:
+    """Читаем файл исключений (.env: SCAN_IGNORE_FILE) в каталоге
+
+    Args:
+        path (str): путь до каталога
+
+    Returns:
+        List[Tuple[str, re.Pattern, bool, bool]]: правила (каталог, выражение, отрицание !, только для каталогов)
+    """
+    rules = []
+    if scanIgnoreFile == '' or not os.path.isfile(os.path.join(path, scanIgnoreFile)):
+        return rules
+    with open(os.path.join(path, scanIgnoreFile), 'r', encoding='utf-8', errors='replace') as f:
+        for line in f.read().splitlines():
+            line = line.rstrip()
+            if line == '' or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            line = line[1:] if negate else line
+            dirOnly = line.endswith('/')
+            line = line.rstrip('/')
+            if line != '':
+                rules.append((path, getIgnoreRegex(line), negate, dirOnly))
+        f.close()
+    return rules
+
+
+def isIgnored(path: str, isDir: bool, rules: List[Tuple[str, re.Pattern, bool, bool]]) -> bool:
+    """Исключён ли путь правилами файлов исключений: как в .gitignore, побеждает последнее подходящее правило
+
+    Args:
+        path (str): путь до файла или каталога
+        isDir (bool): это каталог
+        rules (List[Tuple[str, re.Pattern, bool, bool]]): правила файлов исключений этого и родительских каталогов
+
+    Returns:
+        bool: True, если путь исключён
+    """
+    ignored = False
+    for base, regex, negate, dirOnly in rules:
+        if dirOnly and not isDir:
+            continue
+        if regex.match(path[len(base)+1:].replace(os.sep, '/')):
+            ignored = not negate
+    return ignored
+
+
+def isMatchGlob(relPath: str, globs: List[str]) -> bool:
+    """Подходит ли путь под один из шаблонов (.env: SCAN_INCLUDE, SCAN_EXCLUDE): шаблон без /
+    сравнивается с каждой частью пути, шаблон с / - с путём относительно PATH_MODULE
+
+    Args:
+        relPath (str): путь относительно PATH_MODULE через /
+        globs (List[str]): шаблоны
+
+    Returns:
+        bool: True, если подходит хотя бы под один шаблон
+    """
+    for glob in globs:
+        if '/' in glob:
+            if fnmatch.fnmatchcase(relPath, glob.strip('/')):
+                return True
+        elif any(fnmatch.fnmatchcase(name, glob) for name in relPath.split('/')):
+            return True
+    return False
+
+
+def listDir(pathModule: str, path: str, rules: List[Tuple[str, re.Pattern, bool, bool]]) \
+        -> Tuple[List[Tuple[str, os.stat_result]], List[Tuple[str, list]]]:
+    """Чтение одного каталога с отбором файлов и вложенных каталогов (выполняется в пуле потоков walkDir)
+
+    Args:
+        pathModule (str): путь до сканируемого каталога
+        path (str): путь до каталога
+        rules (List[Tuple[str, re.Pattern, bool, bool]]): правила файлов исключений родительских каталогов
+
+    Returns:
+        Tuple[List[Tuple[str, os.stat_result]], List[Tuple[str, list]]]: файлы (путь, stat) и каталоги (путь, правила)
+    """
+    rules = rules+loadIgnoreRules(path)
+    files = []
+    dirs = []
+    try:
+        entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    except OSError:
+        return files, dirs
+    for entry in entries:
+        relPath = entry.path[len(pathModule)+1:].replace(os.sep, '/')
+        if entry.is_dir(follow_symlinks=False):
+            if not isMatchGlob(relPath, scanExclude) and not isIgnored(entry.path, True, rules):
+                dirs.append((entry.path, rules))
+        elif scanFileRegex.search(entry.name) and entry.is_file():
+            if isMatchGlob(relPath, scanExclude) or isIgnored(entry.path, False, rules):
+                continue
+            if len(scanInclude) and not isMatchGlob(relPath, scanInclude):
+                continue
+            stat = entry.stat()
+            if scanMaxSize and stat.st_size > scanMaxSize:
+                continue
+            files.append((entry.path, stat))
+    return files, dirs
+
+
+def walkDir(pathModule: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """Обход каталога без рекурсии: каталоги читаются в пуле потоков (.env: WALK_WORKERS) с опережением,
+    а файлы отдаются по мере готовности в порядке обхода в глубину. Пропускаются каталоги и файлы
+    из SCAN_EXCLUDE и файлов исключений (SCAN_IGNORE_FILE), файлы не из SCAN_INCLUDE и больше SCAN_MAX_SIZE
+
+    Args:
+        pathModule (str): путь до каталога
+
+    Returns:
+        Iterator[Tuple[str, os.stat_result]]: пути до файлов (по умолчанию .js/.ts/.jsx/.tsx) и их stat
+    """
+    pathModule = pathModule.rstrip('/\\') or pathModule
+    executor = ThreadPoolExecutor(max_workers=walkWorkers, thread_name_prefix='walk')
+    try:
+        stack = [executor.submit(listDir, pathModule, pathModule, [])]
+        while len(stack):
+            files, dirs = stack.pop().result()
+            stack += [executor.submit(listDir, pathModule, path, rules) for path, rules in reversed(dirs)]
+            yield from files
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def runGit(args: List[str], cwd: str) -> str:
+    """Запуск git и получение его вывода
+
+    Args:
+        args (List[str]): аргументы git
+        cwd (str): каталог, в котором запускаем
+
+    Raises:
+        GitError: вызываем если git завершился с ошибкой или не установлен
+
+    Returns:
+        str: вывод git
+    """
+    try:
+        result = subprocess.run(['git', '-c', 'core.quotepath=off']+args, cwd=cwd,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(str(e))
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode('utf-8', errors='replace').strip())
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def unquoteGitPath(text: str) -> str:
+    """Путь из вывода git: без завершающей табуляции (git добавляет её к путям с пробелом) и без кавычек
+    с экранированием в стиле C, которыми git обрамляет пути со специальными символами
+
+    Args:
+        text (str): путь, как его вывел git
+
+    Returns:
+        str: путь
+    """
+    text = text.rstrip('\t')
+    if not text.startswith('"') or not text.endswith('"'):
+        return text
+    escapes = {'a': b'\a', 'b': b'\b', 't': b'\t', 'n': b'\n', 'v': b'\v', 'f': b'\f', 'r': b'\r'}
+    result = bytearray()
+    for match in re.finditer(r'\\([0-7]{3}|.)|([^\\]+)', text[1:-1], flags=re.DOTALL):
+        if match.group(2) != None:
+            result += match.group(2).encode('utf-8')
+        elif len(match.group(1)) == 3:
+            result.append(int(match.group(1), 8))  # байт UTF-8 в восьмеричном виде
+        else:
+            result += escapes.get(match.group(1), match.group(1).encode('utf-8'))
+    return result.decode('utf-8', errors='surrogateescape')
+
+
+def getDiffHunks(pathModule: str, ref: str) -> Dict[str, Optional[List[Tuple[int, int]]]]:
+    """Изменённые относительно git-ссылки файлы модуля и изменённые в них строки
+    (git diff по рабочему каталогу, то есть вместе с незакоммиченными изменениями).
+    Новые файлы, которых ещё нет в git, считаются изменёнными целиком
+
+    Args:
+        pathModule (str): путь до каталога
+        ref (str): git-ссылка (ветка, тег, коммит), например origin/master или HEAD
+
+    Returns:
+        Dict[str, Optional[List[Tuple[int, int]]]]: путь до файла -> диапазоны изменённых строк
+            [(первая, последняя), ...] (с нуля, как numLine), None - файл изменён целиком
+    """
+    pathAbs = os.path.abspath(pathModule)
+    root = runGit(['rev-parse', '--show-toplevel'], pathAbs).strip()
+
+    def getPath(pathGit: str) -> str:
+        return os.path.join(pathModule, os.path.relpath(os.path.join(root, pathGit), pathAbs))
+    hunks = {}
+    path = None
+    for line in runGit(['diff', '--unified=0', '--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/',
+                        ref, '--', pathAbs], root).splitlines():
+        if line.startswith('+++ '):
+            pathGit = unquoteGitPath(line[4:])
+            path = getPath(pathGit[2:]) if pathGit.startswith('b/') else None
+        elif line.startswith('@@') and path != None:
+            m = re.match(r'@@ -\S+ \+(\d+)(?:,(\d+))? @@', line)
+            start = int(m.group(1))-1
+            count = 1 if m.group(2) == None else int(m.group(2))
+            if count > 0:  # count == 0 - строки только удалены
+                hunks.setdefault(path, []).append((start, start+count-1))
+    for line in runGit(['ls-files', '-z', '--others', '--exclude-standard', '--full-name', '--', pathAbs], root).split('\0'):
+        if line != '':
+            hunks[getPath(line)] = None
+    return hunks
+
+
+def walkDiff(pathModule: str, hunks: Dict[str, Optional[List[Tuple[int, int]]]]) -> Iterator[Tuple[str, os.stat_result]]:
+    """Обход только изменённых файлов (см. getDiffHunks) с теми же фильтрами, что и у walkDir
+
+    Args:
+        pathModule (str): путь до каталога
+        hunks (Dict[str, Optional[List[Tuple[int, int]]]]): изменённые файлы и строки
+
+    Returns:
+        Iterator[Tuple[str, os.stat_result]]: пути до файлов и их stat
+    """
+    for path in sorted(hunks.keys()):
+        relPath = os.path.relpath(path, pathModule).replace(os.sep, '/')
+        if not os.path.isfile(path) or not scanFileRegex.search(os.path.basename(path)) or isMatchGlob(relPath, scanExclude):
+            continue
+        if len(scanInclude) and not isMatchGlob(relPath, scanInclude):
+            continue
+        stat = os.stat(path)
+        if scanMaxSize and stat.st_size > scanMaxSize:
+            continue
+        yield path, stat
+
+
+def isInHunks(candidate: dict, ranges: Optional[List[Tuple[int, int]]]) -> bool:
+    """Попадает ли найденная строка в изменённые строки файла
+
+    Args:
+        candidate (dict): найденная строка (extractCandidates)
+        ranges (Optional[List[Tuple[int, int]]]): диапазоны изменённых строк, None - файл изменён целиком
+
+    Returns:
+        bool: True, если попадает
+    """
+    if ranges == None:
+        return True
+    return any(start <= candidate.get('endLine', candidate['numLine']) and candidate['numLine'] <= end for start, end in ranges)
+
+
+def discoverCandidates(pathModule: str, hunks: Dict[str, Optional[List[Tuple[int, int]]]] = None) -> Iterator[Tuple[str, List[dict]]]:
+    """Фаза обнаружения: обход каталога идёт в отдельном потоке, а поиск строк
+    по каждому файлу - в пуле процессов (.env: WORKERS). Файлы, у которых в индексе сканирования
+    совпали mtime и размер (или хеш содержимого), не парсятся - строки берутся из индекса.
+    Результаты отдаются в порядке обхода по мере готовности, поэтому проверку можно начинать,
+    не дожидаясь окончания сканирования
+
+    Args:
+        pathModule (str): путь до каталога
+        hunks (Dict[str, Optional[List[Tuple[int, int]]]], optional): только эти файлы и строки (см. getDiffHunks). Defaults to None.
+
+    Returns:
+        Iterator[Tuple[str, List[dict]]]: пары (путь до файла, найденные строки)
+    """
+    queue = Queue()
+    executors = []  # пул процессов создаётся при первом файле, которого нет в индексе сканирования
+
+    def submit():
+        try:
+            for path, stat in walkDir(pathModule) if hunks == None else walkDiff(pathModule, hunks):
+                countEvent('files.seen')
+                cache = scanCache.get(path)
+                if cache and cache['mtime'] == stat.st_mtime_ns and cache['size'] == stat.st_size:
+                    countEvent('files.skipped.cache')
+                    queue.put((path, stat, cache, None))
+                else:
+                    if not len(executors):
+                        executors.append(ProcessPoolExecutor(max_workers=workers))
+                    if profileEnabled:
+                        future = executors[0].submit(profileCall, scanFile, path, cache['hash'] if cache else None)
+                    else:
+                        future = executors[0].submit(scanFile, path, cache['hash'] if cache else None)
+                    queue.put((path, stat, cache, future))
+        except Exception as e:
+            queue.put(e)
+        finally:
+            queue.put(None)
+    threading.Thread(target=submit, daemon=True).start()
+    completed = False
+    try:
+        while True:
+            item = queue.get()
+            if item == None:
+                completed = True
+                break
+            if isinstance(item, Exception):
+                raise item
+            path, stat, cache, future = item
+            if future != None:
+                contentHash, candidates = mergeProfile(future.result()) if profileEnabled else future.result()
+                if contentHash == None:
+                    countEvent('files.skipped.prefilter')  # нет байтов кириллицы
+                cache = {
+                    'mtime': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'hash': contentHash,
+                    'candidates': cache['candidates'] if candidates == None else candidates,
+                }
+                scanCache[path] = cache
+            if hunks == None:
+                yield path, cache['candidates']
+            else:
+                yield path, [candidate for candidate in cache['candidates'] if isInHunks(candidate, hunks[path])]
+    finally:
+        # после полного обхода дожидаемся остановки процессов: иначе при выходе из интерпретатора
+        # обработчик concurrent.futures пишет в уже закрытые каналы (OSError: Bad file descriptor)
+        for executor in executors:
+            executor.shutdown(wait=completed, cancel_futures=not completed)
+
+
+@timed('scanDir')
+def scanDir(pathModule: str, ref: str = None) -> None:
+    """Сканирование каталога: строки ищутся параллельно (discoverCandidates),
+    а найденные проверяются оператором по очереди без ожидания сканирования
+
+    Args:
+        pathModule (str): путь до каталога
+        ref (str, optional): проверять только строки, изменённые относительно этой git-ссылки. Defaults to None.
+    """
+    timestr = datetime.now().strftime('%H:%M:%S')
+    hunks = None
+    if ref != None:
+        hunks = getDiffHunks(pathModule, ref)
+        print(Fore.GREEN+timestr+': Изменено относительно '+ref+' файлов: '+str(len(hunks)))
+    print(Fore.GREEN+timestr+': Начинаем сканировать каталог: '+pathModule)
+    loadScanCache()
+    startPrefetch()
+    try:
+        seen = set()
+        for path, candidates in discoverCandidates(pathModule, hunks):
+            seen.add(path)
+            prefetchTranslations([candidate['textExclusion'] for candidate in candidates if candidate['pattern'] != None])
+            reviewFile(path, candidates)
+        # удаляем из индекса файлы, которых больше нет (если обходили весь каталог)
+        for path in list(scanCache.keys()) if hunks == None else []:
+            if path not in seen:
+                scanCache.pop(path)
+    finally:
+        stopPrefetch()
+        flushEdits()
+        saveScanCache()
+
+
+def reloadResources() -> None:
+    """Перечитываем файл перевода, изменённый не нами (режим наблюдения): в индекс поиска добавляются
+    только новые и изменённые значения, а если значения удалены - индекс строится заново
+    """
+    with searchLock:
+        old = {path: leaf['value'] for path, leaf in searchIndex['leaves'].items()}
+    loadResources()
+    new = {}
+
+    def collect(structure: dict, listKey: List[str]):
+        for key in structure.keys():
+            if isinstance(structure[key], str):
+                new[tuple(listKey+[key])] = structure[key]
+            else:
+                collect(structure[key], listKey+[key])
+    collect(resourcesData.get('ru', {}), [])
+    timestr = datetime.now().strftime('%H:%M:%S')
+    if any(path not in new for path in old):
+        buildSearchIndex()
+        print(Fore.YELLOW+timestr+': Файл перевода изменён, индекс поиска построен заново', end='\n')
+        return
+    changed = [path for path, value in new.items() if old.get(path) != value]
+    for path in changed:
+        indexResource(list(path), new[path])
+    print(Fore.YELLOW+timestr+': Файл перевода изменён, новых и изменённых значений: '+str(len(changed)), end='\n')
+
+
+def watchInotify(pathModule: str) -> Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]:
+    """События файловой системы через inotify (Linux, вызовы libc через ctypes): следим за каждым каталогом,
+    который попадает в обход (listDir), и за каталогом файла перевода. События собираются в пачку,
+    пока между ними проходит меньше WATCH_DEBOUNCE секунд
+
+    Args:
+        pathModule (str): путь до каталога
+
+    Raises:
+        OSError: вызываем если inotify недоступен
+
+    Returns:
+        Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]: пачки (изменённые файлы (путь, stat),
+            удалённые файлы, изменён ли файл перевода)
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        raise OSError('inotify недоступен')
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), 'inotify_init1')
+    return watchInotifyEvents(pathModule, libc, fd)
+
+
+def watchInotifyEvents(pathModule: str, libc: ctypes.CDLL, fd: int) \
+        -> Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]:
+    """Чтение событий inotify (см. watchInotify)
+
+    Args:
+        pathModule (str): путь до каталога
+        libc (ctypes.CDLL): libc
+        fd (int): дескриптор inotify
+
+    Returns:
+        Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]: пачки событий
+    """
+    dirs = {}  # дескриптор наблюдения -> каталог
+    watches = {}  # дескриптор наблюдения -> правила файлов исключений для listDir (только каталоги модуля)
+
+    def addWatches(path: str, rules: list) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        stack = [(path, rules)]
+        while len(stack):
+            path, rules = stack.pop()
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), inotifyMask)
+            if wd < 0:
+                print(Fore.RED+'Не удалось следить за каталогом '+path+' (fs.inotify.max_user_watches?)', end='\n')
+            else:
+                dirs[wd] = path
+                watches[wd] = rules
+            dirFiles, dirDirs = listDir(pathModule, path, rules)
+            files += dirFiles
+            stack += reversed(dirDirs)
+        return files
+    try:
+        pathModule = pathModule.rstrip('/\\') or pathModule
+        addWatches(pathModule, [])
+        pathResourcesFull = os.path.abspath(pathResources)
+        wd = libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(pathResourcesFull)), inotifyMask)
+        if wd >= 0:
+            dirs.setdefault(wd, os.path.dirname(pathResourcesFull))
+        while True:
+            select.select([fd], [], [])
+            touched = {}  # дескриптор наблюдения -> изменённые пути в каталоге
+            newDirs = []
+            resourcesChanged = False
+            overflow = False
+            while True:
+                data = os.read(fd, 65536)
+                offset = 0
+                while offset < len(data):
+                    wd, mask, cookie, length = struct.unpack_from('iIII', data, offset)
+                    name = os.fsdecode(data[offset+16:offset+16+length].rstrip(b'\0'))
+                    offset += 16+length
+                    if mask & 0x4000:  # IN_Q_OVERFLOW: события потеряны
+                        overflow = True
+                        continue
+                    if mask & 0x8000:  # IN_IGNORED: каталог удалён
+                        dirs.pop(wd, None)
+                        watches.pop(wd, None)
+                        continue
+                    if wd not in dirs:
+                        continue
+                    path = os.path.join(dirs[wd], name)
+                    if os.path.abspath(path) == pathResourcesFull:
+                        resourcesChanged = True
+                    if wd not in watches:
+                        continue
+                    if mask & 0x40000000:  # IN_ISDIR
+                        if mask & 0x180:  # IN_CREATE, IN_MOVED_TO
+                            newDirs.append((wd, path))
+                    else:
+                        touched.setdefault(wd, set()).add(path)
+                if not select.select([fd], [], [], watchDebounce)[0]:
+                    break
+            files = []
+            removed = []
+            if overflow:
+                files = list(walkDir(pathModule))
+                removed = [path for path in scanCache.keys() if path not in {path for path, stat in files}]
+            for wd, path in newDirs:
+                if wd not in watches:
+                    continue
+                for dirPath, rules in listDir(pathModule, dirs[wd], watches[wd])[1]:
+                    if dirPath == path:
+                        files += addWatches(path, rules)
+            for wd, paths in touched.items():
+                if wd not in watches:
+                    removed += [path for path in paths if path in scanCache]
+                    continue
+                present = dict(listDir(pathModule, dirs[wd], watches[wd])[0])
+                for path in paths:
+                    if path in present:
+                        files.append((path, present[path]))
+                    elif path in scanCache:
+                        removed.append(path)
+            yield files, removed, resourcesChanged
+    finally:
+        os.close(fd)
+
+
+def watchPolling(pathModule: str) -> Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]:
+    """События файловой системы опросом (если inotify недоступен или .env: WATCH_POLLING): раз в WATCH_INTERVAL
+    секунд каталог обходится заново и сравниваются mtime и размер файлов; пока файлы меняются, пачка копится
+
+    Args:
+        pathModule (str): путь до каталога
+
+    Returns:
+        Iterator[Tuple[List[Tuple[str, os.stat_result]], List[str], bool]]: пачки (изменённые файлы (путь, stat),
+            удалённые файлы, изменён ли файл перевода)
+    """
+    def getState() -> Tuple[Dict[str, os.stat_result], tuple]:
+        resourcesStat = os.stat(pathResources) if os.path.isfile(pathResources) else None
+        return dict(walkDir(pathModule)), (resourcesStat.st_mtime_ns, resourcesStat.st_size) if resourcesStat else None
+    files, resources = getState()
+    while True:
+        time.sleep(watchInterval)
+        changed = {}
+        removed = set()
+        resourcesChanged = False
+        while True:
+            current, currentResources = getState()
+            batch = [path for path, stat in current.items() if path not in files
+                     or (files[path].st_mtime_ns, files[path].st_size) != (stat.st_mtime_ns, stat.st_size)]
+            gone = [path for path in files if path not in current]
+            batchResources = currentResources != resources
+            files, resources = current, currentResources
+            if not len(batch) and not len(gone) and not batchResources:
+                break
+            for path in batch:
+                changed[path] = current[path]
+                removed.discard(path)
+            for path in gone:
+                changed.pop(path, None)
+                removed.add(path)
+            resourcesChanged = resourcesChanged or batchResources
+            time.sleep(watchDebounce)
+        if len(changed) or len(removed) or resourcesChanged:
+            yield list(changed.items()), list(removed), resourcesChanged
+
+
+def getNewCandidates(old: List[dict], new: List[dict]) -> List[dict]:
+    """Строки, которых не было в файле до изменения: сравниваем по шаблону и тексту с учётом количества,
+    поэтому уже проверенные (и оставленные как есть) строки заново не предлагаются
+
+    Args:
+        old (List[dict]): строки до изменения
+        new (List[dict]): строки после изменения
+
+    Returns:
+        List[dict]: новые строки
+    """
+    known = Counter((candidate['pattern'], candidate['textReplace'] or candidate.get('textLine')) for candidate in old)
+    candidates = []
+    for candidate in new:
+        key = (candidate['pattern'], candidate['textReplace'] or candidate.get('textLine'))
+        if known[key] > 0:
+            known[key] -= 1
+        else:
+            candidates.append(candidate)
+    return candidates
+
+
+@timed('watchDir')
+def watchDir(pathModule: str) -> None:
+    """Режим наблюдения: дерево перевода, индексы и индекс сканирования остаются в памяти, а при сохранении
+    файла ищутся строки только в нём, и оператору предлагаются только новые строки.
+    Изменения файла перевода подхватываются без полной перестройки индексов (reloadResources)
+
+    Args:
+        pathModule (str): путь до каталога
+    """
+    timestr = datetime.now().strftime('%H:%M:%S')
+    print(Fore.GREEN+timestr+': Обновляем индекс сканирования каталога: '+pathModule)
+    loadScanCache()
+
+    def updateScanCache(path: str) -> Tuple[List[dict], List[dict]]:
+        # строки файла до и после изменения
+        cache = scanCache.get(path)
+        stat = os.stat(path)
+        if cache and cache['mtime'] == stat.st_mtime_ns and cache['size'] == stat.st_size:
+            return cache['candidates'], cache['candidates']
+        contentHash, candidates = scanFile(path, cache['hash'] if cache else None)
+        old = cache['candidates'] if cache else []
+        scanCache[path] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': contentHash,
+            'candidates': old if candidates == None else candidates,
+        }
+        return old, scanCache[path]['candidates']
+    startPrefetch()
+    try:
+        seen = set()
+        for path, candidates in discoverCandidates(pathModule):
+            seen.add(path)
+        for path in list(scanCache.keys()):
+            if path not in seen:
+                scanCache.pop(path)
+        saveScanCache()
+        events = None
+        if not watchForcePolling:
+            try:
+                events = watchInotify(pathModule)
+            except OSError as e:
+                print(Fore.YELLOW+'inotify недоступен ('+str(e)+'), следим за изменениями опросом', end='\n')
+        if events == None:
+            events = watchPolling(pathModule)
+        print(Fore.GREEN+timestr+': Следим за изменениями (Ctrl+C - выход)', end='\n')
+        for files, removed, resourcesChanged in events:
+            if resourcesChanged and resourcesOutput == 'file' and os.path.isfile(pathResources):
+                stat = os.stat(pathResources)
+                if stat.st_mtime_ns != resourcesLayout['mtime'] or stat.st_size != resourcesLayout['size']:
+                    reloadResources()
+            for path in removed:
+                scanCache.pop(path, None)
+            for path, stat in files:
+                try:
+                    old, candidates = updateScanCache(path)
+                except OSError:
+                    continue  # файл удалён, пока копилась пачка
+                candidates = getNewCandidates(old, candidates)
+                if not len(candidates):
+                    continue
+                prefetchTranslations([candidate['textExclusion'] for candidate in candidates if candidate['pattern'] != None])
+                reviewFile(path, candidates)
+                updateScanCache(path)  # свои изменения файла не должны вернуться новыми строками
+            saveScanCache()
+    except KeyboardInterrupt:
+        print('', end='\n')
+        print(Fore.GREEN+datetime.now().strftime('%H:%M:%S')+': Наблюдение остановлено', end='\n')
+    finally:
+        stopPrefetch()
+        flushEdits()
+        saveScanCache()
+
+
+def getGroupKey(candidate: dict, groupBy: str) -> tuple:
+    """Ключ группы одинаковых строк: текст без лишних пробелов, для groupBy=pattern ещё и шаблон (вид кавычек),
+    для groupBy=context - шаблон и каталог файла
+
+    Args:
+        candidate (dict): найденная строка (extractCandidates)
+        groupBy (str): text / pattern / context
+
+    Returns:
+        tuple: ключ группы
+    """
+    text = ' '.join(candidate['textExclusion'].split())
+    if groupBy == 'pattern':
+        return (text, candidate['pattern'])
+    if groupBy == 'context':
+        return (text, candidate['pattern'], os.path.dirname(candidate['path']))
+    return (text,)
+
+
+@timed('reviewGroups')
+def reviewGroups(pathModule: str, groupBy: str, ref: str = None) -> None:
+    """Проверка сгруппированных строк: одинаковые строки (getGroupKey) собираются со всего каталога,
+    оператор принимает решение один раз на группу (самые частые - первыми), и оно применяется
+    ко всем вхождениям; подсказки ищутся тоже один раз на группу
+
+    Args:
+        pathModule (str): путь до каталога
+        groupBy (str): text / pattern / context
+        ref (str, optional): проверять только строки, изменённые относительно этой git-ссылки. Defaults to None.
+    """
+    timestr = datetime.now().strftime('%H:%M:%S')
+    hunks = getDiffHunks(pathModule, ref) if ref != None else None
+    print(Fore.GREEN+timestr+': Начинаем сканировать каталог: '+pathModule)
+    loadScanCache()
+    groups = OrderedDict()
+    noPattern = []
+    files = {}  # путь до файла -> (строки файла, объединённые строки) на весь сеанс, номера строк в них не меняются
+    startPrefetch()
+    try:
+        for path, candidates in discoverCandidates(pathModule, hunks):
+            for candidate in candidates:
+                if candidate['pattern'] == None:
+                    noPattern.append(candidate)
+                else:
+                    groups.setdefault(getGroupKey(candidate, groupBy), []).append(candidate)
+        groups = sorted(groups.values(), key=lambda group: -len(group))
+        print(Fore.GREEN+timestr+': Найдено строк: '+str(sum(len(group) for group in groups)) +
+              ', разных: '+str(len(groups)), end='\n')
+        prefetchTranslations([group[0]['textExclusion'] for group in groups])
+
+        def getLines(path: str) -> Tuple[List[str], Dict[int, int]]:
+            if path not in files:
+                files[path] = (openReviewFile(path), {})
+            return files[path]
+        for i, group in enumerate(groups):
+            for next in groups[i:i+1+prefetchAhead]:
+                prefetchSuggestions(next[0]['path'], next[:1])
+            first = group[0]
+            lines, heads = getLines(first['path'])
+            numLine = mergeLines(lines, heads, first)
+            print('-----------------------------------------------------------', end='\n')
+            print(Fore.MAGENTA+'Группа '+str(i+1)+' из '+str(len(groups))+': вхождений '+str(len(group)) +
+                  ', файлов '+str(len({candidate['path'] for candidate in group})), end='\n')
+            for candidate in group[:5]:
+                print(candidate['path']+':'+str(candidate['numLine']+1)+':'+str(candidate['column']+1), end='\n')
+            if len(group) > 5:
+                print('...', end='\n')
+            print(Fore.MAGENTA+first['comment']+' в строке ('+str(numLine+1)+'):')
+            printLines(lines, numLine, lines[numLine])
+            print('', end='\n')
+            print(Fore.MAGENTA+'Найдено:')
+            print(first['textExclusion'], end='\n\n')
+            reviewState['decision'] = None
+            reviewState['candidate'] = first
+            selectAction(first['path'], lines, numLine, first['textExclusion'], first['textReplace'])
+            decision = reviewState['decision']
+            if decision == None:
+                continue
+            # то же решение - для остальных вхождений, новый перевод уже добавлен с первым вхождением
+            for candidate in group[1:]:
+                lines, heads = getLines(candidate['path'])
+                numLine = mergeLines(lines, heads, candidate)
+                reviewState['candidate'] = candidate
+                if decision.get('expression') != None and (candidate['pattern'] == '><') != (first['pattern'] == '><'):
+                    # текст JSX и строка в коде: фигурные скобки - по шаблону самого вхождения
+                    braces = candidate['pattern'] == '><'
+                    commitEdit(candidate['path'], lines, numLine, dict(
+                        decision, replaceText='{'+decision['expression']+'}' if braces else decision['expression']))
+                    continue
+                commitEdit(candidate['path'], lines, numLine, decision)
+            flushEdits()
+            print(Fore.GREEN+'Применено ко всем вхождениям: '+str(len(group)), end='\n\n')
+        for candidate in noPattern:
+            print(Fore.RED+'Обнаружена кирилица без шаблона: '+candidate['path']+':'+str(candidate['numLine']+1) +
+                  ': '+candidate['textLine'], end='\n')
+    finally:
+        stopPrefetch()
+        flushEdits()
+        saveScanCache()
+
+
+def getReportEntry(candidate: dict) -> dict:
+    """Запись отчёта о найденной строке
+
+    Args:
+        candidate (dict): найденная строка (extractCandidates)
+
+    Returns:
+        dict: { file, line, column, endLine, pattern, text }, строки и колонки - с единицы,
+            для кириллицы без шаблона pattern равен None, а text - вся строка файла
+    """
+    return {
+        'file': candidate['path'],
+        'line': candidate['numLine']+1,
+        'column': candidate['column']+1,
+        'endLine': candidate['endLine']+1,
+        'pattern': candidate['pattern'],
+        'text': candidate['textExclusion'] if candidate['pattern'] != None else candidate['textLine'],
+    }
+
+
+@timed('reportDir')
+def reportDir(pathModule: str, formatReport: str, pathOutput: str = None, ref: str = None) -> int:
+    """Отчёт о строках с кириллицей без вопросов оператору: поиск идёт параллельно (discoverCandidates),
+    а записи пишутся в отчёт по мере нахождения в формате jsonl, csv или sarif
+
+    Args:
+        pathModule (str): путь до каталога
+        formatReport (str): jsonl / csv / sarif
+        pathOutput (str, optional): путь до файла отчёта, None - стандартный вывод. Defaults to None.
+        ref (str, optional): только строки, изменённые относительно этой git-ссылки. Defaults to None.
+
+    Returns:
+        int: количество найденных строк
+    """
+    hunks = getDiffHunks(pathModule, ref) if ref != None else None
+    output = sys.stdout if pathOutput == None else open(pathOutput, 'w', encoding='utf-8', newline='')
+    count = 0
+    loadScanCache()
+    try:
+        if formatReport == 'csv':
+            writer = csv.writer(output)
+            writer.writerow(['file', 'line', 'column', 'endLine', 'pattern', 'text'])
+        elif formatReport == 'sarif':
+            output.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", "runs": [{'
+                         '"tool": {"driver": {"name": "t", "rules": ['
+                         '{"id": "cyrillic-string", "shortDescription": {"text": "Непереведённая строка с кириллицей"}}, '
+                         '{"id": "cyrillic-no-pattern", "shortDescription": {"text": "Кириллица без шаблона"}}]}}, '
+                         '"results": [\n')
+        seen = set()
+        for path, candidates in discoverCandidates(pathModule, hunks):
+            seen.add(path)
+            for candidate in candidates:
+                entry = getReportEntry(candidate)
+                if formatReport == 'csv':
+                    writer.writerow([entry['file'], entry['line'], entry['column'], entry['endLine'],
+                                     entry['pattern'] or '', entry['text']])
+                elif formatReport == 'sarif':
+                    output.write((',\n' if count else '')+json.dumps({
+                        'ruleId': 'cyrillic-string' if entry['pattern'] != None else 'cyrillic-no-pattern',
+                        'level': 'warning',
+                        'message': {'text': entry['text']},
+                        'locations': [{'physicalLocation': {
+                            'artifactLocation': {'uri': os.path.relpath(entry['file']).replace(os.sep, '/')},
+                            'region': {'startLine': entry['line'], 'startColumn': entry['column'], 'endLine': entry['endLine']},
+                        }}],
+                        'properties': {'pattern': entry['pattern']},
+                    }, ensure_ascii=False))
+                else:
+                    output.write(json.dumps(entry, ensure_ascii=False)+'\n')
+                count += 1
+            output.flush()
+        if formatReport == 'sarif':
+            output.write('\n]}]}\n')
+        for path in list(scanCache.keys()) if hunks == None else []:
+            if path not in seen:
+                scanCache.pop(path)
+    finally:
+        if output != sys.stdout:
+            output.close()
+        saveScanCache()
+    return count
+
+
+def applyEdits(text: str, edits: List[Tuple[int, int, str]]) -> str:
+    """Применение замен к тексту файла за один проход
+
+    Args:
+        text (str): текст файла
+        edits (List[Tuple[int, int, str]]): замены (начало, конец, новый текст), отсортированные и не пересекающиеся
+
+    Returns:
+        str: новый текст файла
+    """
+    parts = []
+    last = 0
+    for start, end, replacement in edits:
+        parts.append(text[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(text[last:])
+    return ''.join(parts)
+
+
+def getReplaceText(key: str, value: str, braces: bool, varValues: dict = None) -> str:
+    """Выражение перевода t('ключ', { переменные }) для замены строки
+
+    Args:
+        key (str): ключ
+        value (str): значение перевода (в нём ищем переменные {{name}})
+        braces (bool): обернуть выражение в фигурные скобки
+        varValues (dict, optional): значения переменных, по умолчанию - переменная с тем же именем. Defaults to None.
+
+    Returns:
+        str: выражение
+    """
+    varText = getVarText([{'varName': var, 'value': (varValues or {}).get(var, var)}
+                          for var in re.findall(r'\{\{([a-z]+)\}\}', value, flags=re.IGNORECASE)])
+    replaceText = 't(\''+key+'\''+('' if varText == '' else ', { '+varText+' }')+')'
+    return '{'+replaceText+'}' if braces else replaceText
+
+
+@timed('applyPlan')
+def applyPlan(pathModule: str, pathPlan: str) -> int:
+    """Пакетное применение решений из файла плана (JSONL) без вопросов оператору.
+    Запись плана находит строки по месту ({ file, line, column }) или по тексту ({ text, pattern })
+    и задаёт действие action: ignore, translate (новый ключ key и значение value), mark (отметить как непереведенное)
+    или key (существующий ключ key); braces - обернуть выражение в фигурные скобки, vars - значения переменных {{name}}.
+    Сначала проверяются все ключи (по правилам checkTKey) и все замены, и если есть конфликты - они выводятся
+    все вместе и ничего не записывается. Иначе файл перевода записывается один раз, а каждый файл - одной записью
+
+    Args:
+        pathModule (str): путь до каталога
+        pathPlan (str): путь до файла плана
+
+    Returns:
+        int: количество конфликтов (0 - план применён)
+    """
+    problems = []
+    plan = []
+    with open(pathPlan, 'r', encoding='utf-8') as f:
+        for numPlan, line in enumerate(f.read().splitlines(), 1):
+            if line.strip() == '':
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                problems.append('план, строка '+str(numPlan)+': не JSON')
+                continue
+            if entry.get('action') not in ('ignore', 'translate', 'mark', 'key'):
+                problems.append('план, строка '+str(numPlan)+': неизвестное действие '+str(entry.get('action')))
+            elif 'file' not in entry and 'text' not in entry:
+                problems.append('план, строка '+str(numPlan)+': не указано ни место (file, line), ни текст (text)')
+            elif entry['action'] in ('translate', 'key') and not entry.get('key'):
+                problems.append('план, строка '+str(numPlan)+': не указан ключ (key)')
+            else:
+                entry['numPlan'] = numPlan
+                plan.append(entry)
+        f.close()
+    byLocation = {}
+    byText = {}
+    for entry in plan:
+        if 'file' in entry:
+            byLocation[(os.path.abspath(entry['file']), entry.get('line'), entry.get('column'))] = entry
+        else:
+            byText[(entry['text'], entry.get('pattern'))] = entry
+
+    # сопоставляем найденные строки с записями плана
+    if len(byText):
+        loadScanCache()
+        source = discoverCandidates(pathModule)
+    else:
+        source = ((path, scanFile(path)[1]) for path in sorted({key[0] for key in byLocation.keys()}) if os.path.isfile(path))
+    matched = set()
+    edits = {}  # путь до файла -> [(кандидат, запись плана)]
+    for path, candidates in source:
+        for candidate in candidates:
+            if candidate['pattern'] == None:
+                continue
+            location = (os.path.abspath(path), candidate['numLine']+1)
+            entry = byLocation.get(location+(candidate['column']+1,)) or byLocation.get(location+(None,)) \
+                or byText.get((candidate['textExclusion'], candidate['pattern'])) or byText.get((candidate['textExclusion'], None))
+            if entry == None:
+                continue
+            matched.add(entry['numPlan'])
+            if entry['action'] != 'ignore':
+                edits.setdefault(path, []).append((candidate, entry))
+    for entry in plan:
+        if entry['numPlan'] not in matched:
+            print(Fore.YELLOW+'План, строка '+str(entry['numPlan'])+': строка не найдена, пропущено', end='\n')
+
+    # проверяем ключи: новые - по правилам checkTKey и между собой, существующие - что они есть
+    newKeys = {}  # ключ -> { value, numPlan }
+    for path, items in edits.items():
+        for candidate, entry in items:
+            if entry['action'] != 'translate':
+                continue
+            value = entry.get('value') or getSourceText(candidate['textExclusion'], candidate['pattern'])
+            known = newKeys.setdefault(entry['key'], {'value': value, 'numPlan': entry['numPlan']})
+            if known['value'] != value:
+                problems.append('ключ '+entry['key']+': разные значения "'+known['value']+'" (план, строка ' +
+                                str(known['numPlan'])+') и "'+value+'" (план, строка '+str(entry['numPlan'])+')')
+    for key in list(newKeys.keys()):
+        if getResourceText(key) == newKeys[key]['value']:
+            newKeys.pop(key)  # уже записан с тем же значением (например, план применяется повторно)
+            continue
+        try:
+            checkTKey(key)
+        except EmptyValueKey:
+            problems.append('ключ '+key+': одна из частей ключа пуста')
+        except ForbiddenRewriting as e:
+            problems.append('ключ '+key+': уже записано: '+e.tValue)
+        listKey = key.split('.')
+        for i in range(1, len(listKey)):
+            if '.'.join(listKey[:i]) in newKeys:
+                problems.append('ключ '+key+': вложен в новый ключ '+'.'.join(listKey[:i]))
+    for path, items in edits.items():
+        for candidate, entry in items:
+            if entry['action'] == 'key' and getResourceText(entry['key']) == None and entry['key'] not in newKeys:
+                problems.append('план, строка '+str(entry['numPlan'])+': ключ '+entry['key']+' не найден')
+
+    # готовим замены по файлам и проверяем, что файлы не изменились и замены не пересекаются
+    texts = {}
+    for path, items in edits.items():
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+            f.close()
+        spans = {}
+        for candidate, entry in items:
+            if entry['action'] == 'mark':
+                end = text.find('\n', candidate['end'])
+                end = len(text) if end == -1 else end
+                spans[(end, end)] = ' // НЕ ПЕРЕВЕДЕННО !!!'
+                continue
+            if text[candidate['start']:candidate['end']] != candidate['textReplace']:
+                problems.append(path+':'+str(candidate['numLine']+1)+': файл изменился после сканирования')
+                continue
+            if entry['action'] == 'translate':
+                value = newKeys[entry['key']]['value'] if entry['key'] in newKeys else getResourceText(entry['key'])
+            else:
+                value = getResourceText(entry['key']) or (newKeys[entry['key']]['value'] if entry['key'] in newKeys else '')
+            braces = entry.get('braces', candidate['pattern'] == '><')  # текст JSX без скобок не станет выражением
+            spans[(candidate['start'], candidate['end'])] = getReplaceText(entry['key'], value or '', braces, entry.get('vars'))
+        spans = sorted((start, end, replacement) for (start, end), replacement in spans.items())
+        for i in range(1, len(spans)):
+            if spans[i][0] < spans[i-1][1]:
+                problems.append(path+': замены пересекаются ('+str(spans[i-1][0])+'-'+str(spans[i-1][1]) +
+                                ' и '+str(spans[i][0])+'-'+str(spans[i][1])+')')
+        texts[path] = (text, spans)
+
+    if len(problems):
+        print(Fore.RED+'План не применён, конфликты ('+str(len(problems))+'):', end='\n')
+        for problem in problems:
+            print(Fore.RED+'  '+problem, end='\n')
+        return len(problems)
+
+    # сначала перевод, потом файлы: при сбое повторное применение плана найдёт ключи уже записанными
+    for key, known in newKeys.items():
+        for lang in resourcesData.keys():
+            addResources(known['value'], key, lang)
+    if len(newKeys):
+        saveResources()
+    for path, (text, spans) in texts.items():
+        writeFileAtomic(path, [applyEdits(text, spans)])
+        invalidateScanCache(path)
+    saveScanCache()
+    timestr = datetime.now().strftime('%H:%M:%S')
+    print(Fore.GREEN+timestr+': План применён: файлов '+str(len(texts))+', замен ' +
+          str(sum(len(spans) for text, spans in texts.values()))+', новых ключей '+str(len(newKeys)), end='\n')
+    return 0
+
+
+def findKeyUsages(path: str) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int, str]]]:
+    """Вызовы t('ключ', ...) в файле. Ключ строкой в кавычках или шаблонной строкой без ${...} - статический;
+    всё остальное (переменная, сложение строк, шаблонная строка с ${...}) - динамический ключ,
+    для него запоминаем начало ключа до первой переменной ('mbo.status.' + status -> 'mbo.status.')
+
+    Args:
+        path (str): путь до файла
+
+    Returns:
+        Tuple[List[Tuple[str, int]], List[Tuple[str, int, str]]]: статические ключи [(ключ, строка)]
+            и динамические [(начало ключа, строка, текст строки файла)], строки - с нуля
+    """
+    keys = []
+    dynamic = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            f.close()
+            return keys, dynamic
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data.find(b't(') == -1:
+                f.close()
+                return keys, dynamic
+            text = io.TextIOWrapper(io.BytesIO(data[:]), encoding='utf-8').read()
+        f.close()
+    lineStarts = [0]+[m.end() for m in newlineRegex.finditer(text)]
+    for m in tCallRegex.finditer(text):
+        numLine = bisect.bisect_right(lineStarts, m.start())-1
+        key = m.group('key') if m.group('quote') != None else m.group('template')
+        if key != None and m.group('expression') == None and m.group('next') in (',', ')'):
+            keys.append((key, numLine))
+        else:
+            nextLine = lineStarts[numLine+1] if numLine+1 < len(lineStarts) else len(text)
+            dynamic.append((key or '', numLine, text[lineStarts[numLine]:nextLine].strip()))
+    return keys, dynamic
+
+
+def isKeyInPrefix(key: str, prefix: str) -> bool:
+    """Покрывает ли начало динамического ключа ключ: совпадать должны целые части ключа
+    ('mbo.arr' покрывает mbo.arr и mbo.arr.x, но не mbo.arrow)
+
+    Args:
+        key (str): ключ
+        prefix (str): начало динамического ключа
+
+    Returns:
+        bool: True если ключ может получиться из динамического ключа
+    """
+    return key.startswith(prefix) and (prefix.endswith('.') or len(key) == len(prefix) or key[len(prefix)] == '.')
+
+
+@timed('usageDir')
+def usageDir(pathModule: str, prune: bool = False, roots: List[str] = None) -> int:
+    """Индекс использования ключей перевода: вызовы t('ключ') по всему каталогу и другим каталогам исходного кода,
+    которые пользуются тем же файлом перевода (обход тот же, что у scanDir).
+    Выводит неиспользуемые ключи модуля (MODULE_NAME), используемые, но отсутствующие в файле перевода,
+    и динамические ключи. Ключи, которые начинаются с начала динамического ключа, считаются используемыми.
+    При prune неиспользуемые ключи удаляются из всех языков: из текста файла перевода вырезаются только их строки.
+    Удалять можно только с явно перечисленными каталогами: ключи модуля могут использоваться и вне PATH_MODULE
+
+    Args:
+        pathModule (str): путь до каталога
+        prune (bool, optional): удалить неиспользуемые ключи. Defaults to False.
+        roots (List[str], optional): остальные каталоги исходного кода, где используется файл перевода. Defaults to None.
+
+    Raises:
+        ValueError: вызываем если prune без списка каталогов или каталога нет
+
+    Returns:
+        int: количество проблем (отсутствующие ключи, а без prune - ещё и неиспользуемые)
+    """
+    if prune and roots == None:
+        raise ValueError('для удаления ключей перечислите все каталоги исходного кода, где используется файл перевода')
+    roots = [pathModule]+[root for root in roots or [] if os.path.abspath(root) != os.path.abspath(pathModule)]
+    for root in roots:
+        if not os.path.isdir(root):
+            raise ValueError('нет каталога '+root)
+    timestr = datetime.now().strftime('%H:%M:%S')
+    print(Fore.GREEN+timestr+': Ищем вызовы t(...) в каталогах: '+', '.join(roots), end='\n')
+    used = {}  # ключ -> [(путь до файла, строка)]
+    dynamic = []  # [(начало ключа, путь до файла, строка, текст строки)]
+    with ThreadPoolExecutor(max_workers=walkWorkers, thread_name_prefix='usage') as executor:
+        paths = {}  # абсолютный путь -> путь до файла: вложенные каталоги не обходим дважды
+        for root in roots:
+            for path, stat in walkDir(root):
+                paths.setdefault(os.path.abspath(path), path)
+        futures = [(path, executor.submit(findKeyUsages, path)) for path in paths.values()]
+        for path, future in futures:
+            keys, calls = future.result()
+            for key, numLine in keys:
+                used.setdefault(key, []).append((path, numLine))
+            for prefix, numLine, textLine in calls:
+                dynamic.append((prefix, path, numLine, textLine))
+    prefixes = sorted({prefix for prefix, path, numLine, textLine in dynamic if prefix != ''})
+    missing = [key for key in used if getResourceText(key) == None and not any(isKeyInPrefix(key, x) for x in prefixes)]
+    loadNamespace(moduleName)
+    unused = [key for key in getKeysByPrefix(moduleName+'.') if keyIndex['types'][key] == 'leaf' and key not in used
+              and not any(isKeyInPrefix(key, prefix) for prefix in prefixes)]
+
+    print(Fore.YELLOW+'Используется ключей: '+str(len(used))+', динамических вызовов: '+str(len(dynamic)), end='\n')
+    if len(missing):
+        print(Fore.RED+'Нет в файле перевода ('+str(len(missing))+'):', end='\n')
+        for key in sorted(missing):
+            print(Fore.RED+'  '+key+' - '+', '.join(path+':'+str(numLine+1) for path, numLine in used[key][:3]) +
+                  (' ...' if len(used[key]) > 3 else ''), end='\n')
+    if len(dynamic):
+        print(Fore.MAGENTA+'Динамические ключи ('+str(len(dynamic))+'):', end='\n')
+        for prefix, path, numLine, textLine in dynamic:
+            print('  '+path+':'+str(numLine+1)+': '+textLine+(' (начало ключа: '+prefix+')' if prefix != '' else ''), end='\n')
+        if len(dynamic) > len([x for x in dynamic if x[0] != '']):
+            print(Fore.MAGENTA+'Для вызовов без начала ключа использование проверить нельзя - '
+                  'проверьте их вручную перед удалением ключей', end='\n')
+    if len(unused):
+        print(Fore.YELLOW+'Не используются ('+str(len(unused))+'):', end='\n')
+        for key in unused:
+            print(Fore.YELLOW+'  '+key, end='\n')
+    if prune and len(unused):
+        for key in unused:
+            removeResources(key)
+        saveResources()
+        buildKeyIndex()
+        timestr = datetime.now().strftime('%H:%M:%S')
+        print(Fore.GREEN+timestr+': Удалено ключей: '+str(len(unused)), end='\n')
+        return len(missing)
+    return len(missing)+len(unused)
+
+
+def tokenizeResources(text: str) -> Iterator[Tuple[str, str, int, int]]:
+    """Потоковый разбор текста файла перевода на лексемы (пробелы и комментарии пропускаются)
+
+    Args:
+        text (str): текст файла перевода
+
+    Raises:
+        ValueError: вызываем если встретился неизвестный символ
+
+    Returns:
+        Iterator[Tuple[str, str, int, int]]: лексемы (тип, текст, начало, конец)
+    """
+    position = 0
+    while position < len(text):
+        match = resourcesTokenRegex.match(text, position)
+        if not match:
+            raise ValueError('Ошибка разбора файла перевода в строке '+str(text.count('\n', 0, position)+1))
+        if match.lastgroup != 'space' and match.lastgroup != 'comment':
+            yield match.lastgroup, match.group(0), match.start(), match.end()
+        position = match.end()
+
+
+def getPlainText(text: str) -> str:
+    """Текст строки JavaScript (без кавычек) -> обычный текст: экранирование раскрывается
+
+    Args:
+        text (str): текст строки с экранированием
+
+    Returns:
+        str: текст
+    """
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] in 'ux' and len(escape) > 1:
+            return chr(int(escape.strip('u{}x'), 16))
+        return jsEscapes.get(escape, escape)
+    return re.sub(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)', replace, text, flags=re.DOTALL)
+
+
+def getSourceText(textExclusion: str, pattern: Optional[str]) -> str:
+    """Найденная в исходном коде строка -> значение для дерева resourcesData: в строках JavaScript
+    экранирование раскрывается, текст JSX берётся как есть
+
+    Args:
+        textExclusion (str): текст найденной строки
+        pattern (Optional[str]): шаблон, по которому она найдена
 
+    Returns:
+        str: значение
+    """
+    return textExclusion if pattern == '><' else getPlainText(textExclusion)
 
-def markNoTranslite(file: os.DirEntry, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
-    """Отмечаем строку как не переведенной
+
+def getStringBody(string: str) -> str:
+    """Строка JavaScript в любых кавычках -> её текст (экранирование раскрыто, как в дереве resourcesData)
 
     Args:
-        file (os.DirEntry): файл, который парсим (его будем изменять)
-        lines (List[str]): все строки в файле
-        numLine (int): номер строки в файле, который парсим
-        textExclusion (str): текст в строке который был ранее распарсен
-        textReplace (str): регулярное выражение для замены
+        string (str): строка вместе с кавычками
+
+    Returns:
+        str: текст строки
     """
-    replaceLine = re.sub(
-        r'(.*)\n$', r'\1 // НЕ ПЕРЕВЕДЕННО !!!\n', lines[numLine], flags=re.IGNORECASE)
-    print('', end='\n')
-    print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
-    if (numLine-3) >= 0:
-        print(str(numLine-2)+': '+lines[numLine-3], end='')
-    if (numLine-2) >= 0:
-        print(str(numLine-1)+': '+lines[numLine-2], end='')
-    if (numLine-1) >= 0:
-        print(str(numLine-0)+': '+lines[numLine-1], end='')
-    print(Fore.GREEN+str(numLine+1)+': '+replaceLine, end='')
-    if (numLine+1) <= (len(lines)-1):
-        print(str(numLine+2)+': '+lines[numLine+1], end='')
-    if (numLine+2) <= (len(lines)-1):
-        print(str(numLine+3)+': '+lines[numLine+2], end='')
-    if (numLine+3) <= (len(lines)-1):
-        print(str(numLine+4)+': '+lines[numLine+3], end='')
-    print('', end='\n\n')
-    save = input('Сохраняем? (y/n): ')
-    if (save == 'Y' or save == 'y'):
-        with open(file, 'w', encoding='utf-8') as f:
-            lines[numLine] = replaceLine
-            f.writelines(lines)
-            f.close()
-            timestr = datetime.now().strftime('%H:%M:%S')
-            print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
+    return getPlainText(string[1:-1])
+
+
+def parseResources(text: str) -> Tuple[dict, dict]:
+    """Парсим текст файла перевода за один проход по лексемам
+
+    Args:
+        text (str): текст файла перевода
+
+    Raises:
+        ValueError: вызываем если текст не является объектом JavaScript
+
+    Returns:
+        Tuple[dict, dict]: дерево ключей и карта структуры файла { text, branches, leaves, spans }
+    """
+    layout = {'text': text, 'branches': {}, 'leaves': set(), 'spans': {}}
+    tokens = tokenizeResources(text)
+    state = {'token': next(tokens, None), 'end': 0}
+
+    def take(value: str = None) -> Tuple[str, str, int, int]:
+        token = state['token']
+        if token == None or (value != None and token[1] != value):
+            position = len(text) if token == None else token[2]
+            raise ValueError('Ошибка разбора файла перевода в строке '+str(text.count('\n', 0, position)+1) +
+                             ': ожидается '+(value if value != None else 'значение'))
+        state['token'] = next(tokens, None)
+        state['end'] = token[3]
+        return token
+
+    def getIndent(position: int) -> Optional[str]:
+        # отступ строки, если до позиции в строке только пробелы
+        lineStart = text.rfind('\n', 0, position)+1
+        return text[lineStart:position] if text[lineStart:position].strip() == '' else None
+
+    def parseValue(path: tuple) -> Union[dict, str]:
+        token = state['token']
+        if token != None and token[1] == '{':
+            return parseObject(path)
+        if token != None and token[1] == '[':
+            # массив сохраняем как есть
+            start = take()[2]
+            depth = 1
+            while depth:
+                token = take()
+                depth += 1 if token[1] == '[' else -1 if token[1] == ']' else 0
+            return text[start:token[3]]
+        if token != None and token[0] == 'string':
+            value = getStringBody(take()[1])
+            while state['token'] != None and state['token'][1] == '+':
+                take()
+                token = take()
+                if token[0] != 'string':
+                    raise ValueError('Ошибка разбора файла перевода в строке '+str(text.count('\n', 0, token[2])+1) +
+                                     ': ожидается строка')
+                value += getStringBody(token[1])
+            return value
+        return take()[1]
+
+    def parseObject(path: tuple) -> dict:
+        start = take('{')[2]
+        structure = {}
+        branch = {'close': None, 'last': None, 'indent': None}
+        layout['branches'][path] = branch
+        while state['token'] != None and state['token'][1] != '}':
+            token = take()
+            key = getStringBody(token[1]) if token[0] == 'string' else token[1]
+            if branch['indent'] == None:
+                branch['indent'] = getIndent(token[2])
+            take(':')
+            structure[key] = parseValue(path+(key,))
+            layout['spans'][path+(key,)] = (token[2], state['end'])
+            if isinstance(structure[key], str):
+                layout['leaves'].add(path+(key,))
+            if state['token'] != None and state['token'][1] == ',':
+                take()
+            elif state['token'] == None or state['token'][1] != '}':
+                take('}')
+            branch['last'] = state['end']
+        end = take('}')[2]
+        # вставлять новые ключи можно только если закрывающая скобка на отдельной строке
+        if getIndent(end) != None:
+            branch['close'] = text.rfind('\n', 0, end)+1
+        if branch['indent'] == None:
+            lineStart = text.rfind('\n', 0, start)+1
+            branch['indent'] = re.match('[ \t]*', text[lineStart:start]).group(0)+'    '
+        return structure
+
+    # пропускаем всё до объекта: const resources = {
+    while state['token'] != None and state['token'][1] != '{':
+        take()
+    tree = parseObject(())
+    return tree, layout
+
+
+@timed('loadResources')
+def loadResources() -> None:
+    """Читаем файл (.env: PATH_RESOURCES) перевода, парсим его, и на его основе создаем словарь.
+    Результат разбора сохраняется в снимок (.env: RESOURCES_SNAPSHOT): пока файл не изменился,
+    при следующих запусках дерево берётся из снимка без разбора.
+    Если перевод уже записан раздельно (.env: RESOURCES_OUTPUT), читается он (loadSplitResources),
+    а если ещё нет - файл PATH_RESOURCES сразу раскладывается по файлам пространств имён
+    """
+    if resourcesOutput != 'file' and os.path.isfile(os.path.join(pathResourcesSplit, 'index.js')):
+        loadSplitResources()
+        return
+    with open(pathResources, 'rb') as f:
+        data = f.read()
+        f.close()
+    stat = os.stat(pathResources)
+    contentHash = hashlib.sha1(data).hexdigest()
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').read()
+    snapshot = None
+    if pathResourcesSnapshot != '' and os.path.isfile(pathResourcesSnapshot):
+        try:
+            with open(pathResourcesSnapshot, 'rb') as f:
+                snapshot = pickle.load(f)
+                f.close()
+        except Exception:
+            snapshot = None
+    if snapshot != None and snapshot['version'] == resourcesSnapshotVersion and snapshot['hash'] == contentHash \
+            and snapshot['mtime'] == stat.st_mtime_ns and snapshot['size'] == stat.st_size \
+            and snapshot.get('compact', False) == resourcesCompact:
+        tree, layout = snapshot['tree'], snapshot['layout']
+        layout['text'] = text
     else:
-        repeat = input(
-            'Перейти снова к выбору действий для данной строки? (y/n): ')
-        if (repeat == 'Y' or repeat == 'y'):
-            selectAction(file, lines, numLine,
-                         textExclusion, textReplace)
-        else:
-            print('', end='\n\n')
+        tree, layout = parseResources(text)
+        if resourcesCompact:
+            tree = compactResources(tree)
+        snapshot = None
+    resourcesData.clear()
+    resourcesData.update(tree)
+    resourcesLayout.update(layout)
+    resourcesLayout['mtime'] = stat.st_mtime_ns
+    resourcesLayout['size'] = stat.st_size
+    buildKeyIndex()
+    if snapshot == None:
+        saveResourcesSnapshot(contentHash)
+    if resourcesOutput != 'file':
+        resourcesSplit['full'] = True
+        saveSplitResources()
+        print(Fore.GREEN+'Файл перевода разложен по пространствам имён: '+pathResourcesSplit, end='\n')
 
 
-def selectKeyTranslite(file: os.DirEntry, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
-    """Указываем существующий перивод
+def saveResourcesSnapshot(contentHash: str = None) -> None:
+    """Сохраняем снимок разобранного файла перевода (.env: RESOURCES_SNAPSHOT), если дерево
+    resourcesData совпадает с файлом (всё записано и файл не изменён не нами)
 
     Args:
-        file (os.DirEntry): файл, который парсим (его будем изменять)
-        lines (List[str]): все строки в файле
-        numLine (int): номер строки в файле, который парсим
-        textExclusion (str): текст в строке который был ранее распарсен
-        textReplace (str): регулярное выражение для замены
+        contentHash (str, optional): хеш содержимого файла перевода, если уже посчитан. Defaults to None.
     """
-    print('', end='\n')
-    print('Чем заменить строку "'+textExclusion+'"? ')
-    print('Выберите опцию:')
-    print('1 - использовать существующий ключ;')
-    print('2 - использовать выражение типа: t(\'' +
-          moduleName+'.ключ\', { ... }):')
-    print('3 - вернутся назад;')
-    select = input(': ')
-    try:
-        replaceText = None
-        if select == '1':
-            replaceText = input('Укажите ключ: ')
-            replaceText = 't(\''+replaceText+'\')'
-        elif select == '2':
-            replaceText = input(
-                'Укажите ключ, типа: t(\''+moduleName+'.ключ\', { ... }): ')
-        elif select == '3':
-            selectAction(file, lines, numLine,
-                         textExclusion, textReplace)
-        else:
-            raise NoSelect
-        if replaceText != None:
-            replaceTextY = '{'+replaceText+'}'
-            replaceTextN = replaceText
-            print('', end='\n')
-            print('Добавить фигурные скобки?', end='\n')
-            print('', end='\n')
-            print('Если да (y):', end='\n')
-            print(str(numLine+1)+': ' +
-                  lines[numLine].replace(textReplace, replaceTextY, 1))
-            print('', end='\n')
-            print('Если нет (n):', end='\n')
-            print(str(numLine+1)+': ' +
-                  lines[numLine].replace(textReplace, replaceTextN, 1))
-            print('', end='\n')
-            addCurlyBraces = input('(y/n): ')
-            if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
-                replaceText = replaceTextY
-            else:
-                replaceText = replaceTextN
-            replaceLine = lines[numLine].replace(textReplace, replaceText, 1)
-            print('', end='\n')
-            print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
-            if (numLine-3) >= 0:
-                print(str(numLine-2)+': '+lines[numLine-3], end='')
-            if (numLine-2) >= 0:
-                print(str(numLine-1)+': '+lines[numLine-2], end='')
-            if (numLine-1) >= 0:
-                print(str(numLine-0)+': '+lines[numLine-1], end='')
-            print(Fore.GREEN+str(numLine+1)+': '+replaceLine, end='')
-            if (numLine+1) <= (len(lines)-1):
-                print(str(numLine+2)+': '+lines[numLine+1], end='')
-            if (numLine+2) <= (len(lines)-1):
-                print(str(numLine+3)+': '+lines[numLine+2], end='')
-            if (numLine+3) <= (len(lines)-1):
-                print(str(numLine+4)+': '+lines[numLine+3], end='')
-            print('', end='\n\n')
-            save = input('Сохраняем? (y/n): ')
-            if (save == 'Y' or save == 'y'):
-                with open(file, 'w', encoding='utf-8') as f:
-                    lines[numLine] = replaceLine
-                    f.writelines(lines)
-                    f.close()
-                    timestr = datetime.now().strftime('%H:%M:%S')
-                    print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
-            else:
-                repeat = input(
-                    'Перейти снова к выбору действий для данной строки? (y/n): ')
-                if (repeat == 'Y' or repeat == 'y'):
-                    selectAction(file, lines, numLine,
-                                 textExclusion, textReplace)
-                else:
-                    print('', end='\n\n')
-    except NoSelect:
-        selectKeyTranslite(file, lines, numLine, textExclusion, textReplace)
+    if pathResourcesSnapshot == '' or resourcesOutput != 'file' or len(pendingResources) or not os.path.isfile(pathResources):
+        return
+    stat = os.stat(pathResources)
+    if stat.st_mtime_ns != resourcesLayout['mtime'] or stat.st_size != resourcesLayout['size']:
+        return
+    if contentHash == None:
+        with open(pathResources, 'rb') as f:
+            contentHash = hashlib.sha1(f.read()).hexdigest()
+            f.close()
+    with open(pathResourcesSnapshot+'.tmp', 'wb') as f:
+        pickle.dump({
+            'version': resourcesSnapshotVersion,
+            'hash': contentHash,
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'tree': resourcesData,
+            'compact': resourcesCompact,
+            'layout': dict(resourcesLayout, text=None),
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.close()
+    os.replace(pathResourcesSnapshot+'.tmp', pathResourcesSnapshot)
 
 
-def setOption(file: os.DirEntry, lines: List[str], numLine: int, option: dict, textExclusion: str, textReplace: str) -> None:
-    """Устанавливаем выбранный существующий перивод
+def loadKeyNamespace(textKey: str) -> None:
+    """Загрузка пространства имён ключа (первая часть ключа) и значений верхнего уровня,
+    если перевод записан раздельно (.env: RESOURCES_OUTPUT)
 
     Args:
-        file (os.DirEntry): файл, который парсим (его будем изменять)
-        lines (List[str]): все строки в файле
-        numLine (int): номер строки в файле, который парсим
-        option (dict): выбранный существующий перевод
-        textExclusion (str): текст в строке который был ранее распарсен
-        textReplace (str): регулярное выражение для замены
+        textKey (str): ключ
     """
-    try:
-        varText = getVarText(checkVar(option['value']))
-        replaceTextY = '{t(\''+option['key']+'\'' + \
-            ('' if varText == '' else ', { '+varText+' }')+')}'
-        replaceTextN = 't(\''+option['key']+'\'' + \
-            ('' if varText == '' else ', { '+varText+' }')+')'
-        print('', end='\n')
-        print('Добавить фигурные скобки?', end='\n')
-        print('', end='\n')
-        print('Если да (y):', end='\n')
-        print(str(numLine+1)+': ' +
-              lines[numLine].replace(textReplace, replaceTextY, 1))
-        print('', end='\n')
-        print('Если нет (n):', end='\n')
-        print(str(numLine+1)+': ' +
-              lines[numLine].replace(textReplace, replaceTextN, 1))
-        print('', end='\n')
-        addCurlyBraces = input('(y/n): ')
-        if (addCurlyBraces == 'Y' or addCurlyBraces == 'y'):
-            replaceText = replaceTextY
-        else:
-            replaceText = replaceTextN
-        replaceLine = lines[numLine].replace(textReplace, replaceText, 1)
-        print('', end='\n')
-        print(Fore.MAGENTA+'Новая строка ('+str(numLine+1)+'):', end='\n')
-        if (numLine-3) >= 0:
-            print(str(numLine-2)+': '+lines[numLine-3], end='')
-        if (numLine-2) >= 0:
-            print(str(numLine-1)+': '+lines[numLine-2], end='')
-        if (numLine-1) >= 0:
-            print(str(numLine-0)+': '+lines[numLine-1], end='')
-        print(Fore.GREEN+str(numLine+1)+': '+replaceLine, end='')
-        if (numLine+1) <= (len(lines)-1):
-            print(str(numLine+2)+': '+lines[numLine+1], end='')
-        if (numLine+2) <= (len(lines)-1):
-            print(str(numLine+3)+': '+lines[numLine+2], end='')
-        if (numLine+3) <= (len(lines)-1):
-            print(str(numLine+4)+': '+lines[numLine+3], end='')
-        print('', end='\n\n')
-        save = input('Сохраняем? (y/n): ')
-        if (save == 'Y' or save == 'y'):
-            with open(file, 'w', encoding='utf-8') as f:
-                lines[numLine] = replaceLine
-                f.writelines(lines)
-                f.close()
-                saveResources()
-                timestr = datetime.now().strftime('%H:%M:%S')
-                print(Fore.GREEN+timestr+' Сохранено!', end='\n\n')
-        else:
-            repeat = input(
-                'Перейти снова к выбору действий для данной строки? (y/n): ')
-            if (repeat == 'Y' or repeat == 'y'):
-                selectAction(file, lines, numLine, textExclusion, textReplace)
-            else:
-                print('', end='\n\n')
-    except Exception:
-        print(Fore.RED+'Хм, какая-то не предвиденная ошибка =/ ... попробуйте выбрать перевод ещё раз', end='\n')
-        selectAction(file, lines, numLine, textExclusion, textReplace)
+    if resourcesOutput == 'file':
+        return
+    loadNamespace(rootNamespace)
+    loadNamespace(textKey.split('.')[0])
 
 
-def selectAction(file: os.DirEntry, lines: List[str], numLine: int, textExclusion: str, textReplace: str) -> None:
-    """Выбор действия по найденой строке
+def isKeyLoaded(textKey: str) -> bool:
+    """Загружено ли пространство имён ключа (и значения верхнего уровня): проверка без загрузки,
+    для фоновых потоков, которые не должны менять дерево resourcesData
 
     Args:
-        file (os.DirEntry): файл, который парсим (его будем изменять)
-        lines (List[str]): все строки в файле
-        numLine (int): номер строки в файле, который парсим
-        textExclusion (str): текст в строке который был ранее распарсен
-        textReplace (str): регулярное выражение для замены
+        textKey (str): ключ
+
+    Returns:
+        bool: True если значение ключа можно взять из дерева без загрузки
     """
-    print('Выберите опцию:')
-    print('1 - игнорировать;')
-    print('2 - перевести;')
-    print('3 - отметить как непереведенное;')
-    print('4 - использовать существующий перевод;', end='\n')
+    if resourcesOutput == 'file':
+        return True
+    return rootNamespace in resourcesSplit['loaded'] and textKey.split('.')[0] in resourcesSplit['loaded']
 
-    textExclusionOnlyCyrillic = re.sub('[^а-яА-Я\s]', '', textExclusion)
-    textExclusionOnlyCyrillicNoSpace = re.sub('[^а-яА-Я]', '', textExclusion)
-    optionsKey = []
-    keyList = []
 
-    def searchOptionsKey(resourcesData: dict) -> None:
-        """Поиск существующего перевода
+def loadNamespace(namespace: str) -> None:
+    """Загрузка пространства имён из раздельного перевода во всех языках: значения добавляются
+    в дерево resourcesData, индекс ключей и (если он уже построен) индекс поиска.
+    Загрузка идёт под searchLock, и пространство имён считается загруженным только после неё
 
-        Args:
-            resourcesData (dict): словарь перевода, который ранее мы создали из файла перевода (.env: PATH_RESOURCES)
-        """
-        for key in resourcesData.keys():
-            if len(optionsKey) >= 296: break
-            if key != 'translation': keyList.append(key)
-            if not isinstance(resourcesData[key], str):
-                searchOptionsKey(resourcesData[key])
+    Args:
+        namespace (str): пространство имён (ключ верхнего уровня)
+    """
+    if resourcesOutput == 'file' or namespace in resourcesSplit['loaded']:
+        return
+    with searchLock:
+        if namespace in resourcesSplit['loaded']:
+            return
+        leaves = []
+
+        def collect(structure: Mapping, listKey: List[str]):
+            for key in structure.keys():
+                if isinstance(structure[key], str):
+                    leaves.append((listKey+[key], structure[key]))
+                else:
+                    collect(structure[key], listKey+[key])
+        for (lang, fileNamespace), path in resourcesSplit['files'].items():
+            if fileNamespace != namespace:
+                continue
+            content = readSplitFile(path)
+            structure = resourcesData.setdefault(lang, {}).setdefault('translation', {})
+            if namespace == rootNamespace:
+                structure.update(content)
             else:
-                def add():
-                    optionsKey.append({
-                        'key': '.'.join(keyList),
-                        'value': resourcesData[key],
-                    })
-                if len(textExclusionOnlyCyrillicNoSpace) > len(resourcesData[key]):
-                    if (len(keyList)): keyList.pop()
-                    continue
-                elif len(textExclusionOnlyCyrillicNoSpace)+3 < len(re.sub('[^а-яА-Я]', '', resourcesData[key])):
-                    if (len(keyList)): keyList.pop()
-                    continue
-                elif textExclusion.lower() in resourcesData[key].lower():
-                    add()
-                elif textExclusionOnlyCyrillic.lower() in resourcesData[key].lower():
-                    add()
-                elif textExclusionOnlyCyrillicNoSpace.lower() in resourcesData[key].lower():
-                    add()
-                elif textExclusion.lower() in re.sub('[^а-яА-Я\s]', '', resourcesData[key]).lower():
-                    add()
-                elif textExclusionOnlyCyrillic.lower() in re.sub('[^а-яА-Я\s]', '', resourcesData[key]).lower():
-                    add()
-                elif textExclusionOnlyCyrillicNoSpace.lower() in re.sub('[^а-яА-Я\s]', '', resourcesData[key]).lower():
-                    add()
-            if (len(keyList)): keyList.pop()
-    searchOptionsKey(resourcesData['ru'])
+                structure[namespace] = content
+            if lang == 'ru':
+                collect(content, [] if namespace == rootNamespace else [namespace])
+        if len(leaves):
+            # индекс ключей заменяется целиком: читающие его без блокировки видят старый или новый
+            types = dict(keyIndex['types'])
+            for listKey, value in leaves:
+                for i in range(1, len(listKey)):
+                    types['.'.join(listKey[:i])] = 'branch'
+                types['.'.join(listKey)] = 'leaf'
+            keyIndex['types'] = types
+            keyIndex['sorted'] = sorted(types)
+            if len(searchIndex['orders']):
+                for listKey, value in leaves:
+                    indexResource(['translation']+listKey, value)
+        resourcesSplit['loaded'].add(namespace)
 
-    optionNum = 4
-    if len(optionsKey):
-        print('', end='\n')
-        print('Найдены существующие варианты переводов (выберите опцию):', end='\n')
-        for option in optionsKey:
-            optionNum += 1
-            print(str(optionNum) + ' - "' +
-                  option['value'] + '" (ключ: "' + option['key'] + '");')
 
-    select = input(': ')
-    if select == '': 
-        select = '1'
-    if select == '1':
-        print(Fore.MAGENTA+' ... игнорировано', end='\n')
-    elif select == '2':
-        print(Fore.MAGENTA+' ... переводим:', end='\n')
-        print(Fore.MAGENTA +
-              'В переводе можно указать переменные, например: {{yourVarName}}', end='\n')
-        translite(file, lines, numLine, textExclusion, textReplace)
-    elif select == '3':
-        print(Fore.MAGENTA+' ... отмечено как не переведенно', end='\n')
-        markNoTranslite(file, lines, numLine, textExclusion, textReplace)
-    elif select == '4':
-        print(Fore.MAGENTA+' ... используем существующий перевод', end='\n')
-        selectKeyTranslite(file, lines, numLine, textExclusion, textReplace)
-    elif optionNum > 4 and (int(select) > 4 and int(select) <= optionNum):
-        print(Fore.MAGENTA+' ... используем выбранный существующий перевод', end='\n')
-        setOption(file, lines, numLine, optionsKey[int(
-            select)-5], textExclusion, textReplace)
+def toJsonValue(structure: Union[Mapping, str]) -> Union[dict, list, str]:
+    """Объект дерева перевода -> объект JSON: массивы (в дереве - текст JavaScript) становятся списками
 
+    Args:
+        structure (Union[Mapping, str]): объект или значение
 
-def parseFile(file: os.DirEntry) -> None:
-    """Парсер файла
+    Returns:
+        Union[dict, list, str]: объект JSON
+    """
+    if isinstance(structure, Mapping):
+        return {key: toJsonValue(structure[key]) for key in structure}
+    if structure.find('[', 0, 1) == -1:
+        return structure
+    items = []
+    for kind, token, start, end in tokenizeResources(structure):
+        if kind == 'string':
+            items.append(getStringBody(token))
+        elif kind == 'number':
+            items.append(json.loads(token))
+        elif kind == 'name':
+            items.append(token)
+    return items
+
+
+def fromJsonValue(value: Union[dict, list, str, int, float]) -> Union[dict, str]:
+    """Объект JSON -> объект дерева перевода (обратное toJsonValue)
 
     Args:
-        file (os.DirEntry): файл
+        value (Union[dict, list, str, int, float]): объект JSON
+
+    Returns:
+        Union[dict, str]: объект или значение
     """
-    timestr = datetime.now().strftime('%H:%M:%S')
-    print(Fore.YELLOW+timestr+': Начинаем читать файл: '+file.name)
-    with open(file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    if isinstance(value, dict):
+        return {key: fromJsonValue(value[key]) for key in value}
+    if isinstance(value, list):
+        return '['+', '.join(getResourceValue(fromJsonValue(item)) if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+                             for item in value)+']'
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def readSplitFile(path: str) -> dict:
+    """Читаем файл пространства имён раздельного перевода: JSON или модуль с export default { ... }
+
+    Args:
+        path (str): путь до файла
+
+    Returns:
+        dict: объект дерева перевода
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
         f.close()
-        numLine = -1
-        for line in lines:
-            numLine += 1
-            # если комментарий выходим...
-            if (re.search('^[\s\t]*\/\/', line, flags=re.IGNORECASE)):
-                continue
-            # если комментарий выходим...
-            if (re.search('^[\s\t]*\/\*', line, flags=re.IGNORECASE)):
-                continue
-            # если комментарий выходим...
-            if (re.search('^[\s\t]*\*', line, flags=re.IGNORECASE)):
-                continue
-            # если комментарий, который сделан в процессе работы этого скрипта - выходим...
-            if (re.search('//\sНЕ\sПЕРЕВЕДЕННО\s!!!', line, flags=re.IGNORECASE)):
-                continue
+    if path.endswith('.json'):
+        return fromJsonValue(json.loads(text))
+    return parseResources(text)[0]
 
-            if (re.search('[а-я]+', line, flags=re.IGNORECASE)):  # если кириллица
-                listRegex = [
-                    {
-                        'searchRegexInclusion': '(`[^`]*[а-я]+[^`]*`)',
-                        'searchRegexExclusion': r'(?:`)+([^`]*[а-я]+[^`]*)(?:`)+',
-                        'comment': 'Обнаружено полное соответствие шаблону (`) в строке ('+str(numLine+1)+'):',
-                        'inclusion': True,
-                    },
-                    {
-                        'searchRegexInclusion': '(\'[^\']*[а-я]+[^\']*\')',
-                        'searchRegexExclusion': r'(?:\')+([^\']*[а-я]+[^\']*)(?:\')+',
-                        'comment': 'Обнаружено полное соответствие шаблону (\') в строке ('+str(numLine+1)+'):',
-                        'inclusion': True,
-                    },
-                    {
-                        'searchRegexInclusion': '("[^"]*[а-я]+[^"]*")',
-                        'searchRegexExclusion': r'(?:")+([^"]*[а-я]+[^"]*)(?:")+',
-                        'comment': 'Обнаружено полное соответствие шаблону (") в строке ('+str(numLine+1)+'):',
-                        'inclusion': True,
-                    },
-                    {
-                        'searchRegexInclusion': '(>[^>]*[а-я]+[^<]*<)',
-                        'searchRegexExclusion': r'(?:>)+([^>]*[а-я]+[^<]*)(?:<)+',
-                        'comment': 'Обнаружено полное соответствие шаблону (><) в строке ('+str(numLine+1)+'):',
-                        'inclusion': False,
-                    },
-                ]
-                textInclusion = None
-                for regex in listRegex:
-                    if (re.search(regex['searchRegexInclusion'], line, flags=re.IGNORECASE)):
-                        print(
-                            '-----------------------------------------------------------', end='\n')
-                        print(Fore.MAGENTA+timestr+': '+regex['comment'])
-                        if (numLine-3) >= 0:
-                            print(str(numLine-2)+': '+lines[numLine-3], end='')
-                        if (numLine-2) >= 0:
-                            print(str(numLine-1)+': '+lines[numLine-2], end='')
-                        if (numLine-1) >= 0:
-                            print(str(numLine-0)+': '+lines[numLine-1], end='')
-                        print(Fore.GREEN+str(numLine+1)+': '+line,
-                              end='')  # <<< найденная строка тут
-                        if (numLine+1) <= (len(lines)-1):
-                            print(str(numLine+2)+': '+lines[numLine+1], end='')
-                        if (numLine+2) <= (len(lines)-1):
-                            print(str(numLine+3)+': '+lines[numLine+2], end='')
-                        if (numLine+3) <= (len(lines)-1):
-                            print(str(numLine+4)+': '+lines[numLine+3], end='')
-                        for textInclusion in re.findall(regex['searchRegexInclusion'], line, flags=re.IGNORECASE):
-                            textExclusion = re.sub(
-                                regex['searchRegexExclusion'], r'\1', textInclusion, flags=re.IGNORECASE)
-                            print('', end='\n')
-                            print(Fore.MAGENTA+'Найдено:')
-                            print(textExclusion, end='\n\n')
-                            textReplace = textInclusion if regex['inclusion'] == True else textExclusion
-                            selectAction(file, lines, numLine,
-                                         textExclusion, textReplace)
-
-                # если комментарий (после попытки обнаружения кириллицы по шаблонам в этой же строке) выходим...
-                if (re.search('(?:\/\/)+.*[а-я]+.*', line, flags=re.IGNORECASE)):
-                    continue
-                # если комментарий (после попытки обнаружения кириллицы по шаблонам в этой же строке) выходим...
-                elif (re.search('(?:\/\*)+.*[а-я]+.*', line, flags=re.IGNORECASE)):
-                    continue
-                else:
-                    if (textInclusion == None):
-                        print(
-                            Fore.RED+timestr+': Обнаружена кирилица без шаблона в строке ('+str(numLine)+'):', end='\n')
-                        print(line)
-        print('-----------------------------------------------------------', end='\n')
 
+def getSplitPath(lang: str, namespace: str) -> str:
+    """Путь до файла пространства имён раздельного перевода: <RESOURCES_SPLIT_DIR>/<язык>/<пространство имён>.json (.js)
+
+    Args:
+        lang (str): язык
+        namespace (str): пространство имён
+
+    Returns:
+        str: путь до файла
+    """
+    return os.path.join(pathResourcesSplit, lang, namespace+('.json' if resourcesOutput == 'json' else '.js'))
 
-def scanDir(pathModule: str) -> None:
-    """Сканирование каталога
+
+def getNamespaceContent(lang: str, namespace: str) -> Optional[dict]:
+    """Содержимое пространства имён в дереве resourcesData
 
     Args:
-        pathModule (str): путь до каталога
+        lang (str): язык
+        namespace (str): пространство имён
+
+    Returns:
+        Optional[dict]: объект, None - если пространства имён нет (или оно пустое)
     """
-    timestr = datetime.now().strftime('%H:%M:%S')
-    print(Fore.GREEN+timestr+': Начинаем сканировать каталог: '+pathModule)
-    for file in os.scandir(pathModule):
-        if file.is_dir():
-            print(Fore.GREEN+timestr+': Обнаружен каталог: '+file.path)
-            scanDir(file.path)
-        else:
-            if re.search('\.(:?js|ts|jsx|tsx)$', file.name, flags=re.IGNORECASE):
-                print(Fore.CYAN+timestr+': Обнаружен файл: '+file.name)
-                parseFile(file)
+    structure = resourcesData.get(lang, {}).get('translation', {})
+    if namespace == rootNamespace:
+        content = {key: value for key, value in structure.items() if isinstance(value, str)}
+        return content if len(content) else None
+    content = structure.get(namespace)
+    return content if isinstance(content, Mapping) and len(content) else None
 
 
-"""Читаем файл (.env: PATH_RESOURCES) перевода, парсим его, и на его основе создаем словарь
-"""
-with open(pathResources, 'r', encoding='utf-8') as f:
-    def changeResourcesData(keyList: list[str]) -> dict:
-        resourcesDataLink = resourcesData
-        for key in keyList:
-            if resourcesDataLink.get(key):
-                resourcesDataLink = resourcesDataLink[key]
-            else:
-                resourcesDataLink[key] = {}
-                resourcesDataLink = resourcesDataLink[key]
-        return resourcesDataLink
-    keyList = []
-    for line in f.readlines():
-        beginJsObject = re.search(
-            '^[\s\t]*([a-zA-Z]+)\:[\s]{0,1}\{[\s]*$', line, flags=re.IGNORECASE)
-        if beginJsObject:
-            keyList.append(beginJsObject.expand(r'\1'))
-            changeResourcesData(keyList)
-            continue
-        endJsObject = re.search(
-            '^[\s\t]*\}[,]*[\s]*$', line, flags=re.IGNORECASE)
-        if endJsObject:
-            keyList.pop()
-            changeResourcesData(keyList)
-            continue
-        propertyJsObject = re.search(
-            '^[\s\t]*([a-zA-Z0-9_]+)\:[\s]{0,1}[\'|"](.+)[\'|"][,]*[\s]*[\+]*[\s]*$', line, flags=re.IGNORECASE)
-        if propertyJsObject:
-            data = changeResourcesData(keyList)
-            data[propertyJsObject.expand(
-                r'\1')] = propertyJsObject.expand(r'\2')
+def saveSplitResources() -> None:
+    """Раздельная запись перевода (.env: RESOURCES_OUTPUT): каждое пространство имён каждого языка - отдельный
+    файл JSON в формате i18next (json) или модуль JavaScript (esm), плюс index.js с ленивыми загрузчиками.
+    Записываются только пространства имён с изменениями (pendingResources), опустевшие - удаляются
+    """
+    if resourcesSplit['full']:
+        changed = set(resourcesSplit['files'])
+        for lang in resourcesData.keys():
+            for key, value in resourcesData[lang].get('translation', {}).items():
+                changed.add((lang, rootNamespace if isinstance(value, str) else key))
+        resourcesSplit['loaded'].update(namespace for lang, namespace in changed)
+    else:
+        changed = {(listKey[0], listKey[2] if len(listKey) > 3 else rootNamespace) for listKey, value in pendingResources}
+    for lang, namespace in sorted(changed):
+        content = getNamespaceContent(lang, namespace)
+        path = getSplitPath(lang, namespace)
+        pathOld = resourcesSplit['files'].pop((lang, namespace), path)
+        if pathOld != path and os.path.isfile(pathOld):
+            os.remove(pathOld)
+        if content == None:
+            if os.path.isfile(path):
+                os.remove(path)
             continue
-        propertyJsObject = re.search(
-            '^[\s\t]*([a-zA-Z0-9_]+)\:[\s]{0,1}(\[.+\])[,]*[\s]*$', line, flags=re.IGNORECASE)
-        if propertyJsObject:
-            data = changeResourcesData(keyList)
-            data[propertyJsObject.expand(
-                r'\1')] = propertyJsObject.expand(r'\2')
+        if resourcesOutput == 'json':
+            text = json.dumps(toJsonValue(content), ensure_ascii=False, indent=4)+'\n'
+        else:
+            text = ''.join(getResourcesText(content, '    ', ['export default {\n']))+'};\n'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writeFileAtomic(path, [text])
+        resourcesSplit['files'][(lang, namespace)] = path
+    saveSplitIndex()
+    pendingResources.clear()
+    resourcesSplit['full'] = False
+
+
+def saveSplitIndex() -> None:
+    """Запись index.js раздельного перевода: списки языков и пространств имён, загрузчики через import()
+    и функция loadNamespace(язык, пространство имён) -> Promise с объектом перевода
+    (подходит, например, для i18next-resources-to-backend). Файл не перезаписывается, если не изменился
+    """
+    files = resourcesSplit['files']
+    langs = sorted({lang for lang, namespace in files})
+    namespaces = sorted({namespace for lang, namespace in files})
+    text = ['export const languages = ['+', '.join(getResourceValue(lang) for lang in langs)+'];\n',
+            'export const namespaces = ['+', '.join(getResourceValue(namespace) for namespace in namespaces)+'];\n',
+            '\n',
+            'export const loaders = {\n']
+    for lang in langs:
+        text.append('    '+getResourceKey(lang)+': {\n')
+        for namespace in namespaces:
+            if (lang, namespace) in files:
+                path = os.path.relpath(files[(lang, namespace)], pathResourcesSplit).replace(os.sep, '/')
+                text.append('        '+getResourceKey(namespace)+': () => import('+getResourceValue('./'+path)+'),\n')
+        text.append('    },\n')
+    text.append('};\n\
+\n\
+export default function loadNamespace(language, namespace) {\n\
+    const loader = loaders[language] && loaders[language][namespace];\n\
+    return loader ? loader().then((module) => module.default) : Promise.resolve({});\n\
+}\n')
+    text = ''.join(text)
+    pathIndex = os.path.join(pathResourcesSplit, 'index.js')
+    if os.path.isfile(pathIndex):
+        with open(pathIndex, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return
+    os.makedirs(pathResourcesSplit, exist_ok=True)
+    writeFileAtomic(pathIndex, [text])
+
+
+@timed('loadSplitResources')
+def loadSplitResources() -> None:
+    """Читаем раздельный перевод (.env: RESOURCES_SPLIT_DIR): сразу загружаются только пространства имён
+    из RESOURCES_NAMESPACES (по умолчанию - MODULE_NAME), остальные - при первом обращении к их ключам.
+    Файлы другого вида (после смены RESOURCES_OUTPUT) тоже читаются и заменяются при записи
+    """
+    extensions = ['.json', '.js'] if resourcesOutput == 'json' else ['.js', '.json']
+    files = {}
+    for lang in sorted(os.listdir(pathResourcesSplit)):
+        if not os.path.isdir(os.path.join(pathResourcesSplit, lang)):
             continue
+        for name in sorted(os.listdir(os.path.join(pathResourcesSplit, lang))):
+            namespace, ext = os.path.splitext(name)
+            if ext not in extensions or files.get((lang, namespace), '').endswith(extensions[0]):
+                continue
+            files[(lang, namespace)] = os.path.join(pathResourcesSplit, lang, name)
+    resourcesSplit['files'] = files
+    resourcesSplit['loaded'] = set()
+    resourcesSplit['full'] = False
+    tree = {lang: {'translation': {}} for lang, namespace in files}
+    if resourcesCompact:
+        tree = compactResources(tree)
+    resourcesData.clear()
+    resourcesData.update(tree)
+    keyIndex['types'] = {}
+    keyIndex['sorted'] = []
+    namespaces = {namespace for lang, namespace in files} if '*' in resourcesNamespaces else resourcesNamespaces
+    for namespace in [rootNamespace]+sorted(namespaces):
+        loadNamespace(namespace)
 
 
-scanDir(pathModule)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Поиск строк с кириллицей в каталоге PATH_MODULE (.env) и их перевод')
+    parser.add_argument('--diff', metavar='REF',
+                        help='проверять только строки, изменённые относительно git-ссылки REF (например, origin/master или HEAD)')
+    parser.add_argument('--report', choices=['jsonl', 'csv', 'sarif'],
+                        help='без вопросов записать найденные строки в отчёт; код выхода 1, если что-то найдено')
+    parser.add_argument('--output', metavar='FILE', help='файл отчёта (по умолчанию - стандартный вывод)')
+    parser.add_argument('--apply', metavar='PLAN', help='без вопросов применить решения из файла плана (JSONL)')
+    parser.add_argument('--watch', action='store_true',
+                        help='следить за каталогом и предлагать только новые строки в сохранённых файлах (Ctrl+C - выход)')
+    parser.add_argument('--usage', nargs='*', metavar='ROOT',
+                        help='без вопросов найти вызовы t(...) в PATH_MODULE и каталогах ROOT: неиспользуемые, отсутствующие '
+                        'и динамические ключи; код выхода 1, если есть отсутствующие или неиспользуемые ключи')
+    parser.add_argument('--prune', nargs='+', metavar='ROOT',
+                        help='как --usage, но неиспользуемые ключи удаляются из всех языков файла перевода; '
+                        'нужно перечислить все каталоги исходного кода, где используется файл перевода (можно PATH_MODULE)')
+    parser.add_argument('--memory-import', nargs='*', metavar='PATH',
+                        help='без вопросов записать переводы в память переводов (.env: TRANSLATION_MEMORY): файлы перевода '
+                        'и каталоги раздельного перевода, без путей - текущий перевод')
+    parser.add_argument('--group', choices=['text', 'pattern', 'context'],
+                        help='спрашивать один раз про одинаковые строки: с тем же текстом (text), ещё и с теми же кавычками '
+                        '(pattern) или ещё и в том же каталоге (context); решение применяется ко всем вхождениям')
+    args = parser.parse_args()
+    profiler = None
+    if pathProfileDump != '':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if profileEnabled or profiler != None:
+        atexit.register(saveProfile, time.perf_counter(), profiler)
+    if args.report != None:
+        try:
+            count = reportDir(pathModule, args.report, args.output, args.diff)
+        except GitError as e:
+            print(Fore.RED+'Ошибка git: '+str(e), end='\n', file=sys.stderr)
+            sys.exit(2)
+        print(Fore.YELLOW+'Найдено строк с кириллицей: '+str(count), end='\n', file=sys.stderr)
+        sys.exit(1 if count else 0)
+    loadResources()
+    if args.apply != None:
+        replayJournal()
+        sys.exit(1 if applyPlan(pathModule, args.apply) else 0)
+    if args.usage != None or args.prune != None:
+        replayJournal()
+        try:
+            count = usageDir(pathModule, args.prune != None, args.prune if args.prune != None else args.usage)
+        except ValueError as e:
+            print(Fore.RED+'Ошибка: '+str(e), end='\n')
+            sys.exit(2)
+        sys.exit(1 if count else 0)
+    if args.memory_import != None:
+        if memoryState['disabled']:
+            print(Fore.RED+'Память переводов не настроена (.env: TRANSLATION_MEMORY)', end='\n')
+            sys.exit(2)
+        replayJournal()
+        importMemory(args.memory_import)
+        sys.exit(0)
+    buildSearchIndex()
+    loadTranslationCache()
+    replayJournal()
+    try:
+        if args.watch:
+            watchDir(pathModule)
+        elif args.group != None:
+            reviewGroups(pathModule, args.group, args.diff)
+        else:
+            scanDir(pathModule, args.diff)
+    except GitError as e:
+        print(Fore.RED+'Ошибка git: '+str(e), end='\n')
+        sys.exit(2)
+    finally:
+        saveResourcesSnapshot()
@@ -0,0 +1,1026 @@
+"""Тесты t.py (python -m pytest), по одному разделу на возможность. Общие заготовки - в conftest.py
+"""
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import conftest
+from conftest import getTree, t
+
+
+# Обнаружение строк и очередь проверки
+
+def testDiscoverCandidates(module):
+    (module / 'mod' / 'a.js').write_text("const a = 'Да';\nconst r = /нет/;\n", encoding='utf-8')
+    (module / 'mod' / 'b.jsx').write_text('const b = <b>Текст</b>;\n', encoding='utf-8')
+    (module / 'mod' / 'c.js').write_text("const c = 'no';\n", encoding='utf-8')
+    found = dict(t.discoverCandidates(t.pathModule))
+    assert sorted(os.path.basename(path) for path in found) == ['a.js', 'b.jsx', 'c.js']
+    a = found[str(module / 'mod' / 'a.js')]
+    assert [(x['numLine'], x['column'], x['pattern'], x['textExclusion'], x['textReplace']) for x in a] == [
+        (0, 10, "'", 'Да', "'Да'"), (1, 11, None, None, None)]
+    assert a[1]['textLine'] == 'const r = /нет/;'  # кириллица вне строк - без шаблона
+    assert [x['textExclusion'] for x in found[str(module / 'mod' / 'b.jsx')]] == ['Текст']
+    assert found[str(module / 'mod' / 'c.js')] == []
+
+
+def testScanDirReviewsInOrder(module, monkeypatch):
+    (module / 'mod' / 'a.js').write_text("const a = 'Один';\nconst b = 'Два';\n", encoding='utf-8')
+    (module / 'mod' / 'b.js').write_text("const c = 'Три';\n", encoding='utf-8')
+    asked = []
+    monkeypatch.setattr(t, 'selectAction', lambda path, lines, numLine, textExclusion, textReplace: asked.append(
+        (os.path.basename(path), numLine, textExclusion)))
+    t.scanDir(t.pathModule)
+    assert asked == [('a.js', 0, 'Один'), ('a.js', 1, 'Два'), ('b.js', 0, 'Три')]
+
+
+# Индекс сканирования
+
+def testScanCacheInvalidation(module, monkeypatch):
+    path = module / 'mod' / 'a.js'
+    path.write_text("const a = 'Да';\n", encoding='utf-8')
+    pathCache = module / 'scan.json'
+    monkeypatch.setattr(t, 'pathScanCache', str(pathCache))
+
+    def discover():
+        return dict(t.discoverCandidates(t.pathModule))[str(path)]
+    assert [x['textExclusion'] for x in discover()] == ['Да']
+    t.saveScanCache()
+    t.scanCache.clear()
+    t.loadScanCache()
+    cache = t.scanCache[str(path)]
+    assert cache['hash'] == hashlib.sha1(path.read_bytes()).hexdigest()
+    cache['candidates'] = [{'textExclusion': 'из индекса'}]
+    # mtime и размер совпали - файл не читается
+    assert discover() == [{'textExclusion': 'из индекса'}]
+    # изменился только mtime - содержимое то же (хеш совпал), строки берутся из индекса
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns+10**9))
+    assert discover() == [{'textExclusion': 'из индекса'}]
+    # другое содержимое того же размера - хеш не совпал, файл разбирается заново
+    path.write_text("const a = 'Не';\n", encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns+2*10**9))
+    assert [x['textExclusion'] for x in discover()] == ['Не']
+    # изменился размер
+    path.write_text("const a = 'Нет';\n", encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns+2*10**9))
+    assert [x['textExclusion'] for x in discover()] == ['Нет']
+    # индекс другой версии не читается
+    pathCache.write_text(json.dumps({'version': -1, 'files': {str(path): cache}}), encoding='utf-8')
+    t.scanCache.clear()
+    t.loadScanCache()
+    assert t.scanCache == {}
+
+
+# Индекс поиска существующих переводов
+
+def searchTreeWalk(tree: dict, textExclusion: str, limit: int = 296) -> list:
+    """Прежний поиск существующего перевода обходом дерева - эталон для индекса
+    """
+    onlyCyrillic = re.sub('[^а-яА-Я\\s]', '', textExclusion).lower()
+    onlyCyrillicNoSpace = re.sub('[^а-яА-Я]', '', textExclusion).lower()
+    options = []
+
+    def walk(structure: dict, listKey: list):
+        for key, value in structure.items():
+            if len(options) >= limit:
+                return
+            if not isinstance(value, str):
+                walk(value, listKey+[key] if key != 'translation' else listKey)
+                continue
+            if len(onlyCyrillicNoSpace) > len(value) or len(onlyCyrillicNoSpace)+3 < len(re.sub('[^а-яА-Я]', '', value)):
+                continue
+            for text in (value.lower(), re.sub('[^а-яА-Я\\s]', '', value).lower()):
+                if textExclusion.lower() in text or onlyCyrillic in text or onlyCyrillicNoSpace in text:
+                    options.append({'key': '.'.join(listKey+[key]), 'value': value})
+                    break
+    walk(tree, [])
+    return options
+
+
+def testSearchIndexMatchesTreeWalk(module):
+    words = ['Сохранить', 'данные', 'отмена', 'Файл', 'не', 'найден', 'да', 'Ок', 'поиск', 'по', 'ключу', 'x']
+    rnd = random.Random(3)
+    tree = {'translation': {}}
+    for i in range(400):
+        structure = tree['translation'].setdefault('m'+str(i % 7), {})
+        if i % 3 == 0:
+            structure = structure.setdefault('g'+str(i % 5), {})
+        structure['k'+str(i)] = ' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 3)))+rnd.choice(['', '!', '?', ' 1'])
+    t.resourcesData['ru'] = tree
+    t.buildSearchIndex()
+    queries = words+['Сохранить данные', 'файл не найден', 'Да!', 'поиск по', 'ок', 'нет такого', '', 'd', 'данные?']
+    for query in queries:
+        assert t.searchOptionsKey(query) == searchTreeWalk(tree, query), query
+    assert len(t.searchOptionsKey('да', 5)) == 5
+    assert t.searchOptionsKey('да', 5) == searchTreeWalk(tree, 'да', 5)
+    # после добавления ключа индекс и обход по-прежнему совпадают
+    t.addResources('Сохранить данные поиска', 'm1.added', 'ru')
+    assert t.searchOptionsKey('данные поиска') == searchTreeWalk(tree, 'данные поиска')
+
+
+# Ранжирование похожих переводов
+
+def testRankOptionsKey(module):
+    tree = {'translation': {'mbo': {
+        'save': 'Сохранить',
+        'saveData': 'Сохранить данные',
+        'saveAll': 'Сохранить все данные формы',
+        'load': 'Загрузить данные',
+        'cancel': 'Отмена',
+        'window': 'Окно',
+        'latin': 'Save',
+    }}}
+    t.resourcesData['ru'] = tree
+    t.buildSearchIndex()
+    options = t.rankOptionsKey('Сохранить данные!', topK=10, minScore=0.1)
+    assert options[0] == {'key': 'mbo.saveData', 'value': 'Сохранить данные', 'score': 1.0}
+    assert [option['score'] for option in options] == sorted((option['score'] for option in options), reverse=True)
+    # тот же результат, что и перебор всех значений по коэффициенту Жаккара
+    trigrams = t.getTrigrams(t.getNormalizedText('Сохранить данные!'))
+    expected = {}
+    for key, value in tree['translation']['mbo'].items():
+        other = t.getTrigrams(t.getNormalizedText(value))
+        score = len(trigrams & other)/len(trigrams | other) if other else 0
+        if score >= 0.1:
+            expected['mbo.'+key] = score
+    assert {option['key']: option['score'] for option in options} == pytest.approx(expected)
+    assert [option['key'] for option in t.rankOptionsKey('Сохранить данные', topK=2, minScore=0.1)] == ['mbo.saveData', 'mbo.save']
+    assert t.rankOptionsKey('Совсем другое', minScore=0.3) == []
+    # слишком короткая строка - поиск по вхождению
+    assert t.rankOptionsKey('Да', minScore=0.3) == []
+    assert t.rankOptionsKey('Ок', minScore=0.3) == [{'key': 'mbo.window', 'value': 'Окно', 'score': None}]
+
+
+# Машинный перевод пачками и его кеш
+
+def testTranslateBatchSplitsRequests(translator, monkeypatch):
+    monkeypatch.setattr(t, 'translateBatchSize', 3)
+    texts = ['Один', 'Два', 'Три', 'Четыре', 'Пять', 'Шесть', 'Семь']
+    t.translateBatch(texts+['Два'])
+    assert len(translator.calls) == 3  # ⌈7 / 3⌉, повтор в пачке не переводится второй раз
+    assert [len(batch) for batch in translator.calls] == [3, 3, 1]
+    assert t.getTranslation('Четыре') == 'Chetyre'
+    assert len(translator.calls) == 3
+
+
+def testTranslationFromCache(translator):
+    assert t.getTranslation('Сохранить') == 'Sokhranit'
+    assert t.getTranslation('Сохранить') == 'Sokhranit'
+    t.translateBatch(['Сохранить'])
+    assert translator.calls == [['Сохранить']]
+    t.translateBatch(['Сохранить', 'Отмена'])
+    assert translator.calls == [['Сохранить'], ['Отмена']]
+
+
+def testTranslationCacheTrimmed(translator, monkeypatch, tmp_path):
+    pathCache = tmp_path / 'cache.json'
+    monkeypatch.setattr(t, 'pathTranslationCache', str(pathCache))
+    monkeypatch.setattr(t, 'translationCacheSize', 3)
+    t.translateBatch(['Один', 'Два', 'Три'])
+    t.getTranslation('Один')  # Один использован позже Два и Три
+    t.translateBatch(['Четыре'])
+    cache = json.loads(pathCache.read_text(encoding='utf-8'))
+    assert list(cache.keys()) == ['ru-en:Три', 'ru-en:Один', 'ru-en:Четыре']
+    t.translationCache.clear()
+    t.loadTranslationCache()
+    assert t.getTranslation('Три') == 'Tri'
+    assert translator.calls == [['Один', 'Два', 'Три'], ['Четыре']]
+
+
+# Подсказки в фоне
+
+def testPrefetchPerSession(module, translator, monkeypatch):
+    (module / 'mod' / 'a.js').write_text("const a = 'Сохранить';\nconst b = 'Отмена';\n", encoding='utf-8')
+    prefetched = []
+
+    def selectAction(path, lines, numLine, textExclusion, textReplace):
+        # пока оператор думает, подсказки для этой строки уже заказаны в фоне
+        prefetched.append((path, textExclusion) in t.prefetchResults)
+        assert t.getPrefetchedSuggestions(path, textExclusion)['translation'] == t.getTranslation(textExclusion)
+    monkeypatch.setattr(t, 'selectAction', selectAction)
+    for i in range(2):  # второй сеанс в том же процессе тоже получает подсказки в фоне
+        t.scanDir(t.pathModule)
+        assert t.prefetchState['executor'] == None
+        assert t.prefetchResults == {}
+    assert prefetched == [True, True, True, True]
+
+
+# Журнал и запись изменений пачкой
+
+def testJournalReplayAfterCrash(module, monkeypatch):
+    path = str(module / 'mod' / 'a.js')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("const a = 'Один' + 'Два';\n")
+    pathJournal = module / 'journal.jsonl'
+    monkeypatch.setattr(t, 'pathJournal', str(pathJournal))
+    monkeypatch.setattr(t, 'flushInterval', 3600)
+    lines = t.openReviewFile(path)
+    one, two = t.extractCandidates(path)
+    t.reviewState['candidate'] = one
+    t.commitEdit(path, lines, 0, {'replaceText': "t('mbo.one')"}, {'key': 'mbo.one', 'text': 'Один', 'texts': {'en': 'One'}})
+    t.reviewState['candidate'] = two
+    t.commitEdit(path, lines, 0, {'replaceText': "t('mbo.two')"})
+    # изменения пока только в журнале
+    assert open(path, encoding='utf-8').read() == "const a = 'Один' + 'Два';\n"
+    assert 'one' not in getTree(module / 'tr' / 'resources.js')['ru']['translation']['mbo']
+    assert len(pathJournal.read_text(encoding='utf-8').splitlines()) == 2
+    # сбой: запись в журнал оборвалась, изменения в памяти потеряны
+    with open(pathJournal, 'a', encoding='utf-8') as f:
+        f.write('{"path": "')
+    t.pendingWrites['files'].clear()
+    t.pendingWrites['resources'] = False
+    t.pendingResources.clear()
+    t.loadResources()
+    t.replayJournal()
+    assert open(path, encoding='utf-8').read() == "const a = t('mbo.one') + t('mbo.two');\n"
+    tree = getTree(module / 'tr' / 'resources.js')
+    assert tree['ru']['translation']['mbo']['one'] == 'Один'
+    assert tree['en']['translation']['mbo']['one'] == 'One'
+    assert not pathJournal.exists()
+    # повторный запуск ничего не применяет
+    t.replayJournal()
+    assert open(path, encoding='utf-8').read() == "const a = t('mbo.one') + t('mbo.two');\n"
+
+
+def testJournalSkipsChangedFile(module, monkeypatch):
+    path = str(module / 'mod' / 'a.js')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("const a = 'Один';\n")
+    pathJournal = module / 'journal.jsonl'
+    monkeypatch.setattr(t, 'pathJournal', str(pathJournal))
+    monkeypatch.setattr(t, 'flushInterval', 3600)
+    lines = t.openReviewFile(path)
+    t.reviewState['candidate'] = t.extractCandidates(path)[0]
+    t.commitEdit(path, lines, 0, {'replaceText': "t('mbo.one')"})
+    t.pendingWrites['files'].clear()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("const a = 'Один'; // изменён после сбоя\n")
+    t.replayJournal()
+    assert open(path, encoding='utf-8').read() == "const a = 'Один'; // изменён после сбоя\n"
+    assert not pathJournal.exists()
+
+
+# Вставка новых ключей в файл перевода
+
+def testPatchResourcesInsert(module):
+    t.addResources('Новое', 'mbo.example.newKey', 'ru')
+    t.addResources('New', 'mbo.example.newKey', 'en')
+    t.addResources('Глубже', 'mbo.deep.er.key', 'ru')
+    t.saveResources()
+    text = (module / 'tr' / 'resources.js').read_text(encoding='utf-8')
+    assert not t.pendingResources
+    # остальной текст файла не меняется
+    assert text.startswith(conftest.resourcesText[:conftest.resourcesText.index('                example:')])
+    assert "                arrow: 'Стрелка',\n                yes: 'Это \\'да\\'',\n" in text
+    tree = getTree(module / 'tr' / 'resources.js')
+    assert tree['ru']['translation']['mbo']['example'] == {'getData': 'Получить данные', 'newKey': 'Новое'}
+    assert tree['en']['translation']['mbo']['example']['newKey'] == 'New'
+    assert tree['ru']['translation']['mbo']['deep'] == {'er': {'key': 'Глубже'}}
+    # карта структуры после вставки годится для следующей вставки
+    t.addResources('Ещё', 'mbo.example.more', 'ru')
+    t.saveResources()
+    assert getTree(module / 'tr' / 'resources.js')['ru']['translation']['mbo']['example']['more'] == 'Ещё'
+
+
+def testPatchResourcesChangedOnDisk(module):
+    # файл изменён не нами (mtime и размер не совпали) - вставка не делается, файл генерируется заново по дереву
+    path = module / 'tr' / 'resources.js'
+    path.write_text(conftest.resourcesText.replace('Сохранить', 'Сохранить!'), encoding='utf-8')
+    t.addResources('Новое', 'mbo.newKey', 'ru')
+    t.saveResources()
+    tree = getTree(path)
+    assert tree['ru']['translation']['mbo']['newKey'] == 'Новое'
+    assert tree['ru']['translation']['mbo']['save'] == 'Сохранить'
+
+
+# Разбор файла перевода и снимок
+
+def testParseResources():
+    tree, layout = t.parseResources('''const resources = {
+    ru: {
+        // комментарий
+        translation: {
+            'quoted-key': "Двойные \\"кавычки\\"",
+            list: ['а', 'б'],
+            inline: { a: 'А', b: { c: `В` } },
+            long: 'Длинная ' +
+                'строка',
+            escaped: 'Путь \\\\ тут\\nи \\u0434\\u0430',
+        },
+    },
+};
+
+export default resources;
+''')
+    translation = tree['ru']['translation']
+    assert translation['quoted-key'] == 'Двойные "кавычки"'
+    assert translation['inline'] == {'a': 'А', 'b': {'c': 'В'}}
+    assert translation['escaped'] == 'Путь \\ тут\nи да'
+    assert translation['long'] == 'Длинная строка'
+    assert ('ru', 'translation', 'inline', 'b', 'c') in layout['leaves']
+    assert layout['branches'][('ru', 'translation', 'inline')]['close'] == None  # объект в одну строку
+    with pytest.raises(ValueError):
+        t.parseResources('const resources = { ru: { translation: { a: } } };')
+
+
+def testPatchResourcesInlineObject(module):
+    assert t.resourcesData['ru']['translation']['mbo']['example'] == {'getData': 'Получить данные'}
+    # вставка рядом с объектом в одну строку сдвигает смещения остальных объектов
+    t.addResources('Новое', 'mbo.zz', 'ru')
+    t.addResources('Ещё', 'mbo.example.more', 'en')
+    t.saveResources()
+    tree = getTree(module / 'tr' / 'resources.js')
+    assert tree['ru']['translation']['mbo']['zz'] == 'Новое'
+    assert tree['en']['translation']['mbo']['example'] == {'getData': 'Get data', 'more': 'Ещё'}
+    assert tree == t.resourcesData
+
+
+def testResourcesSnapshot(module, monkeypatch):
+    pathSnapshot = module / 'snapshot.pickle'
+    monkeypatch.setattr(t, 'pathResourcesSnapshot', str(pathSnapshot))
+    t.loadResources()
+    assert pathSnapshot.exists()
+    tree = json.loads(json.dumps(t.resourcesData))
+    parsed = []
+    parseResources = t.parseResources
+    monkeypatch.setattr(t, 'parseResources', lambda text: parsed.append(text) or parseResources(text))
+    t.resourcesData.clear()
+    t.loadResources()
+    assert parsed == []  # файл не изменился - дерево из снимка
+    assert t.resourcesData == tree
+    assert t.resourcesLayout['text'] == conftest.resourcesText
+    (module / 'tr' / 'resources.js').write_text(conftest.resourcesText.replace('Сохранить', 'Записать'), encoding='utf-8')
+    t.loadResources()
+    assert len(parsed) == 1
+    assert t.resourcesData['ru']['translation']['mbo']['save'] == 'Записать'
+
+
+# Индекс ключей
+
+def testCheckTKey(module):
+    t.checkTKey('mbo.newKey')
+    t.checkTKey('mbo.example.other')
+    with pytest.raises(t.ForbiddenRewriting) as e:
+        t.checkTKey('mbo.save')
+    assert e.value.tValue == 'Сохранить'
+    with pytest.raises(t.ForbiddenRewriting):
+        t.checkTKey('mbo.save.inner')  # значение не может стать объектом
+    with pytest.raises(t.ForbiddenRewriting) as e:
+        t.checkTKey('mbo.example')
+    assert e.value.tValue == '{ Object }'
+    with pytest.raises(t.EmptyValueKey):
+        t.checkTKey('mbo..x')
+    t.addResources('Новое', 'mbo.newKey', 'ru')
+    with pytest.raises(t.ForbiddenRewriting):
+        t.checkTKey('mbo.newKey')
+    assert t.getResourceText('mbo.newKey') == 'Новое'
+    assert t.getResourceText('mbo.example') == None
+
+
+def testKeysByPrefix(module):
+    assert t.getKeysByPrefix('mbo.ar') == ['mbo.arr', 'mbo.arrow']
+    assert t.getKeysByPrefix('mbo.example.') == ['mbo.example.getData']
+    assert t.getKeysByPrefix('mbo.', 2) == ['mbo.arr', 'mbo.arrow']
+    t.addResources('Новое', 'mbo.aa.b', 'ru')
+    assert t.getKeysByPrefix('mbo.a') == ['mbo.aa', 'mbo.aa.b', 'mbo.arr', 'mbo.arrow']
+    completions = []
+    while t.completeKey('mbo.', len(completions)) != None:
+        completions.append(t.completeKey('mbo.', len(completions)))
+    assert completions == ['mbo.aa.', 'mbo.arr', 'mbo.arrow', 'mbo.example.', 'mbo.save', 'mbo.yes']
+
+
+# Лексер исходного кода
+
+def testLexSource():
+    text = "const a = 'Да';\nconst b = `Нет ${x} тут`;\n// Комментарий\nconst c = <b>Текст {y}</b>;\nconst d = 'no';\n"
+    spans = [(text[start:end], pattern, cyrillic) for start, end, pattern, cyrillic in t.lexSource(text)]
+    assert ("'Да'", "'", True) in spans
+    assert ('`Нет ${x} тут`', '`', True) in spans
+    assert ('// Комментарий', '//', False) in spans  # комментарии не переводятся
+    assert any(pattern == '><' and 'Текст' in body for body, pattern, cyrillic in spans)
+    assert ("'no'", "'", False) in spans
+
+
+def testLexSourceTypeScriptCast():
+    text = "const a = <string>x;\nconst b = 'Строка';\n"
+    spans = [(text[start:end], pattern) for start, end, pattern, cyrillic in t.lexSource(text, jsx=False) if cyrillic]
+    assert spans == [("'Строка'", "'")]
+
+
+def testExtractCandidatesMultiline(tmp_path):
+    path = tmp_path / 'a.jsx'
+    path.write_text('''/* Блок
+   комментария */
+const a = `Первая
+вторая ${t('x') + "Вложенная"}`;
+const re = /'/; const b = "Кавычка ' внутри";
+const c = (
+    <div title="Атрибут">
+        Текст
+        на двух строках
+    </div>
+);
+const d = 'Отмечено'; // НЕ ПЕРЕВЕДЕННО !!!
+''', encoding='utf-8')
+    found = [(x['numLine'], x['endLine'], x['pattern'], x['textExclusion']) for x in t.extractCandidates(str(path))]
+    assert found == [
+        (2, 3, '`', "Первая\nвторая ${t('x') + \"Вложенная\"}"),
+        (3, 3, '"', 'Вложенная'),
+        (4, 4, '"', "Кавычка ' внутри"),
+        (6, 6, '"', 'Атрибут'),
+        (7, 8, '><', 'Текст\n        на двух строках'),
+    ]
+
+
+# Отбор файлов по байтам кириллицы
+
+def testScanFilePrefilter(tmp_path, monkeypatch):
+    clean = tmp_path / 'clean.js'
+    clean.write_text("const a = 'no';\n" * 100, encoding='utf-8')
+    empty = tmp_path / 'empty.js'
+    empty.write_text('', encoding='utf-8')
+    path = tmp_path / 'a.js'
+    path.write_text("const a = 'Да';\nconst b = `x ${'Нет'}`;\nconst c = 'tail';\n" + "const d = 1;\n" * 50, encoding='utf-8')
+    extractCandidates = t.extractCandidates
+    calls = []
+    monkeypatch.setattr(t, 'extractCandidates', lambda *args: calls.append(args) or extractCandidates(*args))
+    assert t.scanFile(str(clean)) == (None, [])
+    assert t.scanFile(str(empty)) == (None, [])
+    assert calls == []  # файлы без кириллицы не декодируются и не разбираются
+    contentHash, candidates = t.scanFile(str(path))
+    assert contentHash == hashlib.sha1(path.read_bytes()).hexdigest()
+    assert candidates == extractCandidates(str(path))  # разбор до последней кириллицы находит то же
+    assert [x['textExclusion'] for x in candidates] == ['Да', 'Нет']  # кириллица шаблона - только внутри ${...}
+    assert calls[0][2] < len(path.read_text(encoding='utf-8'))
+    assert t.scanFile(str(path), contentHash) == (contentHash, None)
+
+
+# Обход каталога
+
+def testWalkDir(tmp_path, monkeypatch):
+    monkeypatch.setattr(t, 'scanMaxSize', 100)
+    files = {
+        'b.js': '', 'a.tsx': '', 'style.css': '', 'big.js': 'x' * 101, 'lib.min.js': '',
+        'node_modules/pkg/index.js': '', 'dist/out.js': '',
+        'src/.gitignore': 'gen/\n*.tmp.js\n!keep.tmp.js\n', 'src/x.tmp.js': '', 'src/keep.tmp.js': '',
+        'src/gen/g.js': '', 'src/z/y.jsx': '', 'src/c.ts': '', 'legacy/old.js': '',
+    }
+    for name, text in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    root = str(tmp_path)
+
+    def walk():
+        return [path[len(root)+1:].replace(os.sep, '/') for path, stat in t.walkDir(root)]
+    # файлы каталога, затем вложенные каталоги по алфавиту, в глубину
+    assert walk() == ['a.tsx', 'b.js', 'legacy/old.js', 'src/c.ts', 'src/keep.tmp.js', 'src/z/y.jsx']
+    monkeypatch.setattr(t, 'scanExclude', t.scanExclude+['legacy/*'])
+    monkeypatch.setattr(t, 'scanInclude', ['src/*', '*.tsx'])
+    assert walk() == ['a.tsx', 'src/c.ts', 'src/keep.tmp.js', 'src/z/y.jsx']
+
+
+# Проверка только изменённого относительно git
+
+def git(cwd, *args):
+    subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=cwd, check=True, capture_output=True)
+
+
+def testUnquoteGitPath():
+    assert t.unquoteGitPath('b/with space.js\t') == 'b/with space.js'
+    assert t.unquoteGitPath('"b/q\\"uote.js"') == 'b/q"uote.js'
+    assert t.unquoteGitPath('"b/\\320\\264\\320\\260.js"') == 'b/да.js'
+
+
+@pytest.mark.skipif(shutil.which('git') == None, reason='git не установлен')
+def testDiffHunks(tmp_path):
+    pathModule = tmp_path / 'src'
+    pathModule.mkdir()
+    (pathModule / 'with space.js').write_text('a\nb\nc\n', encoding='utf-8')
+    (pathModule / 'q"uote.js').write_text('a\n', encoding='utf-8')
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'init')
+    (pathModule / 'with space.js').write_text('a\nB\nc\nd\n', encoding='utf-8')
+    (pathModule / 'q"uote.js').write_text('A\n', encoding='utf-8')
+    (pathModule / 'new file.js').write_text('x\n', encoding='utf-8')
+    hunks = t.getDiffHunks(str(pathModule), 'HEAD')
+    assert hunks == {
+        os.path.join(str(pathModule), 'with space.js'): [(1, 1), (3, 3)],
+        os.path.join(str(pathModule), 'q"uote.js'): [(0, 0)],
+        os.path.join(str(pathModule), 'new file.js'): None,
+    }
+
+
+@pytest.mark.skipif(shutil.which('git') == None, reason='git не установлен')
+def testDiscoverChangedLines(module):
+    path = module / 'mod' / 'a.js'
+    path.write_text("const a = 'Один';\nconst b = 'Два';\n", encoding='utf-8')
+    (module / 'mod' / 'b.js').write_text("const c = 'Три';\n", encoding='utf-8')
+    git(module, 'init', '-q')
+    git(module, 'add', 'mod')
+    git(module, 'commit', '-q', '-m', 'init')
+    path.write_text("const a = 'Один';\nconst b = 'Два!';\nconst c = `Много\nстрок`;\n", encoding='utf-8')
+    (module / 'mod' / 'new.js').write_text("const d = 'Четыре';\n", encoding='utf-8')
+    found = {os.path.basename(path): [x['textExclusion'] for x in candidates]
+             for path, candidates in t.discoverCandidates(t.pathModule, t.getDiffHunks(t.pathModule, 'HEAD'))}
+    assert found == {'a.js': ['Два!', 'Много\nстрок'], 'new.js': ['Четыре']}
+
+
+# Отчёт без вопросов
+
+def testReportDir(module):
+    (module / 'mod' / 'a.js').write_text("const a = 'Один';\nconst r = /два/;\n", encoding='utf-8')
+    (module / 'mod' / 'b.jsx').write_text('const b = <b>Три</b>;\n', encoding='utf-8')
+    pathReport = module / 'report'
+    assert t.reportDir(t.pathModule, 'jsonl', str(pathReport)) == 3
+    entries = [json.loads(line) for line in pathReport.read_text(encoding='utf-8').splitlines()]
+    assert [(os.path.basename(x['file']), x['line'], x['column'], x['pattern'], x['text']) for x in entries] == [
+        ('a.js', 1, 11, "'", 'Один'), ('a.js', 2, 12, None, 'const r = /два/;'), ('b.jsx', 1, 14, '><', 'Три')]
+    assert t.reportDir(t.pathModule, 'csv', str(pathReport)) == 3
+    rows = list(csv.reader(pathReport.open(encoding='utf-8', newline='')))
+    assert rows[0] == ['file', 'line', 'column', 'endLine', 'pattern', 'text'] and rows[2][4:] == ['', 'const r = /два/;']
+    assert t.reportDir(t.pathModule, 'sarif', str(pathReport)) == 3
+    sarif = json.loads(pathReport.read_text(encoding='utf-8'))
+    assert [x['ruleId'] for x in sarif['runs'][0]['results']] == ['cyrillic-string', 'cyrillic-no-pattern', 'cyrillic-string']
+    assert (module / 'mod' / 'a.js').read_text(encoding='utf-8') == "const a = 'Один';\nconst r = /два/;\n"
+
+
+def testReportExitCode(module):
+    (module / '.env').write_text('PATH_MODULE="mod"\nPATH_RESOURCES="tr/resources.js"\nMODULE_NAME="mbo"\n'
+                                 'TRANSLATE_TO_ENG="N"\nIBM_API_KEY=""\nIBM_URL=""\n', encoding='utf-8')
+    pathScript = os.path.join(os.path.dirname(os.path.abspath(__file__)), 't.py')
+
+    def report():
+        return subprocess.run([sys.executable, pathScript, '--report', 'jsonl'], cwd=module, capture_output=True, text=True)
+    result = report()
+    assert result.returncode == 0 and result.stdout == ''
+    (module / 'mod' / 'a.js').write_text("const a = 'Один';\n", encoding='utf-8')
+    for i in range(2):  # второй запуск - из индекса сканирования
+        result = report()
+        assert result.returncode == 1
+        assert json.loads(result.stdout)['text'] == 'Один'
+        assert 'Error' not in result.stderr  # пул процессов закрывается до выхода
+
+
+# Пакетное применение плана
+
+def testEscapedQuoteRoundTrip():
+    value = t.getStringBody("'Это \\'да\\''")
+    assert value == "Это 'да'"
+    assert t.getStringBody(t.getResourceValue(value)) == value
+    assert t.getStringBody(t.getResourceValue('Путь \\ тут\nи дальше')) == 'Путь \\ тут\nи дальше'
+    assert t.getSourceText('Путь \\ тут', '><') == 'Путь \\ тут'
+
+
+def testApplyPlanIdempotent(module):
+    source = "const a = 'Это \\'нет\\'';\nconst b = <b>Путь \\ тут</b>;\n"
+    (module / 'mod' / 'x.js').write_text(source, encoding='utf-8')
+    pathPlan = module / 'plan.jsonl'
+    pathPlan.write_text('\n'.join(json.dumps(entry, ensure_ascii=False) for entry in [
+        {'text': "Это \\'нет\\'", 'action': 'translate', 'key': 'mbo.no'},
+        {'text': 'Путь \\ тут', 'action': 'translate', 'key': 'mbo.path'},
+    ])+'\n', encoding='utf-8')
+    assert t.applyPlan(t.pathModule, str(pathPlan)) == 0
+    code = (module / 'mod' / 'x.js').read_text(encoding='utf-8')
+    resources = (module / 'tr' / 'resources.js').read_text(encoding='utf-8')
+    assert "t('mbo.no')" in code and "{t('mbo.path')}" in code
+    tree = getTree(module / 'tr' / 'resources.js')
+    assert tree['ru']['translation']['mbo']['no'] == "Это 'нет'"
+    assert tree['ru']['translation']['mbo']['path'] == 'Путь \\ тут'
+    assert tree['en']['translation']['mbo']['no'] == "Это 'нет'"  # значение плана - для всех языков
+    # строк с кириллицей больше нет, а ключи уже есть с теми же значениями - повторный план ничего не меняет
+    assert t.applyPlan(t.pathModule, str(pathPlan)) == 0
+    assert (module / 'mod' / 'x.js').read_text(encoding='utf-8') == code
+    assert (module / 'tr' / 'resources.js').read_text(encoding='utf-8') == resources
+
+
+def testApplyPlanConflicts(module):
+    path = module / 'mod' / 'x.js'
+    path.write_text("const a = 'Сохранить';\nconst b = 'Отмена';\nconst c = 'Пометить';\nconst d = 'Оставить';\n", encoding='utf-8')
+    pathPlan = module / 'plan.jsonl'
+
+    def plan(*entries):
+        pathPlan.write_text('\n'.join(json.dumps(entry, ensure_ascii=False) for entry in entries)+'\n', encoding='utf-8')
+        return t.applyPlan(t.pathModule, str(pathPlan))
+    # ключ уже занят другим значением, и у одного нового ключа два значения - ничего не записывается
+    assert plan({'text': 'Отмена', 'action': 'translate', 'key': 'mbo.save'},
+                {'text': 'Пометить', 'action': 'translate', 'key': 'mbo.x'},
+                {'text': 'Оставить', 'action': 'translate', 'key': 'mbo.x'},
+                {'file': str(path), 'line': 1, 'action': 'key', 'key': 'mbo.none'}) == 3
+    assert path.read_text(encoding='utf-8').startswith("const a = 'Сохранить';")
+    assert (module / 'tr' / 'resources.js').read_text(encoding='utf-8') == conftest.resourcesText
+    assert plan({'file': str(path), 'line': 1, 'column': 11, 'action': 'key', 'key': 'mbo.save'},
+                {'text': 'Отмена', 'pattern': "'", 'action': 'translate', 'key': 'mbo.cancel', 'value': 'Отменить'},
+                {'text': 'Пометить', 'action': 'mark'},
+                {'text': 'Оставить', 'action': 'ignore'}) == 0
+    assert path.read_text(encoding='utf-8') == ("const a = t('mbo.save');\nconst b = t('mbo.cancel');\n"
+                                                "const c = 'Пометить'; // НЕ ПЕРЕВЕДЕННО !!!\nconst d = 'Оставить';\n")
+    assert getTree(module / 'tr' / 'resources.js')['ru']['translation']['mbo']['cancel'] == 'Отменить'
+
+
+# Группы одинаковых строк
+
+def testGroupKey():
+    a = {'textExclusion': 'Сохранить  данные', 'pattern': "'", 'path': os.path.join('src', 'a', 'x.js')}
+    b = {'textExclusion': 'Сохранить данные', 'pattern': '"', 'path': os.path.join('src', 'b', 'y.js')}
+    c = dict(b, pattern="'")
+    assert t.getGroupKey(a, 'text') == t.getGroupKey(b, 'text')
+    assert t.getGroupKey(a, 'pattern') != t.getGroupKey(b, 'pattern')
+    assert t.getGroupKey(a, 'pattern') == t.getGroupKey(c, 'pattern')
+    assert t.getGroupKey(a, 'context') != t.getGroupKey(c, 'context')
+
+
+def testReviewGroupsMixedPatterns(module, monkeypatch):
+    (module / 'mod' / 'a.js').write_text("const a = 'Сохранить';\nconst x = 'Один';\n", encoding='utf-8')
+    (module / 'mod' / 'b.jsx').write_text('const b = <b>Сохранить</b>;\n', encoding='utf-8')
+    (module / 'mod' / 'c.js').write_text('const c = "Сохранить";\n', encoding='utf-8')
+    asked = []
+
+    def selectAction(path, lines, numLine, textExclusion, textReplace):
+        # оператор выбирает существующий ключ: так же, как selectKeyTranslite
+        asked.append(textExclusion)
+        if textExclusion != 'Сохранить':
+            return
+        expression = "t('mbo.save')"
+        braces = t.reviewState['candidate']['pattern'] == '><'
+        t.commitEdit(path, lines, numLine, {'replaceText': '{'+expression+'}' if braces else expression, 'expression': expression})
+    monkeypatch.setattr(t, 'selectAction', selectAction)
+    t.reviewGroups(t.pathModule, 'text')
+    assert asked == ['Сохранить', 'Один']  # один вопрос на группу, самые частые - первыми
+    assert (module / 'mod' / 'a.js').read_text(encoding='utf-8') == "const a = t('mbo.save');\nconst x = 'Один';\n"
+    assert (module / 'mod' / 'b.jsx').read_text(encoding='utf-8') == "const b = <b>{t('mbo.save')}</b>;\n"
+    assert (module / 'mod' / 'c.js').read_text(encoding='utf-8') == "const c = t('mbo.save');\n"
+
+
+# Запись нескольких замен в файл
+
+def testEditsOnOneLineAndAcrossLines(module, monkeypatch):
+    path = str(module / 'mod' / 'a.js')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("const a = 'Один' + 'Два' + 'Три';\nconst b = `Много\nстрок`; const c = 'Ещё';\n")
+    monkeypatch.setattr(t, 'flushInterval', 3600)
+    lines = t.openReviewFile(path)
+    heads = {}
+    candidates = t.extractCandidates(path)
+    decisions = ["t('mbo.one')", None, "t('mbo.three')", "t('mbo.many')", None]
+    for candidate, replaceText in zip(candidates, decisions):
+        numLine = t.mergeLines(lines, heads, candidate)
+        t.reviewState['candidate'] = candidate
+        assert t.commitEdit(path, lines, numLine, {'replaceText': replaceText} if replaceText else {'mark': True})
+    # замены в одной строке не сдвигают друг друга, а строка отмечается один раз
+    assert lines[0] == "const a = t('mbo.one') + 'Два' + t('mbo.three'); // НЕ ПЕРЕВЕДЕННО !!!\n"
+    assert lines[1] == "const b = t('mbo.many'); const c = 'Ещё'; // НЕ ПЕРЕВЕДЕННО !!!\n"
+    # пересекающаяся замена не принимается
+    t.reviewState['candidate'] = candidates[0]
+    assert not t.commitEdit(path, lines, 0, {'replaceText': "t('mbo.other')"})
+    writes = []
+    writeFileAtomic = t.writeFileAtomic
+    monkeypatch.setattr(t, 'writeFileAtomic', lambda path, texts: writes.append(path) or writeFileAtomic(path, texts))
+    t.flushEdits()
+    assert writes == [path]  # файл записывается один раз
+    assert open(path, encoding='utf-8').read() == (
+        "const a = t('mbo.one') + 'Два' + t('mbo.three'); // НЕ ПЕРЕВЕДЕННО !!!\n"
+        "const b = t('mbo.many'); const c = 'Ещё'; // НЕ ПЕРЕВЕДЕННО !!!\n")
+
+
+def testApplyEdits():
+    text = 'abcdef'
+    assert t.applyEdits(text, [(0, 1, 'X'), (2, 2, '-'), (3, 6, '')]) == 'Xb-c'
+    assert t.applyEdits(text, []) == text
+
+
+# Использование ключей и удаление неиспользуемых
+
+def testFindKeyUsages(tmp_path):
+    path = tmp_path / 'a.js'
+    path.write_text("t('mbo.save');\nt(`mbo.arr`, { x });\nt(`mbo.status.${status}`);\nt('mbo.arr' + x);\n", encoding='utf-8')
+    keys, dynamic = t.findKeyUsages(str(path))
+    assert keys == [('mbo.save', 0), ('mbo.arr', 1)]
+    assert [(prefix, numLine) for prefix, numLine, line in dynamic] == [('mbo.status.', 2), ('mbo.arr', 3)]
+    assert t.isKeyInPrefix('mbo.arr', 'mbo.arr')
+    assert t.isKeyInPrefix('mbo.arr.x', 'mbo.arr')
+    assert not t.isKeyInPrefix('mbo.arrow', 'mbo.arr')
+    assert t.isKeyInPrefix('mbo.status.ok', 'mbo.status.')
+
+
+def testPruneNeedsRoots(module):
+    (module / 'mod' / 'a.js').write_text("t('mbo.save');\nt('mbo.example.' + name);\n", encoding='utf-8')
+    (module / 'crm').mkdir()
+    (module / 'crm' / 'b.js').write_text("t('mbo.arrow');\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        t.usageDir(t.pathModule, True)
+    assert t.usageDir(t.pathModule) == 3  # mbo.arr, mbo.arrow, mbo.yes
+    assert t.usageDir(t.pathModule, False, [str(module / 'crm')]) == 2
+    assert t.usageDir(t.pathModule, True, [str(module / 'crm')]) == 0
+    tree = getTree(module / 'tr' / 'resources.js')['ru']['translation']['mbo']
+    assert sorted(tree) == ['arrow', 'example', 'save']  # mbo.arrow используется в другом каталоге
+
+
+def testPatchResourcesPrune(module):
+    t.removeResources('mbo.arr')
+    t.removeResources('mbo.example.getData')
+    t.saveResources()
+    text = (module / 'tr' / 'resources.js').read_text(encoding='utf-8')
+    expected = conftest.resourcesText
+    for line in ("                arr: 'Массив',\n", "                arr: 'Array',\n",
+                 "                example: { getData: 'Получить данные' },\n", "                example: { getData: 'Get data' },\n"):
+        expected = expected.replace(line, '')
+    assert text == expected
+    assert getTree(module / 'tr' / 'resources.js') == t.resourcesData
+
+
+# Режим наблюдения
+
+def testWatchPicksOnlyNewStrings(module, monkeypatch):
+    path = module / 'mod' / 'a.js'
+    path.write_text("const a = 'Один';\nconst b = 'Два';\n", encoding='utf-8')
+    asked = []
+    monkeypatch.setattr(t, 'selectAction', lambda path, lines, numLine, textExclusion, textReplace: asked.append(
+        (os.path.basename(path), numLine, textExclusion)))
+    monkeypatch.setattr(t, 'watchForcePolling', True)
+    # каждый обход опроса - шаг сценария: правка файла или тишина, после которой пачка обрабатывается
+    steps = [
+        lambda: path.write_text("const a = 'Один';\nconst b = 'Два';\nconst c = 'Новая';\n", encoding='utf-8'),
+        None,
+        lambda: path.write_text("let x = 1;\nconst a = 'Один';\nconst b = 'Два';\nconst c = 'Новая';\n", encoding='utf-8'),
+        None,
+        lambda: (module / 'mod' / 'b.js').write_text("const d = 'Три';\n", encoding='utf-8'),
+        None,
+    ]
+    sleep = time.sleep
+
+    def step(seconds):
+        if threading.current_thread() is not threading.main_thread():
+            return sleep(seconds)
+        if not len(steps):
+            raise KeyboardInterrupt
+        action = steps.pop(0)
+        if action:
+            action()
+    monkeypatch.setattr(t.time, 'sleep', step)
+    t.watchDir(t.pathModule)
+    # уже проверенные строки (и сдвинутые вместе с файлом) заново не предлагаются
+    assert asked == [('a.js', 2, 'Новая'), ('b.js', 0, 'Три')]
+
+
+def testGetNewCandidates():
+    old = [{'pattern': "'", 'textReplace': "'Да'"}, {'pattern': "'", 'textReplace': "'Да'"}]
+    new = old+[{'pattern': "'", 'textReplace': "'Да'"}, {'pattern': None, 'textReplace': None, 'textLine': '// нет'}]
+    # одинаковые строки считаются по количеству: третья 'Да' - новая
+    assert t.getNewCandidates(old, new) == new[2:]
+    assert t.getNewCandidates(new, old) == []
+
+
+# Замеры
+
+def testBenchCompare(tmp_path):
+    import bench
+    old, new = tmp_path / 'old.json', tmp_path / 'new.json'
+    for path, results in ((old, {'load': 0.1, 'scan': 0.2}), (new, {'load': 0.2, 'scan': 0.19, 'save': 0.1})):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'python': '3', 'results': results}, f)
+            f.close()
+    # замедление больше порога - регрессия, ускорение и новый замер - нет
+    assert bench.compareResults(bench.loadResults(old), bench.loadResults(new), 0.1) == 1
+    assert bench.compareResults(bench.loadResults(old), bench.loadResults(new), 1.5) == 0
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench.py')
+    run = subprocess.run([sys.executable, script, '--compare', str(old), str(new)], capture_output=True)
+    assert run.returncode == 1
+
+
+def testBenchGenerateResources(tmp_path):
+    import bench
+    path = tmp_path / 'resources.js'
+    bench.generateResources(str(path), 1000)  # модули по 500 строк
+    tree = getTree(path)
+    assert sorted(tree.keys()) == ['en', 'ru']
+    leaves = []
+    stack = [tree['ru']['translation']]
+    while len(stack):
+        node = stack.pop()
+        for value in node.values():
+            if isinstance(value, dict):
+                stack.append(value)
+            else:
+                leaves.append(value)
+    assert len(leaves) == 1000
+
+
+# Замеры сеанса
+
+def testTimersAndCounters(module, monkeypatch):
+    pathProfile = module / 'profile.json'
+    monkeypatch.setattr(t, 'pathProfile', str(pathProfile))
+    monkeypatch.setattr(t, 'profileEnabled', True)
+    monkeypatch.setattr(t, 'profileStats', {'timers': {}, 'counters': {}})
+
+    @t.timed('work')
+    def work(fail):
+        if fail:
+            raise ValueError
+    work(False)
+    with pytest.raises(ValueError):
+        work(True)  # время вызова с исключением тоже считается
+    (module / 'mod' / 'a.js').write_text("const a = 'Да';\n", encoding='utf-8')
+    (module / 'mod' / 'b.js').write_text("const b = 'no';\n", encoding='utf-8')
+    for i in range(2):  # второй обход - из индекса сканирования
+        dict(t.discoverCandidates(t.pathModule))
+    started = time.perf_counter()
+    t.saveProfile(started)
+    with open(pathProfile, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+        f.close()
+    assert summary['timers']['work']['calls'] == 2
+    assert summary['timers']['work']['max'] <= summary['timers']['work']['seconds']
+    assert summary['counters']['files.seen'] == 4
+    assert summary['counters']['files.skipped.cache'] == 2
+    assert summary['counters']['files.skipped.prefilter'] == 1  # в b.js нет кириллицы
+    assert summary['duration'] >= 0
+
+
+def testTimedDisabled(monkeypatch):
+    monkeypatch.setattr(t, 'profileEnabled', False)
+
+    def work():
+        pass
+    # без PROFILE функция не оборачивается, и замеры ничего не стоят
+    assert t.timed('work')(work) is work
+    counters = dict(t.profileStats['counters'])
+    t.countEvent('files.seen')
+    assert t.profileStats['counters'] == counters
+
+
+# Компактное хранение дерева перевода
+
+def testCompactResources(module, monkeypatch):
+    pathSnapshot = module / 'snapshot.pickle'
+    monkeypatch.setattr(t, 'pathResourcesSnapshot', str(pathSnapshot))
+    monkeypatch.setattr(t, 'resourcesCompact', True)
+    tree = getTree(module / 'tr' / 'resources.js')
+    t.loadResources()
+    t.buildSearchIndex()
+    # снаружи - те же словари, внутри - одна таблица строк и один скелет ключей на все языки
+    assert isinstance(t.resourcesData['ru'], t.ResourcesView)
+    assert t.resourcesData == tree
+    store = t.resourcesData['ru'].store
+    assert store is t.resourcesData['en'].store
+    assert len(store.strings) == len(set(store.strings)) == 10
+    assert t.getResourceText('mbo.example.getData') == 'Получить данные'
+    t.addResources('Закрыть', 'mbo.close', 'ru')
+    t.addResources('Close', 'mbo.close', 'en')
+    t.removeResources('mbo.arrow')
+    t.saveResources()
+    tree['ru']['translation']['mbo']['close'] = 'Закрыть'
+    tree['en']['translation']['mbo']['close'] = 'Close'
+    del tree['ru']['translation']['mbo']['arrow']
+    del tree['en']['translation']['mbo']['arrow']
+    assert getTree(module / 'tr' / 'resources.js') == tree
+    # снимок компактного дерева читается только в том же режиме
+    t.loadResources()
+    assert isinstance(t.resourcesData['ru'], t.ResourcesView)
+    assert t.resourcesData == tree
+    monkeypatch.setattr(t, 'resourcesCompact', False)
+    t.loadResources()
+    assert type(t.resourcesData['ru']) is dict
+    assert t.resourcesData == tree
+
+
+def testCompactResourcesKeepsOtherLanguages():
+    tree = t.compactResources({
+        'ru': {'translation': {'mbo': {'save': 'Сохранить'}}},
+        'en': {'translation': {'mbo': {'save': 'Save'}}},
+    })
+    with pytest.raises(TypeError):
+        tree['ru']['translation']['mbo']['save'] = {'x': 'Икс'}
+    assert tree['en']['translation']['mbo']['save'] == 'Save'
+    tree['ru']['translation']['mbo']['new'] = {'x': 'Икс'}
+    assert tree['ru']['translation']['mbo']['new'] == {'x': 'Икс'}
+    assert 'new' not in tree['en']['translation']['mbo']
+    del tree['ru']['translation']['mbo']['save']
+    assert tree['en']['translation']['mbo']['save'] == 'Save'
+    assert list(tree['ru']['translation']['mbo']) == ['new']
+
+
+# Раздельный перевод по языкам и пространствам имён
+
+def testSplitResources(module, monkeypatch):
+    text = conftest.resourcesText.replace("            mbo: {", "            other: { name: 'Имя' },\n            mbo: {")
+    (module / 'tr' / 'resources.js').write_text(text, encoding='utf-8')
+    pathSplit = module / 'locales'
+    monkeypatch.setattr(t, 'resourcesOutput', 'json')
+    monkeypatch.setattr(t, 'pathResourcesSplit', str(pathSplit))
+    monkeypatch.setattr(t, 'resourcesNamespaces', ['mbo'])
+    monkeypatch.setattr(t, 'resourcesSplit', {'files': {}, 'loaded': set(), 'full': False})
+    t.loadResources()  # первый запуск раскладывает PATH_RESOURCES по файлам
+    assert json.loads((pathSplit / 'ru' / 'other.json').read_text(encoding='utf-8')) == {'name': 'Имя'}
+    assert json.loads((pathSplit / 'en' / 'mbo.json').read_text(encoding='utf-8'))['example'] == {'getData': 'Get data'}
+    assert 'loadNamespace' in (pathSplit / 'index.js').read_text(encoding='utf-8')
+    t.loadResources()  # следующий запуск читает только RESOURCES_NAMESPACES
+    assert set(t.resourcesData['ru']['translation']) == {'mbo'}
+    assert 'other.name' not in t.keyIndex['types']
+    with pytest.raises(t.ForbiddenRewriting):
+        t.checkTKey('other.name')  # пространство имён загружается при первом обращении к ключу
+    assert t.resourcesData['en']['translation']['other'] == {'name': 'Имя'}
+    mbo = (pathSplit / 'ru' / 'mbo.json').stat().st_mtime_ns
+    t.addResources('Фамилия', 'other.surname', 'ru')
+    t.saveResources()
+    assert json.loads((pathSplit / 'ru' / 'other.json').read_text(encoding='utf-8')) == {'name': 'Имя', 'surname': 'Фамилия'}
+    assert (pathSplit / 'ru' / 'mbo.json').stat().st_mtime_ns == mbo  # неизменённые пространства имён не пишутся
+
+
+def testLoadNamespaceConcurrent(module, monkeypatch):
+    pathSplit = module / 'locales'
+    monkeypatch.setattr(t, 'resourcesOutput', 'json')
+    monkeypatch.setattr(t, 'pathResourcesSplit', str(pathSplit))
+    monkeypatch.setattr(t, 'resourcesNamespaces', ['none'])
+    monkeypatch.setattr(t, 'resourcesSplit', {'files': {}, 'loaded': set(), 'full': False})
+    t.loadResources()
+    t.loadResources()
+    assert 'mbo' not in t.resourcesSplit['loaded']
+    readSplitFile = t.readSplitFile
+    started = threading.Event()
+
+    def slowRead(path):
+        started.set()
+        time.sleep(0.2)
+        return readSplitFile(path)
+    monkeypatch.setattr(t, 'readSplitFile', slowRead)
+    thread = threading.Thread(target=t.loadNamespace, args=['mbo'])
+    thread.start()
+    started.wait()
+    # пока пространство имён читается в другом потоке, ключ всё равно виден как занятый
+    with pytest.raises(t.ForbiddenRewriting):
+        t.checkTKey('mbo.save')
+    thread.join()
+    assert t.getResourceText('mbo.save') == 'Сохранить'
+
+
+# Память переводов
+
+@pytest.fixture
+def memory(module, monkeypatch):
+    monkeypatch.setattr(t, 'pathTranslationMemory', str(module / 'memory.sqlite'))
+    monkeypatch.setattr(t, 'memoryState', {'connection': None, 'disabled': False})
+    yield module
+    if t.memoryState['connection'] != None:
+        t.memoryState['connection'].close()
+
+
+def testMemoryImportAndSearch(memory):
+    pathOther = memory / 'other.js'
+    pathOther.write_text(conftest.resourcesText.replace('mbo: {', 'crm: {').replace(
+        "save: 'Сохранить',", "saveData: 'Сохранить данные',").replace("save: 'Save',", "saveData: 'Save data',"), encoding='utf-8')
+    if t.openMemory() == None:
+        pytest.skip('SQLite без FTS5 trigram')
+    assert t.importMemory([str(pathOther)]) == 5
+    assert t.importMemory([]) == 5  # текущий перевод
+    options = t.searchMemory('Сохранить данные')
+    assert options[0]['key'] == 'crm.saveData'
+    assert options[0]['module'] == 'crm'
+    assert options[0]['targets'] == {'en': 'Save data'}
+    # mbo.save уже есть в текущем переводе с тем же значением - из памяти он не предлагается
+    assert all(option['key'] != 'mbo.save' for option in options)
+    # при записи перевода новые ключи попадают в память
+    t.addResources('Сохранить всё', 'mbo.saveAll', 'ru')
+    t.addResources('Save all', 'mbo.saveAll', 'en')
+    t.saveResources()
+    rows = t.memoryState['connection'].execute('''
+        SELECT units.source, targets.locale, targets.target FROM units JOIN targets ON targets.unit = units.id
+        WHERE units.key = ? AND units.resources = ?
+    ''', ('mbo.saveAll', t.getResourcesName())).fetchall()
+    assert rows == [('Сохранить всё', 'en', 'Save all')]
+
+
+def testSearchMemoryKeepsTree(memory, monkeypatch):
+    if t.openMemory() == None:
+        pytest.skip('SQLite без FTS5 trigram')
+    t.importMemory([])
+    monkeypatch.setattr(t, 'resourcesOutput', 'json')
+    monkeypatch.setattr(t, 'pathResourcesSplit', str(memory / 'locales'))
+    monkeypatch.setattr(t, 'resourcesNamespaces', ['none'])
+    monkeypatch.setattr(t, 'resourcesSplit', {'files': {}, 'loaded': set(), 'full': False})
+    t.loadResources()
+    t.loadResources()
+    loaded = set(t.resourcesSplit['loaded'])
+    # поиск идёт и в фоновом потоке: пространство имён mbo не загружается, а его ключ просто предлагается
+    assert [option['key'] for option in t.searchMemory('Сохранить')][:1] == ['mbo.save']
+    assert t.resourcesSplit['loaded'] == loaded
+    assert 'mbo' not in t.resourcesData['ru']['translation']
+    t.loadNamespace('mbo')
+    calls = []
+    monkeypatch.setattr(t, 'loadNamespace', calls.append)
+    assert all(option['key'] != 'mbo.save' for option in t.searchMemory('Сохранить'))
+    assert calls == []
+
+